@@ -0,0 +1,463 @@
+"""
+Command-line batch runner for the numerical methods (no PyQt needed).
+
+Each line of the job file is one JSON object (or one YAML document in a .yaml file):
+    {"id": "r1", "method": "bisection", "function": "x**3 - 2*x - 5", "start": 0, "end": 3}
+
+Run the jobs on 8 worker processes and write one JSON line per job:
+    python -m Methods.cli solve jobs.jsonl --output results.jsonl --workers 8
+
+Write the result arrays to an .npz file instead (keys "<job id>/<field>"):
+    python -m Methods.cli ode jobs.jsonl --output results.npz
+"""
+import argparse
+import functools
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from Methods.cubature import CUBATURE_METHODS, VARIABLES
+from Methods.curve_fitting import fit_linear_model, polynomial_basis, quadratic_fit
+from Methods.expressions import compile_expression, polynomial_coefficients
+from Methods.interpolation import lagrange_interpolation
+from Methods.linear_solvers import (batch_matrix_inversion, iterative_matrix_inversion, lu_factorization,
+                                    mixed_precision_solve, solve_with_factorization)
+from Methods.ode_solvers import EMBEDDED_PAIRS, compile_system, solve_adaptive, solve_fixed_step
+from Methods.quadrature import QUADRATURE_METHODS, romberg
+from Methods.result_cache import RESULT_CACHE
+from Methods.root_finding import (bisection_method, false_position_method, find_approximate_root,
+                                  find_sign_change_interval, polynomial_roots, real_roots, track_roots)
+from Methods.stiff_solvers import STIFF_METHODS, solve_stiff
+
+
+@functools.lru_cache(maxsize=256)
+def _function(func_str):
+    """ Compiled f(x), shared by every job of a sweep that uses the same expression. """
+    return compile_expression(func_str)
+
+
+@functools.lru_cache(maxsize=256)
+def _parametric(func_str):
+    """ Compiled f(x, p) for root continuation. """
+    return compile_expression(func_str, ("x", "p"))
+
+
+@functools.lru_cache(maxsize=256)
+def _system(func_str):
+    return compile_system(func_str)
+
+
+@functools.lru_cache(maxsize=64)
+def _factorization(data, n):
+    """ LU factorization of an n x n matrix given by its bytes, reused for repeated matrices. """
+    return lu_factorization(np.frombuffer(data).reshape(n, n))
+
+
+def _require(job, *keys):
+    missing = [key for key in keys if key not in job]
+    if missing:
+        raise ValueError(f"Missing field(s): {', '.join(missing)}")
+
+
+def _matrix(job, key):
+    A = np.array(job[key], dtype=float)
+    if A.ndim != 2 or A.shape[0] != A.shape[1]:
+        raise ValueError(f"'{key}' must be a square matrix.")
+    return A
+
+
+def _run_gaussian(job):
+    _require(job, "A", "b")
+    A = _matrix(job, "A")
+    b = np.array(job["b"], dtype=float)
+    if b.shape != (len(A),):
+        raise ValueError("'b' must have one entry per row of 'A'.")
+    # Same elimination as the Gaussian window, but a repeated A is only factored once
+    x, augmented_matrix = solve_with_factorization(_factorization(A.tobytes(), len(A)), b)
+    return {"x": x, "augmented_matrix": augmented_matrix}
+
+
+def _run_mixed_precision(job):
+    _require(job, "A", "b")
+    A = _matrix(job, "A")
+    b = np.array(job["b"], dtype=float)
+    if b.shape != (len(A),):
+        raise ValueError("'b' must have one entry per row of 'A'.")
+    x, iterations, precision = mixed_precision_solve(A, b, job.get("max_iter", 30))
+    return {"x": x, "refinement_steps": iterations, "factorization_precision": precision}
+
+
+def _run_inverse(job):
+    _require(job, "A")
+    inverse = iterative_matrix_inversion(_matrix(job, "A"), job.get("tol", 1e-6), job.get("max_iter", 50))
+    return {"inverse": inverse}
+
+
+def _run_batch_inverse(job):
+    _require(job, "A")
+    A = np.array(job["A"], dtype=float)
+    if A.ndim != 3 or A.shape[1] != A.shape[2]:
+        raise ValueError("'A' must be a list of square matrices of the same size.")
+    inverse, residuals, failed, iterations = batch_matrix_inversion(
+        A, job.get("tol", 1e-8), job.get("max_iter", 100), job.get("order", 2))
+    return {"inverse": inverse, "residuals": residuals, "failed": failed, "iterations": iterations}
+
+
+def _run_graphical(job):
+    _require(job, "function", "start", "end")
+    x = np.linspace(job["start"], job["end"], job.get("points", 400))
+    y = np.broadcast_to(_function(job["function"])(x), x.shape)
+    return {"root": find_approximate_root(x, y)}
+
+
+def _bracketing(method):
+    def run(job):
+        _require(job, "function", "start", "end")
+        f = _function(job["function"])
+        a, b = find_sign_change_interval(f, job["start"], job["end"])
+        if a is None:
+            raise ValueError("No root found in the given interval.")
+        root, iterations = method(f, a, b, job.get("tol", 1e-6), job.get("max_iter", 100))
+        return {"interval": [a, b], "root": root, "iterations": iterations}
+    return run
+
+
+def _run_continuation(job):
+    _require(job, "function", "start", "end", "p")
+    branches, events = track_roots(_parametric(job["function"]), job["start"], job["end"], job["p"],
+                                   job.get("tol", 1e-12), job.get("points", 400))
+    return {"branches": branches, "events": events}
+
+
+def _run_polynomial(job):
+    if "coefficients" in job:
+        coefficients = np.array(job["coefficients"], dtype=float)
+    else:
+        _require(job, "function")
+        coefficients = polynomial_coefficients(job["function"])
+        if coefficients is None:
+            raise ValueError("The function is not a polynomial in x.")
+    roots = polynomial_roots(coefficients, job.get("algorithm", "companion"))
+    return {"coefficients": coefficients, "roots_real": roots.real, "roots_imag": roots.imag,
+            "real_roots": real_roots(roots, coefficients)}
+
+
+def _run_romberg(job):
+    _require(job, "function", "a", "b", "h_values")
+    value, error, n_evals, R = romberg(_function(job["function"]), job["a"], job["b"], job["h_values"])
+    return {"value": value, "error": error, "n_evals": n_evals, "table": R}
+
+
+def _adaptive_quadrature(name):
+    def run(job):
+        _require(job, "function", "a", "b")
+        value, error, n_evals = QUADRATURE_METHODS[name](_function(job["function"]), job["a"], job["b"],
+                                                         tol=job.get("tol", 1e-10))
+        return {"value": value, "error": error, "n_evals": n_evals}
+    return run
+
+
+def _cubature(name):
+    def run(job):
+        _require(job, "function", "lower", "upper")
+        lower, upper = np.atleast_1d(job["lower"]), np.atleast_1d(job["upper"])
+        if not 1 <= len(lower) <= len(VARIABLES):
+            raise ValueError(f"'lower' and 'upper' must have 1 to {len(VARIABLES)} limits.")
+        f = compile_expression(job["function"], VARIABLES[:len(lower)])
+        value, error, n_evals, estimates = CUBATURE_METHODS[name](f, lower, upper, tol=job.get("tol", 1e-10))
+        return {"value": value, "error": error, "n_evals": n_evals, "estimates": estimates}
+    return run
+
+
+def _run_lagrange(job):
+    _require(job, "x", "y", "x_interp")
+    x = np.array(job["x"], dtype=float)
+    y = np.array(job["y"], dtype=float)
+    if x.shape != y.shape:
+        raise ValueError("'x' and 'y' must have the same length.")
+    if len(np.unique(x)) != len(x):
+        raise ValueError("'x' values must be distinct.")
+    values = lagrange_interpolation(x, y, np.array(job["x_interp"], dtype=float))
+    return {"values": values.tolist() if np.ndim(values) else float(values)}
+
+
+def _run_quadratic(job):
+    _require(job, "x", "y")
+    x = np.array(job["x"], dtype=float)
+    y = np.array(job["y"], dtype=float)
+    if x.shape != y.shape or len(x) < 3:
+        raise ValueError("'x' and 'y' must have the same length of at least 3.")
+    a, b, c = quadratic_fit(x, y)
+    return {"coefficients": [a, b, c]}
+
+
+def _run_linear_model(job):
+    _require(job, "x", "y")
+    x = np.array(job["x"], dtype=float)
+    # One curve, or a list of curves (one row per curve) sampled at the same x
+    y = np.array(job["y"], dtype=float)
+    if "basis" in job:
+        basis = job["basis"]
+    elif "degree" in job:
+        basis = polynomial_basis(int(job["degree"]))
+    else:
+        raise ValueError("Missing field(s): basis or degree")
+    model = fit_linear_model(x, y.T, basis, job.get("factorization", "qr"))
+    coefficients = model.coefficients.T
+    return {"basis": model.basis, "coefficients": coefficients, "rank": model.rank,
+            **{name: value.T if name == "standard_errors" else value for name, value in model.stats.items()}}
+
+
+def _trajectory_result(job, trajectory):
+    result = {"y": trajectory.y_final, "stats": trajectory.stats}
+    if "x_eval" in job:
+        result["y_eval"] = trajectory(job["x_eval"])
+    if job.get("trajectory"):
+        result["x_steps"] = trajectory.x
+        result["y_steps"] = trajectory.y
+    return result
+
+
+def _run_rk2(job):
+    _require(job, "function", "x0", "y0", "h", "x_target")
+    trajectory = solve_fixed_step(_system(job["function"]), job["x0"], job["y0"], job["h"], job["x_target"])
+    return _trajectory_result(job, trajectory)
+
+
+def _adaptive_ode(name):
+    def run(job):
+        _require(job, "function", "x0", "y0", "x_target")
+        trajectory = solve_adaptive(_system(job["function"]), job["x0"], job["y0"], job["x_target"], name,
+                                    rtol=job.get("rtol", 1e-6), atol=job.get("atol", 1e-9))
+        return _trajectory_result(job, trajectory)
+    return run
+
+
+def _stiff_ode(name):
+    def run(job):
+        _require(job, "function", "x0", "y0", "h", "x_target")
+        trajectory = solve_stiff(_system(job["function"]), job["x0"], job["y0"], job["h"], job["x_target"], name)
+        return _trajectory_result(job, trajectory)
+    return run
+
+
+def _slug(name):
+    """ Command-line name of a method, e.g. "Dormand-Prince 5(4)" -> "dormand_prince". """
+    name = re.sub(r"\s+[\d(].*$", "", name)
+    return re.sub(r"[\s-]+", "_", name).lower()
+
+
+# command -> {method: runner}; the first method of each command is its default
+COMMANDS = {
+    "solve": {
+        "gaussian": _run_gaussian,
+        "mixed_precision": _run_mixed_precision,
+        "inverse": _run_inverse,
+        "batch_inverse": _run_batch_inverse,
+        "graphical": _run_graphical,
+        "bisection": _bracketing(bisection_method),
+        "false_position": _bracketing(false_position_method),
+        "continuation": _run_continuation,
+        "polynomial": _run_polynomial,
+    },
+    "integrate": {
+        "romberg": _run_romberg,
+        **{_slug(name): _adaptive_quadrature(name) for name in QUADRATURE_METHODS},
+        "tensor_romberg": _cubature("Romberg"),
+        "sparse_grid": _cubature("Sparse grid (Smolyak)"),
+    },
+    "interpolate": {
+        "lagrange": _run_lagrange,
+    },
+    "fit": {
+        "quadratic": _run_quadratic,
+        "linear_model": _run_linear_model,
+    },
+    "ode": {
+        "rk2": _run_rk2,
+        **{_slug(name): _adaptive_ode(name) for name in EMBEDDED_PAIRS},
+        **{_slug(name): _stiff_ode(name) for name in STIFF_METHODS},
+    },
+}
+
+
+def run_job(command, job, default_method=None):
+    """
+    Run one job and return its record: the job id, method, status ("ok" or "error"),
+    the result or error message, and the elapsed time. Errors never propagate, so one
+    bad job does not stop a sweep.
+    """
+    methods = COMMANDS[command]
+    method = job.get("method", default_method or next(iter(methods)))
+    record = {"id": job.get("id"), "method": method}
+    start = time.perf_counter()
+    try:
+        if method not in methods:
+            raise ValueError(f"Unknown {command} method '{method}'; choose from {', '.join(methods)}.")
+        record["result"] = methods[method](job)
+        record["status"] = "ok"
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["elapsed_s"] = time.perf_counter() - start
+    return record
+
+
+def _run_chunk(command, jobs, default_method):
+    return [run_job(command, job, default_method) for job in jobs]
+
+
+def run_jobs(command, jobs, workers=1, default_method=None, chunk_size=64):
+    """
+    Run the jobs in order and yield their records as they complete.
+    With workers > 1 the jobs are sent to a process pool in chunks of `chunk_size`,
+    so tens of thousands of small jobs do not pay one round trip each.
+    """
+    if workers <= 1:
+        for job in jobs:
+            yield run_job(command, job, default_method)
+        return
+
+    chunks = [jobs[start:start + chunk_size] for start in range(0, len(jobs), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for records in pool.map(_run_chunk, [command] * len(chunks), chunks, [default_method] * len(chunks)):
+            yield from records
+
+
+def load_jobs(path):
+    """
+    Read jobs from a JSON lines file (one object per line, "-" for stdin), a JSON
+    array, or a YAML file with one job per document. Jobs without an id get their
+    line number.
+    """
+    file = sys.stdin if path == "-" else open(path)
+    with file:
+        text = file.read()
+
+    if path.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise RuntimeError("Reading YAML job files requires PyYAML (pip install pyyaml).")
+        jobs = []
+        for document in yaml.safe_load_all(text):
+            if document is not None:
+                jobs.extend(document if isinstance(document, list) else [document])
+    elif text.lstrip().startswith("["):
+        jobs = json.loads(text)
+    else:
+        jobs = []
+        for number, line in enumerate(text.splitlines(), start=1):
+            if line.strip() and not line.lstrip().startswith("#"):
+                try:
+                    jobs.append(json.loads(line))
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{path}, line {number}: {e}")
+
+    for index, job in enumerate(jobs):
+        if not isinstance(job, dict):
+            raise ValueError(f"Job {index + 1} is not an object.")
+        job.setdefault("id", index + 1)
+    return jobs
+
+
+def _to_json(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def write_jsonl(records, file):
+    """ Write each record as one JSON line; returns the number of failed jobs. """
+    failures = 0
+    for record in records:
+        failures += record["status"] != "ok"
+        file.write(json.dumps(record, default=_to_json) + "\n")
+    return failures
+
+
+# Result fields that are records rather than arrays, kept in the JSON index
+_INDEX_FIELDS = ("stats", "events")
+
+
+def _numeric_array(value):
+    """ value as a numeric array, or None if it has no numeric array form. """
+    try:
+        array = np.asarray(value)
+    except ValueError:
+        # Ragged nested lists
+        return None
+    return array if array.dtype.kind in "biufc" else None
+
+
+def write_npz(records, path):
+    """
+    Save the numeric results as "<job id>/<field>" arrays plus an "index" of
+    JSON records (id, method, status, error, elapsed time, and the non-numeric
+    fields such as stats and continuation events), so the file loads without
+    allow_pickle. Returns the number of failed jobs.
+    """
+    arrays, index, failures = {}, [], 0
+    for record in records:
+        failures += record["status"] != "ok"
+        for field, value in record.pop("result", {}).items():
+            if value is None:
+                continue
+            array = None if field in _INDEX_FIELDS else _numeric_array(value)
+            if array is None:
+                record[field] = value
+            else:
+                arrays[f"{record['id']}/{field}"] = array
+        index.append(json.dumps(record, default=_to_json))
+    np.savez_compressed(path, index=np.array(index), **arrays)
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run numerical method jobs from a job file.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for command, methods in COMMANDS.items():
+        sub = subparsers.add_parser(command, help=f"methods: {', '.join(methods)}")
+        sub.add_argument("jobs", help="Job file: JSON lines, a JSON array or YAML documents ('-' for stdin).")
+        sub.add_argument("--output", "-o", help="Output .jsonl or .npz file (default: JSON lines on stdout).")
+        sub.add_argument("--method", "-m", choices=list(methods), help="Method for jobs that do not name one.")
+        sub.add_argument("--workers", "-j", type=int, default=os.cpu_count() or 1,
+                         help="Worker processes (1 runs in this process).")
+        sub.add_argument("--chunk-size", type=int, default=64, help="Jobs sent to a worker at a time.")
+        sub.add_argument("--no-cache", action="store_true", help="Recompute instead of using the result cache.")
+    args = parser.parse_args(argv)
+
+    if args.no_cache:
+        # The environment variable also reaches the worker processes
+        os.environ["COMPMATH_CACHE"] = "0"
+        RESULT_CACHE.enabled = False
+
+    try:
+        jobs = load_jobs(args.jobs)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    start = time.perf_counter()
+    records = run_jobs(args.command, jobs, args.workers, args.method, args.chunk_size)
+    if args.output and args.output.endswith(".npz"):
+        failures = write_npz(records, args.output)
+    elif args.output:
+        with open(args.output, "w") as file:
+            failures = write_jsonl(records, file)
+    else:
+        failures = write_jsonl(records, sys.stdout)
+
+    print(f"{len(jobs)} job(s) in {time.perf_counter() - start:.2f}s, {failures} failed.", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
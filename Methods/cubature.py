@@ -0,0 +1,171 @@
+import functools
+import itertools
+import math
+import numpy as np
+from Methods.result_cache import cached_result
+
+# Names of the integration variables, in order of the limits
+VARIABLES = ("x", "y", "z")
+
+
+@functools.lru_cache(maxsize=64)
+def romberg_weights(level):
+    """
+    Weights of the 1-D Romberg rule on [0, 1] with 2**level intervals: the trapezoid rules
+    of every coarser level on the same nodes, combined by Richardson extrapolation.
+    """
+    n = 2 ** level
+    R = []
+    for k in range(level + 1):
+        step = 2 ** (level - k)
+        trapezoid = np.zeros(n + 1)
+        trapezoid[::step] = 1.0 / 2**k
+        trapezoid[[0, -1]] = 0.5 / 2**k
+        row = [trapezoid]
+        for j in range(1, k + 1):
+            row.append((4**j * row[j-1] - R[j-1]) / (4**j - 1))
+        R = row
+    weights = R[-1]
+    weights.flags.writeable = False
+    return weights
+
+
+def _box(lower, upper):
+    lower = np.atleast_1d(np.asarray(lower, dtype=float))
+    upper = np.atleast_1d(np.asarray(upper, dtype=float))
+    if lower.ndim != 1 or lower.shape != upper.shape or len(lower) == 0:
+        raise ValueError("Lower and upper limits must have the same number of dimensions.")
+    if not (np.all(np.isfinite(lower)) and np.all(np.isfinite(upper))):
+        raise ValueError("Integration limits must be finite.")
+    return lower, upper
+
+
+class HierarchicalGrid:
+    """
+    Values of f(x, y, ...) on nested trapezoid grids over a box, stored in hierarchical blocks.
+    Block m (one level per dimension) holds the points that first appear at level m[i] in
+    every dimension i: both ends at level 0, the odd multiples of (b - a) / 2**m[i] above.
+    Each block is a tensor grid evaluated with one broadcast call, so every point is
+    evaluated once, and the grid of any levels k is assembled from the blocks m <= k.
+    """
+
+    def __init__(self, f, lower, upper):
+        self.f = f
+        self.lower = lower
+        self.upper = upper
+        self.d = len(lower)
+        self.blocks = {}
+        self.integrals = {}
+        self.n_evals = 0
+
+    @staticmethod
+    def block_size(m):
+        return math.prod(2 if level == 0 else 2 ** (level - 1) for level in m)
+
+    def _nodes(self, i, level):
+        t = np.array([0.0, 1.0]) if level == 0 else np.arange(1, 2**level, 2) / 2**level
+        return self.lower[i] + (self.upper[i] - self.lower[i]) * t
+
+    def block(self, m):
+        if m not in self.blocks:
+            # One axis per dimension, so the coordinates broadcast to the block without a meshgrid
+            coords = [self._nodes(i, level).reshape((1,) * i + (-1,) + (1,) * (self.d - i - 1))
+                      for i, level in enumerate(m)]
+            shape = tuple(c.size for c in coords)
+            self.blocks[m] = np.broadcast_to(np.asarray(self.f(*coords), dtype=float), shape)
+            self.n_evals += self.blocks[m].size
+        return self.blocks[m]
+
+    def values(self, k):
+        """ Values on the full grid with 2**k[i] intervals in dimension i. """
+        G = np.empty(tuple(2**level + 1 for level in k))
+        for m in itertools.product(*(range(level + 1) for level in k)):
+            index = tuple(slice(0, None, 2**ki) if mi == 0 else slice(2**(ki-mi), None, 2**(ki-mi+1))
+                          for ki, mi in zip(k, m))
+            G[index] = self.block(m)
+        return G
+
+    def integral(self, k):
+        """ Tensor product of the 1-D Romberg rules of levels k over the box. """
+        if k not in self.integrals:
+            G = self.values(k)
+            # Contracting the leading axis each time applies the rule of every dimension in turn
+            for level in k:
+                G = np.tensordot(romberg_weights(level), G, axes=(0, 0))
+            self.integrals[k] = float(G) * float(np.prod(self.upper - self.lower))
+        return self.integrals[k]
+
+
+def _multi_indices(d, total):
+    """ All d-tuples of non-negative levels summing to total. """
+    if d == 1:
+        yield (total,)
+        return
+    for first in range(total + 1):
+        for rest in _multi_indices(d - 1, total - first):
+            yield (first,) + rest
+
+
+def _converged(estimates, tol):
+    return len(estimates) > 1 and abs(estimates[-1] - estimates[-2]) <= tol * max(1.0, abs(estimates[-1]))
+
+
+def _result(grid, estimates):
+    error = abs(estimates[-1] - estimates[-2]) if len(estimates) > 1 else float("nan")
+    return estimates[-1], error, grid.n_evals, np.array(estimates)
+
+
+@cached_result
+def tensor_romberg(f, lower, upper, tol=1e-10, max_level=12, max_points=2**22):
+    """
+    Romberg integration of f(x, y, ...) over the box [lower, upper] on tensor-product grids.
+    Level l has 2**l intervals in every dimension and applies the 1-D Romberg rule along
+    each one; refining reuses every point of the coarser levels. Stops when two levels
+    agree to tol (relative to max(1, |value|)) or the next grid exceeds max_points.
+    Returns (value, error estimate, number of evaluations, estimate of every level).
+    """
+    lower, upper = _box(lower, upper)
+    grid = HierarchicalGrid(f, lower, upper)
+    estimates = []
+    for level in range(max_level + 1):
+        if estimates and (2**level + 1) ** grid.d > max_points:
+            break
+        estimates.append(grid.integral((level,) * grid.d))
+        if _converged(estimates, tol):
+            break
+    return _result(grid, estimates)
+
+
+@cached_result
+def sparse_grid_romberg(f, lower, upper, tol=1e-10, max_level=20, max_points=2**22):
+    """
+    Smolyak sparse-grid integration with the same 1-D Romberg rules. Level l combines
+    the tensor rules of levels k with l - d + 1 <= |k| <= l:
+        Q_l = sum of (-1)**(l - |k|) * C(d - 1, l - |k|) * Q_k
+    which needs O(2**l * l**(d-1)) points instead of the O(2**(l*d)) of the full grid
+    for comparable accuracy on smooth integrands. Returns the same as tensor_romberg.
+    """
+    lower, upper = _box(lower, upper)
+    grid = HierarchicalGrid(f, lower, upper)
+    d = grid.d
+    estimates = []
+    n_points = 0
+    for level in range(max_level + 1):
+        # Points of the sparse grid of this level: every block with |m| <= level
+        n_points += sum(grid.block_size(m) for m in _multi_indices(d, level))
+        if estimates and n_points > max_points:
+            break
+        value = 0.0
+        for total in range(max(0, level - d + 1), level + 1):
+            coefficient = (-1) ** (level - total) * math.comb(d - 1, level - total)
+            value += coefficient * sum(grid.integral(k) for k in _multi_indices(d, total))
+        estimates.append(value)
+        if _converged(estimates, tol):
+            break
+    return _result(grid, estimates)
+
+
+CUBATURE_METHODS = {
+    "Romberg": tensor_romberg,
+    "Sparse grid (Smolyak)": sparse_grid_romberg,
+}
@@ -0,0 +1,177 @@
+import numpy as np
+from scipy.linalg import qr, solve_triangular
+from Methods.expressions import compile_expression
+from Methods.result_cache import cached_result, register_result_type
+
+
+def polynomial_basis(degree):
+    """ Basis expressions of a polynomial of the given degree, highest power first. """
+    return [f"x**{k}" for k in range(degree, 1, -1)] + (["x"] if degree >= 1 else []) + ["1"]
+
+
+def exponential_basis(rates, constant=True):
+    """ Basis expressions exp(r*x) for each rate r, optionally with a constant term. """
+    return [f"np.exp({float(rate)!r}*x)" for rate in rates] + (["1"] if constant else [])
+
+
+def design_matrix(basis, x):
+    """ Matrix with one column per basis expression evaluated at the points x. """
+    x = np.asarray(x, dtype=float)
+    # Column-major, so each column is contiguous and LAPACK factors it without a transposed copy
+    A = np.empty(x.shape + (len(basis),), order="F")
+    for j, term in enumerate(basis):
+        A[..., j] = compile_expression(term)(x)
+    return A
+
+
+class DesignFactorization:
+    """
+    Factorization of a design matrix A, computed once and shared by every right-hand side.
+    Householder QR when A has full column rank, otherwise the SVD, whose singular
+    values below rcond * s_max are dropped (minimum-norm solution). With overwrite_a
+    the factorization reuses the memory of A.
+    """
+
+    def __init__(self, A, method="qr", rcond=None, overwrite_a=False):
+        n, m = A.shape
+        if n < m:
+            raise ValueError(f"At least {m} data points are needed to fit {m} basis functions.")
+        self.rcond = rcond if rcond is not None else np.finfo(float).eps * max(n, m)
+
+        self.method = method
+        if method == "qr":
+            self.Q, self.R = qr(A, mode="economic", overwrite_a=overwrite_a, check_finite=False)
+            diagonal = np.abs(np.diag(self.R))
+            # A tiny diagonal entry of R means dependent columns; those need the SVD,
+            # which is the SVD of the small R rotated by Q
+            if diagonal.min() <= self.rcond * diagonal.max():
+                self.method = "svd"
+                U, self.s, self.Vt = np.linalg.svd(self.R)
+                self.U = self.Q @ U
+                del self.Q, self.R
+        elif method == "svd":
+            self.U, self.s, self.Vt = np.linalg.svd(A, full_matrices=False)
+        else:
+            raise ValueError(f"Unknown factorization: {method}")
+
+        if self.method == "svd":
+            self.rank = int(np.sum(self.s > self.rcond * self.s[0])) if self.s[0] > 0 else 0
+        else:
+            self.rank = m
+
+    def fitted(self, Y):
+        """ Projection of the columns of Y onto the column space of A (the fitted values). """
+        basis = self.Q if self.method == "qr" else self.U[:, :self.rank]
+        return basis @ (basis.T @ Y)
+
+    def solve(self, Y):
+        """ Least squares coefficients for every column of Y (one multi-RHS solve). """
+        if self.method == "qr":
+            return solve_triangular(self.R, self.Q.T @ Y, check_finite=False)
+        r = self.rank
+        return self.Vt[:r].T @ ((self.U[:, :r].T @ Y) / self.s[:r].reshape((r,) + (1,) * (Y.ndim - 1)))
+
+    def coefficient_variances(self):
+        """ diag((A^T A)^+), which scaled by a curve's residual variance gives its coefficient variances. """
+        if self.method == "qr":
+            R_inv = solve_triangular(self.R, np.eye(len(self.R)), check_finite=False)
+            return np.sum(R_inv ** 2, axis=1)
+        r = self.rank
+        return np.sum((self.Vt[:r].T / self.s[:r]) ** 2, axis=1)
+
+
+@register_result_type
+class LinearModel:
+    """
+    Least squares fit of a linear combination of basis expressions to one or many curves.
+    coefficients has one row per basis term (and one column per curve when several
+    curves were fitted); stats holds per-curve arrays: rss, rmse, r_squared,
+    max_residual and the standard errors of the coefficients.
+    """
+
+    def __init__(self, basis, coefficients, stats, rank, method):
+        self.basis = list(basis)
+        self.coefficients = np.asarray(coefficients, dtype=float)
+        self.stats = stats
+        self.rank = rank
+        self.method = method
+
+    @property
+    def n_curves(self):
+        return 1 if self.coefficients.ndim == 1 else self.coefficients.shape[1]
+
+    def __call__(self, x):
+        """ Fitted values at x: shape x.shape for one curve, x.shape + (n_curves,) for several. """
+        return design_matrix(self.basis, x) @ self.coefficients
+
+    def equation(self, curve=0, precision=4):
+        """ The fitted function of one curve as text, e.g. "y = 1.0000*x**2 + 0.5000*x + -2.0000". """
+        c = self.coefficients if self.coefficients.ndim == 1 else self.coefficients[:, curve]
+        terms = [f"{value:.{precision}f}" if term == "1" else f"{value:.{precision}f}*{term}"
+                 for value, term in zip(c, self.basis)]
+        return "y = " + " + ".join(terms)
+
+
+def _residual_statistics(factorization, Y):
+    """ Per-curve residual statistics, computed over blocks of curves to bound memory. """
+    n = len(Y)
+    dof = max(n - factorization.rank, 1)
+    Y2 = Y.reshape(n, -1)
+    k = Y2.shape[1]
+    rss = np.empty(k)
+    max_residual = np.empty(k)
+    tss = np.empty(k)
+    sum_squares = np.empty(k)
+    block = max(1, 2**22 // max(n, 1))
+    for start in range(0, k, block):
+        columns = slice(start, start + block)
+        residuals = Y2[:, columns] - factorization.fitted(Y2[:, columns])
+        rss[columns] = np.einsum("ij,ij->j", residuals, residuals)
+        max_residual[columns] = np.max(np.abs(residuals), axis=0, initial=0.0)
+        centered = Y2[:, columns] - Y2[:, columns].mean(axis=0)
+        tss[columns] = np.einsum("ij,ij->j", centered, centered)
+        sum_squares[columns] = np.einsum("ij,ij->j", Y2[:, columns], Y2[:, columns])
+
+    # Curves that are constant up to rounding have no variance to explain; fitted exactly, R² = 1
+    rounding = (n * np.finfo(float).eps) ** 2 * sum_squares
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r_squared = np.where(tss <= rounding, np.where(rss <= rounding, 1.0, 0.0), 1 - rss / tss)
+    standard_errors = np.sqrt(np.outer(factorization.coefficient_variances(), rss / dof))
+
+    stats = {"rss": rss, "rmse": np.sqrt(rss / n), "r_squared": r_squared,
+             "max_residual": max_residual, "standard_errors": standard_errors}
+    if Y.ndim == 1:
+        stats = {name: value[..., 0] for name, value in stats.items()}
+    return stats
+
+
+@cached_result
+def fit_linear_model(x, Y, basis, method="qr"):
+    """
+    Least squares fit of y = sum of c_j * basis_j(x) to one curve (Y of shape (n,)) or to
+    many curves sampled at the same x (Y of shape (n, n_curves), one curve per column).
+    The design matrix is factored once (QR, or SVD if it is rank deficient or requested)
+    and every curve is solved in one multi-right-hand-side solve. Returns a LinearModel.
+    """
+    x = np.asarray(x, dtype=float)
+    Y = np.asarray(Y, dtype=float)
+    basis = list(basis)
+    if x.ndim != 1 or Y.ndim not in (1, 2) or len(Y) != len(x):
+        raise ValueError("y must have one value (or one row of curve values) per x value.")
+    if not basis:
+        raise ValueError("At least one basis function is required.")
+
+    A = design_matrix(basis, x)
+    if not np.all(np.isfinite(A)):
+        raise ValueError("The basis functions are not finite at every x value.")
+    # A is not needed after factoring: the residuals come from the orthonormal factor
+    factorization = DesignFactorization(A, method, overwrite_a=True)
+    del A
+    coefficients = factorization.solve(Y)
+    stats = _residual_statistics(factorization, Y)
+    return LinearModel(basis, coefficients, stats, factorization.rank, factorization.method)
+
+
+def quadratic_fit(x, y):
+    """ Least squares fit of y = a*x**2 + b*x + c; returns the coefficients [a, b, c]. """
+    return fit_linear_model(x, y, polynomial_basis(2)).coefficients
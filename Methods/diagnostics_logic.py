@@ -0,0 +1,77 @@
+import sys
+from PyQt6.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QLabel, QPushButton,
+                             QMessageBox, QTableWidget, QTableWidgetItem, QFileDialog)
+from Methods.instrumentation import PHASES, TRACER
+
+COLUMNS = ["Window", "Handler", "Total (ms)"] + [f"{phase.capitalize()} (ms)" for phase in PHASES + ("other",)] + \
+          ["f calls", "f points", "Iterations"]
+
+
+class DiagnosticsWindow(QMainWindow):
+    def __init__(self):
+        super().__init__()
+
+        self.setWindowTitle("Diagnostics")
+        self.setGeometry(150, 150, 1000, 400)
+
+        # Central widget and layout
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        layout = QVBoxLayout(central_widget)
+
+        layout.addWidget(QLabel("Time per phase for each button click (exclusive times; most recent first):"))
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        layout.addWidget(self.table)
+
+        # Buttons
+        button_layout = QHBoxLayout()
+        self.refresh_button = QPushButton("Refresh")
+        self.refresh_button.clicked.connect(self.refresh)
+        button_layout.addWidget(self.refresh_button)
+
+        self.clear_button = QPushButton("Clear")
+        self.clear_button.clicked.connect(self.clear)
+        button_layout.addWidget(self.clear_button)
+
+        self.export_button = QPushButton("Export Chrome Trace")
+        self.export_button.clicked.connect(self.export_trace)
+        button_layout.addWidget(self.export_button)
+        layout.addLayout(button_layout)
+
+        self.refresh()
+
+    def refresh(self):
+        """ Fill the table from the recorded runs. """
+        runs = list(TRACER.runs)[::-1]
+        self.table.setRowCount(len(runs))
+        for row, run in enumerate(runs):
+            values = [run["window"], run["handler"], f"{run['total_ms']:.2f}"]
+            values += [f"{run['phases_ms'][phase]:.2f}" for phase in PHASES + ("other",)]
+            values += [str(run["n_calls"]), str(run["n_points"]),
+                       "" if run["iterations"] is None else str(run["iterations"])]
+            for col, value in enumerate(values):
+                self.table.setItem(row, col, QTableWidgetItem(value))
+        self.table.resizeColumnsToContents()
+
+    def clear(self):
+        """ Forget all recorded runs and trace events. """
+        TRACER.clear()
+        self.refresh()
+
+    def export_trace(self):
+        """ Save the trace as Chrome trace-event JSON (open in chrome://tracing or Perfetto). """
+        path, _ = QFileDialog.getSaveFileName(self, "Export Chrome Trace", "trace.json", "JSON Files (*.json)")
+        if not path:
+            return
+        try:
+            TRACER.export_chrome_trace(path)
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Could not export trace: {e}")
+
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    window = DiagnosticsWindow()
+    window.show()
+    sys.exit(app.exec())
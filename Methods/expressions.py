@@ -0,0 +1,447 @@
+"""
+Safe compilation of user expressions.
+
+An expression is parsed and checked against a whitelist instead of being passed to
+eval: only numbers, the declared variables, arithmetic, comparisons, indexing, list
+literals and whitelisted functions and constants (NumPy ufuncs and math functions,
+written as np.sin, math.sin or sin) are accepted. Attribute access, builtins, imports,
+strings, lambdas and comprehensions are all rejected, so an expression cannot reach
+anything but the numeric functions it names.
+
+The checked expression is constant-folded and repeated subexpressions are computed
+once, then it is emitted as a Python function in which every allowed function is a
+local name, so an evaluation costs no attribute lookups. Integer powers that could grow
+without bound (e.g. 2**2**64) are computed in floating point past MAX_INTEGER_BITS, both
+when folding and when evaluating.
+"""
+import ast
+import functools
+import math
+import operator
+
+import numpy as np
+
+# NumPy functions that are not ufuncs but are safe and useful in expressions
+_NUMPY_FUNCTIONS = [
+    "where", "clip", "sinc", "array", "asarray", "concatenate", "stack", "hstack", "vstack",
+    "column_stack", "zeros_like", "ones_like", "full_like", "sum", "prod", "mean", "cumsum",
+    "diff", "dot", "real", "imag", "angle", "round",
+]
+_NUMPY_CONSTANTS = ["pi", "e", "inf", "nan", "euler_gamma"]
+
+# Math-style names, usable bare or with the math. prefix, mapped to vectorized equivalents
+_MATH_NAMES = {
+    "sin": np.sin, "cos": np.cos, "tan": np.tan, "asin": np.arcsin, "acos": np.arccos,
+    "atan": np.arctan, "atan2": np.arctan2, "sinh": np.sinh, "cosh": np.cosh, "tanh": np.tanh,
+    "asinh": np.arcsinh, "acosh": np.arccosh, "atanh": np.arctanh, "exp": np.exp,
+    "expm1": np.expm1, "log": np.log, "log10": np.log10, "log2": np.log2, "log1p": np.log1p,
+    "sqrt": np.sqrt, "fabs": np.fabs, "floor": np.floor, "ceil": np.ceil, "trunc": np.trunc,
+    "hypot": np.hypot, "degrees": np.degrees, "radians": np.radians, "pow": np.power,
+    "pi": math.pi, "e": math.e, "tau": math.tau, "inf": math.inf, "nan": math.nan,
+}
+
+# Functions that may be called (or constants used) with the dotted name they are written as
+ALLOWED_NAMES = {
+    **{f"np.{name}": getattr(np, name) for name in dir(np) if isinstance(getattr(np, name), np.ufunc)},
+    **{f"np.{name}": getattr(np, name) for name in _NUMPY_FUNCTIONS + _NUMPY_CONSTANTS},
+    **{f"math.{name}": value for name, value in _MATH_NAMES.items()},
+    **_MATH_NAMES,
+    "abs": np.abs,
+    "len": len,
+}
+
+# Array constructors, only allowed when requested (e.g. to build an ensemble of initial values)
+ARRAY_FUNCTIONS = {
+    f"np.{name}": functools.reduce(getattr, name.split("."), np)
+    for name in ["linspace", "arange", "zeros", "ones", "full", "eye", "meshgrid", "tile", "repeat",
+                 "random.rand", "random.randn", "random.random", "random.uniform", "random.normal"]
+}
+
+# Values of these can be computed at compile time when all their arguments are constants
+_FOLDABLE = {value for value in ALLOWED_NAMES.values() if isinstance(value, np.ufunc)} | {
+    value for value in _MATH_NAMES.values() if callable(value)} | {np.abs}
+
+# Largest exact integer power computed, in bits; larger ones are computed in floating point
+MAX_INTEGER_BITS = 4096
+
+
+def power(base, exponent):
+    """
+    base ** exponent, except that an exact integer power of more than MAX_INTEGER_BITS
+    bits is computed in floating point (where it overflows to inf) instead of taking
+    unbounded time and memory.
+    """
+    if (isinstance(base, int) and isinstance(exponent, int) and exponent > 0 and abs(base) > 1
+            and abs(base).bit_length() * exponent > MAX_INTEGER_BITS):
+        return np.power(float(base), float(exponent))
+    return base ** exponent
+
+
+_BINARY_OPERATORS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod, ast.Pow: power,
+    ast.BitAnd: operator.and_, ast.BitOr: operator.or_, ast.BitXor: operator.xor,
+}
+_UNARY_OPERATORS = {ast.UAdd: operator.pos, ast.USub: operator.neg, ast.Invert: operator.invert}
+_COMPARISONS = (ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq)
+
+# Subexpressions worth computing once when they occur more than once
+_REUSABLE = (ast.BinOp, ast.UnaryOp, ast.Call, ast.Subscript, ast.Compare)
+
+
+def _dotted_name(node):
+    """ "np.random.rand" for the corresponding Attribute chain, or None. """
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return ".".join(reversed(parts))
+
+
+class _Compiler:
+    """ Checks, folds and rewrites one expression. """
+
+    def __init__(self, variables, allowed):
+        self.variables = variables
+        self.allowed = allowed
+        self.bindings = {}
+        self.binding_names = {}
+        # Bound names of functions whose calls must not be merged (random numbers)
+        self.impure = set()
+
+    def bind(self, value):
+        """ Local name under which a function or constant is available to the generated code. """
+        key = id(value)
+        if key not in self.binding_names:
+            name = f"__v{len(self.binding_names)}"
+            self.binding_names[key] = name
+            self.bindings[name] = value
+        return ast.Name(self.binding_names[key], ast.Load())
+
+    def constant(self, value):
+        """ Node for a folded value: a literal for plain numbers, a bound name otherwise. """
+        if isinstance(value, np.generic):
+            value = value.item()
+        if isinstance(value, (bool, int, float, complex)):
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and value < 0:
+                # Negative literals are written as negations, like the parser does
+                return ast.UnaryOp(ast.USub(), ast.Constant(-value))
+            return ast.Constant(value)
+        return self.bind(value)
+
+    @staticmethod
+    def literal(node):
+        """ The value of a constant node (including a negated literal), or raise KeyError. """
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub) and isinstance(node.operand, ast.Constant):
+            return -node.operand.value
+        raise KeyError
+
+    def fold(self, node, compute, operands):
+        """ Replace node by its value when every operand is a constant and evaluating is safe. """
+        try:
+            values = [self.literal(operand) for operand in operands]
+        except KeyError:
+            return node
+        try:
+            with np.errstate(all="ignore"):
+                return self.constant(compute(*values))
+        except Exception:
+            # Leave e.g. 1/0 to fail at evaluation time, as it always did
+            return node
+
+    def visit(self, node):
+        method = getattr(self, f"visit_{type(node).__name__}", None)
+        if method is None:
+            raise ValueError(f"Unsupported syntax in expression: {type(node).__name__}")
+        return method(node)
+
+    def visit_Expression(self, node):
+        return self.visit(node.body)
+
+    def visit_Constant(self, node):
+        # Numbers and booleans only; strings and bytes have no use in a numeric expression
+        if not isinstance(node.value, (bool, int, float, complex)):
+            raise ValueError(f"Unsupported constant in expression: {node.value!r}")
+        return node
+
+    def visit_Name(self, node):
+        if node.id in self.variables:
+            return node
+        if node.id in self.allowed:
+            value = self.allowed[node.id]
+            return self.bind(value) if callable(value) else self.constant(value)
+        raise ValueError(f"Unknown name in expression: '{node.id}'")
+
+    def visit_Attribute(self, node):
+        name = _dotted_name(node)
+        if name is None or name not in self.allowed:
+            raise ValueError(f"'{name or ast.unparse(node)}' is not allowed in an expression.")
+        value = self.allowed[name]
+        return self.bind(value) if callable(value) else self.constant(value)
+
+    def visit_BinOp(self, node):
+        if type(node.op) not in _BINARY_OPERATORS:
+            raise ValueError(f"Unsupported operator in expression: {type(node.op).__name__}")
+        left, right = self.visit(node.left), self.visit(node.right)
+        return self.fold(ast.BinOp(left, node.op, right), _BINARY_OPERATORS[type(node.op)], [left, right])
+
+    def visit_UnaryOp(self, node):
+        if type(node.op) not in _UNARY_OPERATORS:
+            raise ValueError(f"Unsupported operator in expression: {type(node.op).__name__}")
+        operand = self.visit(node.operand)
+        return self.fold(ast.UnaryOp(node.op, operand), _UNARY_OPERATORS[type(node.op)], [operand])
+
+    def visit_Compare(self, node):
+        if not all(isinstance(op, _COMPARISONS) for op in node.ops):
+            raise ValueError("Only <, <=, >, >=, == and != comparisons are allowed.")
+        return ast.Compare(self.visit(node.left), node.ops, [self.visit(c) for c in node.comparators])
+
+    def visit_Call(self, node):
+        if isinstance(node.func, ast.Name):
+            name = node.func.id
+        else:
+            name = _dotted_name(node.func)
+        if name is None or name not in self.allowed or not callable(self.allowed[name]):
+            raise ValueError(f"Function '{name or ast.unparse(node.func)}' is not allowed in an expression.")
+        if any(isinstance(arg, ast.Starred) for arg in node.args) or any(k.arg is None for k in node.keywords):
+            raise ValueError("Argument unpacking is not allowed in an expression.")
+
+        function = self.allowed[name]
+        args = [self.visit(arg) for arg in node.args]
+        keywords = [ast.keyword(k.arg, self.visit(k.value)) for k in node.keywords]
+        call = ast.Call(self.bind(function), args, keywords)
+        if name.startswith("np.random."):
+            self.impure.add(call.func.id)
+        if function in _FOLDABLE and not keywords:
+            return self.fold(call, function, args)
+        return call
+
+    def visit_Subscript(self, node):
+        return ast.Subscript(self.visit(node.value), self.visit(node.slice), ast.Load())
+
+    def visit_Slice(self, node):
+        return ast.Slice(*[None if part is None else self.visit(part) for part in (node.lower, node.upper, node.step)])
+
+    def visit_List(self, node):
+        return ast.List([self.visit(element) for element in node.elts], ast.Load())
+
+    def visit_Tuple(self, node):
+        return ast.Tuple([self.visit(element) for element in node.elts], ast.Load())
+
+    def bounded_power(self, node):
+        """ Whether base ** exponent cannot build an arbitrarily large exact integer when evaluated. """
+        try:
+            exponent = self.literal(node.right)
+            if isinstance(exponent, (float, complex)):
+                return True
+            # A small power of a variable grows its argument by a bounded factor
+            if isinstance(node.left, ast.Name) and node.left.id in self.variables and abs(exponent) <= 64:
+                return True
+        except KeyError:
+            pass
+        try:
+            return isinstance(self.literal(node.left), (float, complex))
+        except KeyError:
+            return False
+
+    def guard_powers(self, node):
+        """ Route every power that could be an unbounded integer power through power(). """
+        for field, value in ast.iter_fields(node):
+            if isinstance(value, list):
+                setattr(node, field, [self.guard_powers(item) if isinstance(item, ast.AST) else item
+                                      for item in value])
+            elif isinstance(value, ast.AST):
+                setattr(node, field, self.guard_powers(value))
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow) and not self.bounded_power(node):
+            return ast.Call(self.bind(power), [node.left, node.right], [])
+        return node
+
+
+def _eliminate_common_subexpressions(tree, impure=()):
+    """
+    Split an expression into assignments of its repeated subexpressions and a final
+    expression, so e.g. np.exp(-x) in np.exp(-x) * np.sin(np.exp(-x)) is computed once.
+    Subexpressions calling an impure function are never merged.
+    Returns (statements, expression).
+    """
+    counts = {}
+    for node in ast.walk(tree):
+        if isinstance(node, _REUSABLE) and not any(
+                isinstance(n, ast.Name) and n.id in impure for n in ast.walk(node)):
+            key = ast.dump(node)
+            counts[key] = counts.get(key, 0) + 1
+
+    statements = []
+    names = {}
+
+    def rewrite(node):
+        if not isinstance(node, ast.AST):
+            return node
+        key = ast.dump(node) if isinstance(node, _REUSABLE) else None
+        if key not in counts:
+            key = None
+        if key is not None and key in names:
+            return ast.Name(names[key], ast.Load())
+        # Children first, so inner temporaries are assigned before the outer ones that use them
+        for field, value in ast.iter_fields(node):
+            if isinstance(value, list):
+                setattr(node, field, [rewrite(item) for item in value])
+            else:
+                setattr(node, field, rewrite(value))
+        if key is not None and counts[key] > 1:
+            names[key] = f"__t{len(names)}"
+            statements.append(ast.Assign([ast.Name(names[key], ast.Store())], node))
+            return ast.Name(names[key], ast.Load())
+        return node
+
+    return statements, rewrite(tree)
+
+
+def _check(func_str, variables, functions=()):
+    """ Parse, check and fold an expression; returns the compiler and the folded tree. """
+    if not func_str.strip():
+        raise ValueError("Expression cannot be empty.")
+    for variable in variables:
+        if not variable.isidentifier() or variable.startswith("__"):
+            raise ValueError(f"Invalid variable name: {variable!r}")
+    try:
+        tree = ast.parse(func_str.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression: {e.msg}")
+
+    allowed = {**ALLOWED_NAMES, **{name: ARRAY_FUNCTIONS[name] for name in functions}}
+    compiler = _Compiler(set(variables), allowed)
+    return compiler, compiler.visit(tree)
+
+
+@functools.lru_cache(maxsize=256)
+def _compile(func_str, variables, functions):
+    compiler, expression = _check(func_str, variables, functions)
+    expression = compiler.guard_powers(expression)
+    statements, expression = _eliminate_common_subexpressions(expression, compiler.impure)
+
+    arguments = ast.arguments(posonlyargs=[], args=[ast.arg(v) for v in variables], vararg=None,
+                              kwonlyargs=[], kw_defaults=[], kwarg=None, defaults=[])
+    function = ast.FunctionDef("expression", arguments, statements + [ast.Return(expression)], [], None)
+    module = ast.fix_missing_locations(ast.Module([function], type_ignores=[]))
+
+    # No builtins: the generated code can only reach the bound functions and constants
+    namespace = {"__builtins__": {}, **compiler.bindings}
+    exec(compile(module, "<expression>", "exec"), namespace)
+    expression = namespace["expression"]
+    # Identifies the function by its text, so results computed with it can be cached
+    expression.cache_key = ("expression", func_str, variables)
+    return expression
+
+
+def compile_expression(func_str, variables=("x",), functions=()):
+    """
+    Compile a user expression once and return a vectorized callable.
+    Arguments are bound to `variables` by position or by name (e.g. parameters of a
+    family of functions). `functions` lists extra allowed names from ARRAY_FUNCTIONS.
+    Raises ValueError for invalid or disallowed expressions.
+    """
+    variables = tuple(variables)
+    for name in functions:
+        if name not in ARRAY_FUNCTIONS:
+            raise ValueError(f"Unknown array function: {name}")
+    # Compiled functions have no state, so one is shared by every caller of the same text
+    return _compile(func_str, variables, tuple(functions))
+
+
+# Functions that are not ufuncs but still compute each element from the same elements of their arguments
+_ELEMENTWISE = {np.where, np.clip, np.sinc, np.real, np.imag, np.angle, np.round}
+
+
+@functools.lru_cache(maxsize=256)
+def is_elementwise(func_str, variables=("x",)):
+    """
+    Whether an expression computes every element of its result from the same element of
+    its variables only (no indexing, reductions, len or list literals), so that it can be
+    evaluated on separate chunks of an array. False for invalid expressions.
+    """
+    try:
+        compiler, tree = _check(func_str, tuple(variables))
+    except ValueError:
+        return False
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Subscript, ast.List, ast.Tuple)):
+            return False
+        if isinstance(node, ast.Call):
+            function = compiler.bindings[node.func.id]
+            if not (isinstance(function, np.ufunc) or function in _ELEMENTWISE):
+                return False
+    return True
+
+
+# Polynomials of higher degree are left to the general methods
+MAX_POLYNOMIAL_DEGREE = 256
+
+
+def _polynomial(node, variable):
+    """ Coefficients (highest degree first) of a folded expression tree, or None if it is not a polynomial. """
+    if isinstance(node, ast.Constant):
+        value = node.value
+        return np.array([float(value)]) if isinstance(value, (int, float)) and np.isfinite(value) else None
+    if isinstance(node, ast.Name):
+        return np.array([1.0, 0.0]) if node.id == variable else None
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        operand = _polynomial(node.operand, variable)
+        if operand is None:
+            return None
+        return -operand if isinstance(node.op, ast.USub) else operand
+    if not isinstance(node, ast.BinOp):
+        return None
+
+    left = _polynomial(node.left, variable)
+    if isinstance(node.op, ast.Pow):
+        exponent = node.right.value if isinstance(node.right, ast.Constant) else None
+        if (left is None or isinstance(exponent, bool) or not isinstance(exponent, (int, float))
+                or exponent < 0 or exponent != int(exponent)
+                or (len(left) - 1) * int(exponent) > MAX_POLYNOMIAL_DEGREE):
+            return None
+        result = np.array([1.0])
+        for _ in range(int(exponent)):
+            result = np.polymul(result, left)
+        return result
+    right = _polynomial(node.right, variable)
+    if left is None or right is None:
+        return None
+    if isinstance(node.op, ast.Add):
+        return np.polyadd(left, right)
+    if isinstance(node.op, ast.Sub):
+        return np.polysub(left, right)
+    if isinstance(node.op, ast.Mult):
+        return None if len(left) + len(right) - 2 > MAX_POLYNOMIAL_DEGREE else np.polymul(left, right)
+    if isinstance(node.op, ast.Div) and len(right) == 1 and right[0] != 0:
+        return left / right[0]
+    return None
+
+
+@functools.lru_cache(maxsize=256)
+def _polynomial_coefficients(func_str, variable):
+    try:
+        _, tree = _check(func_str, (variable,))
+    except ValueError:
+        return None
+    coefficients = _polynomial(tree, variable)
+    if coefficients is None:
+        return None
+    coefficients = np.trim_zeros(coefficients, "f")
+    return coefficients if len(coefficients) else np.zeros(1)
+
+
+def polynomial_coefficients(func_str, variable="x"):
+    """
+    Coefficients of an expression that is a polynomial in `variable` (highest degree first,
+    as for np.polyval), or None if it is not one: e.g. "x**4 - 5*x**2 + 4" gives
+    [1, 0, -5, 0, 4], while "np.sin(x)" or "x**0.5" give None. Products and integer powers
+    are expanded; constant subexpressions such as np.pi / 2 are folded first.
+    """
+    coefficients = _polynomial_coefficients(func_str, variable)
+    return None if coefficients is None else coefficients.copy()
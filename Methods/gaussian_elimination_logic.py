@@ -3,7 +3,11 @@ import numpy as np
 import matplotlib.pyplot as plt
 from PyQt6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QLabel, QLineEdit, QPushButton, QMessageBox
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from Methods.instrumentation import instrumented
+from Methods.linear_solvers import gaussian_elimination_with_partial_pivoting
 
+@instrumented(handlers=["solve_system", "plot_final_matrix"],
+              solvers={"gaussian_elimination_with_partial_pivoting": None})
 class GaussianEliminationWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -56,24 +60,7 @@ class GaussianEliminationWindow(QMainWindow):
 
     def gaussian_elimination_with_partial_pivoting(self, A, b):
         """ Performs Gaussian elimination with partial pivoting and returns the final augmented matrix. """
-        n = len(b)
-        augmented_matrix = np.hstack([A, b.reshape(-1, 1)])  # Create augmented matrix
-
-        # Forward elimination with partial pivoting
-        for i in range(n):
-            max_row = np.argmax(abs(augmented_matrix[i:n, i])) + i
-            augmented_matrix[[i, max_row]] = augmented_matrix[[max_row, i]]  # Swap rows
-
-            for j in range(i+1, n):
-                factor = augmented_matrix[j, i] / augmented_matrix[i, i]
-                augmented_matrix[j, i:] -= factor * augmented_matrix[i, i:]
-
-        # Back-substitution
-        x = np.zeros(n)
-        for i in range(n-1, -1, -1):
-            x[i] = (augmented_matrix[i, -1] - np.sum(augmented_matrix[i, i+1:n] * x[i+1:n])) / augmented_matrix[i, i]
-
-        return x, augmented_matrix
+        return gaussian_elimination_with_partial_pivoting(A, b)
 
     def solve_system(self):
         """ Compute solution using Gaussian Elimination and show results. """
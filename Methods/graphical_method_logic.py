@@ -3,9 +3,16 @@ import numpy as np
 import matplotlib.pyplot as plt
 from scipy.optimize import newton
 from PyQt6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QLabel, QLineEdit, QPushButton, QMessageBox
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas, NavigationToolbar2QT as NavigationToolbar
+from Methods.expressions import compile_expression
+from Methods.instrumentation import instrumented
+from Methods.parallel import parallel_function
+from Methods.plotting import PlotLayer
+from Methods.root_finding import find_approximate_root
 
 
+@instrumented(handlers=["plot_graph", "calculate_absolute_error"],
+              solvers={"find_approximate_root": None})
 class GraphicalMethodWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -52,7 +59,9 @@ class GraphicalMethodWindow(QMainWindow):
         # Matplotlib figure and canvas
         self.figure, self.ax = plt.subplots()
         self.canvas = FigureCanvas(self.figure)
+        layout.addWidget(NavigationToolbar(self.canvas, self))
         layout.addWidget(self.canvas)
+        self.plot_layer = PlotLayer(self.ax, self.canvas)
 
         # Store the approximate root from the graph
         self.approx_root = None
@@ -75,10 +84,12 @@ class GraphicalMethodWindow(QMainWindow):
         # Get function string from input
         func_str = self.function_input.text()
 
-        # Define the function
+        # Compile the function (checked against the whitelist of allowed names)
+        g = parallel_function(compile_expression(func_str))
+
         def f(x):
             try:
-                return eval(func_str, {"x": x, "np": np})
+                return g(x)
             except Exception as e:
                 raise ValueError(f"Error evaluating function: {e}")
 
@@ -100,10 +111,7 @@ class GraphicalMethodWindow(QMainWindow):
         Find the approximate root from the graph (where the curve crosses the x-axis).
         Returns the approximate root or None if no root is found.
         """
-        crossings = np.where(np.diff(np.sign(y)))[0]
-        if len(crossings) > 0:
-            return x[crossings[0]]  # Return the first crossing point
-        return None  # No root found
+        return find_approximate_root(x, y)
 
     def plot_graph(self):
         try:
@@ -114,31 +122,23 @@ class GraphicalMethodWindow(QMainWindow):
             x = np.linspace(start, end, 400)
             y = f(x)
 
-            # Clear previous plot
-            self.ax.clear()
+            self.plot_layer.begin()
 
             # Plot the function
-            self.ax.plot(x, y, label=f"f(x) = {self.function_input.text()}")
-            self.ax.axhline(0, color='black', linewidth=0.5)
-            self.ax.axvline(0, color='black', linewidth=0.5)
-            self.ax.set_xlabel("x")
-            self.ax.set_ylabel("f(x)")
-            self.ax.set_title("Graph of f(x)")
-            self.ax.legend()
-            self.ax.grid(True)
+            self.plot_layer.line("function", x, y, label=f"f(x) = {self.function_input.text()}")
+            self.plot_layer.reference_axes()
 
             # Find approximate root from the graph
             self.approx_root = self.find_approximate_root(x, y)
 
             if self.approx_root is not None:
                 # Plot the approximate root on the graph
-                self.ax.plot(self.approx_root, f(self.approx_root), 'ro', label="Approximate Root")
-                self.ax.legend()
+                self.plot_layer.points("root", self.approx_root, f(self.approx_root), color="red", label="Approximate Root")
             else:
                 QMessageBox.warning(self, "Warning", "No root found in the given interval.")
 
             # Redraw the canvas
-            self.canvas.draw()
+            self.plot_layer.finish(title="Graph of f(x)", xlabel="x", ylabel="f(x)")
 
         except Exception as e:
             QMessageBox.critical(self, "Error", f"An error occurred: {str(e)}")
@@ -160,17 +160,10 @@ class GraphicalMethodWindow(QMainWindow):
                 QMessageBox.warning(self, "No Root Found", "No root was found in the given interval.")
                 return
 
-            # Define the derivative of the function (for Newton-Raphson)
+            # Derivative of the function (for Newton-Raphson) by central differences
             def f_prime(x):
-                try:
-                    # Use sympy to compute the derivative dynamically
-                    from sympy import symbols, diff, sympify
-                    x_sym = symbols('x')
-                    expr = sympify(self.function_input.text())
-                    derivative = diff(expr, x_sym)
-                    return derivative.evalf(subs={x_sym: x})
-                except Exception as e:
-                    raise ValueError(f"Error computing derivative: {e}")
+                h = 1e-6 * max(1.0, abs(x))
+                return (f(x + h) - f(x - h)) / (2 * h)
 
             # Ensure approx_root is a valid number
             if not self.is_valid_number(self.approx_root):
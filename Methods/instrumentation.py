@@ -0,0 +1,240 @@
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+PHASES = ("parse", "evaluate", "solve", "render")
+
+
+class Tracer:
+    """
+    Records timed spans for the method windows.
+    Each handler call (a button click) is a run; spans inside it are attributed to a
+    phase using exclusive time, so nested spans (e.g. evaluations inside a solver)
+    are not counted twice. Spans are kept as Chrome trace events for export.
+    """
+
+    def __init__(self, max_events=200000, max_runs=500, max_eval_events=2000):
+        self.enabled = True
+        self.events = deque(maxlen=max_events)
+        self.runs = deque(maxlen=max_runs)
+        # Per-call evaluation spans are only kept for the first calls of a run
+        self.max_eval_events = max_eval_events
+        self.origin = time.perf_counter()
+        self._local = threading.local()
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+            self._local.run = None
+        return self._local.stack
+
+    @property
+    def current_run(self):
+        self._stack()
+        return self._local.run
+
+    def clear(self):
+        self.events.clear()
+        self.runs.clear()
+
+    def begin_run(self, window, handler):
+        run = {
+            "window": window,
+            "handler": handler,
+            "start": time.perf_counter(),
+            "total_ms": 0.0,
+            "phases_ms": dict.fromkeys(PHASES + ("other",), 0.0),
+            "n_calls": 0,
+            "n_points": 0,
+            "iterations": None,
+        }
+        self._stack()
+        self._local.run = run
+        return run
+
+    def end_run(self, run):
+        run["total_ms"] = (time.perf_counter() - run["start"]) * 1000
+        # Whatever was not inside a phase span (widget updates, matplotlib artists, ...)
+        run["phases_ms"]["other"] = max(0.0, run["total_ms"] - sum(run["phases_ms"][p] for p in PHASES))
+        self._local.run = None
+        self.runs.append(run)
+
+    def record_iterations(self, count):
+        run = self.current_run
+        if run is not None and count is not None:
+            run["iterations"] = (run["iterations"] or 0) + int(count)
+
+    def span(self, name, phase, func, *args, **kwargs):
+        """ Call func inside a span of the given phase and return its result. """
+        if not self.enabled:
+            return func(*args, **kwargs)
+
+        stack = self._stack()
+        frame = {"children": 0.0}
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            end = time.perf_counter()
+            stack.pop()
+            duration = end - start
+            if stack:
+                stack[-1]["children"] += duration
+
+            run = self.current_run
+            if run is not None and phase in run["phases_ms"]:
+                run["phases_ms"][phase] += (duration - frame["children"]) * 1000
+
+            if phase != "evaluate" or run is None or run["n_calls"] <= self.max_eval_events:
+                self.events.append({
+                    "name": name,
+                    "cat": phase,
+                    "ph": "X",
+                    "ts": (start - self.origin) * 1e6,
+                    "dur": duration * 1e6,
+                    "pid": os.getpid(),
+                    "tid": threading.get_ident(),
+                })
+
+    def chrome_trace(self):
+        """ The recorded spans and run summaries in Chrome trace-event format. """
+        events = list(self.events)
+        for run in self.runs:
+            events.append({
+                "name": f"{run['window']}.{run['handler']}",
+                "cat": "run",
+                "ph": "i",
+                "s": "p",
+                "ts": (run["start"] - self.origin) * 1e6,
+                "pid": os.getpid(),
+                "tid": 0,
+                "args": {key: value for key, value in run.items() if key != "start"},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path):
+        """ Write the trace to a JSON file that chrome://tracing or Perfetto can open. """
+        with open(path, "w") as file:
+            json.dump(self.chrome_trace(), file)
+
+
+TRACER = Tracer()
+
+
+def counted_function(f, name="f"):
+    """ Wrap a user function so each call is an evaluate span counted in the current run. """
+    if getattr(f, "_instrumented", False):
+        return f
+
+    @functools.wraps(f)
+    def wrapper(*args, **kwargs):
+        run = TRACER.current_run
+        if run is not None:
+            run["n_calls"] += 1
+            run["n_points"] += int(np.size(args[0])) if args else 1
+        return TRACER.span(name, "evaluate", f, *args, **kwargs)
+
+    wrapper._instrumented = True
+    return wrapper
+
+
+def _wrap_callables(result):
+    """ Instrument user functions returned by a parse method (alone or inside a tuple). """
+    if callable(result):
+        return counted_function(result)
+    if isinstance(result, tuple):
+        return tuple(counted_function(item) if callable(item) else item for item in result)
+    return result
+
+
+def _positional_count(method):
+    """ Number of positional parameters of an unbound method, excluding self. """
+    parameters = list(inspect.signature(method).parameters.values())[1:]
+    if any(p.kind == p.VAR_POSITIONAL for p in parameters):
+        return None
+    return sum(p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD) for p in parameters)
+
+
+def instrumented(handlers, solvers=None, parsers=None, functions=()):
+    """
+    Class decorator that instruments a method window.
+    handlers:  button handlers; each call becomes one run
+    solvers:   {method name: function(result) -> iteration count, or None}
+    parsers:   input parsing methods; user functions they return are counted as evaluations
+               (defaults to every method whose name starts with "parse")
+    functions: methods that evaluate the user function directly
+    The canvas draw of every instance is recorded as the render phase.
+    """
+    solvers = solvers or {}
+
+    def decorate(cls):
+        window = cls.__name__
+        parser_names = parsers if parsers is not None else [name for name in dir(cls) if name.startswith("parse")]
+
+        def wrap(name, make_wrapper):
+            setattr(cls, name, functools.wraps(getattr(cls, name))(make_wrapper(getattr(cls, name))))
+
+        for name in parser_names:
+            def make_parser(method, name=name):
+                def wrapper(self, *args, **kwargs):
+                    return _wrap_callables(TRACER.span(f"{window}.{name}", "parse", method, self, *args, **kwargs))
+                return wrapper
+            wrap(name, make_parser)
+
+        for name, iterations in solvers.items():
+            def make_solver(method, name=name, iterations=iterations):
+                def wrapper(self, *args, **kwargs):
+                    result = TRACER.span(f"{window}.{name}", "solve", method, self, *args, **kwargs)
+                    if iterations is not None and result is not None:
+                        TRACER.record_iterations(iterations(result))
+                    return result
+                return wrapper
+            wrap(name, make_solver)
+
+        for name in functions:
+            def make_function(method, name=name):
+                def wrapper(self, *args, **kwargs):
+                    run = TRACER.current_run
+                    if run is not None:
+                        run["n_calls"] += 1
+                        run["n_points"] += int(np.size(args[0])) if args else 1
+                    return TRACER.span(f"{window}.{name}", "evaluate", method, self, *args, **kwargs)
+                return wrapper
+            wrap(name, make_function)
+
+        for name in handlers:
+            def make_handler(method, name=name):
+                # Qt passes signal arguments (e.g. `checked`) the handler does not accept
+                n_positional = _positional_count(method)
+
+                def wrapper(self, *args):
+                    args = args if n_positional is None else args[:n_positional]
+                    if not TRACER.enabled or TRACER.current_run is not None:
+                        return TRACER.span(f"{window}.{name}", "handler", method, self, *args)
+                    run = TRACER.begin_run(window, name)
+                    try:
+                        return TRACER.span(f"{window}.{name}", "handler", method, self, *args)
+                    finally:
+                        TRACER.end_run(run)
+                return wrapper
+            wrap(name, make_handler)
+
+        original_init = cls.__init__
+
+        @functools.wraps(original_init)
+        def __init__(self, *args, **kwargs):
+            original_init(self, *args, **kwargs)
+            draw = self.canvas.draw
+            self.canvas.draw = lambda *a, **k: TRACER.span(f"{window}.canvas.draw", "render", draw, *a, **k)
+
+        cls.__init__ = __init__
+        return cls
+
+    return decorate
@@ -0,0 +1,32 @@
+import numpy as np
+from Methods.jit import run_kernel
+from Methods.result_cache import cached_result
+
+
+def _lagrange_numpy(x, y, points, max_elements=2**20):
+    """ Lagrange interpolation at an array of points, vectorized over chunks of points. """
+    n = len(x)
+    denominators = x[:, None] - x[None, :]
+    np.fill_diagonal(denominators, 1.0)
+    diagonal = np.arange(n)
+    result = np.empty(len(points))
+    chunk = max(1, max_elements // max(n * n, 1))
+    for start in range(0, len(points), chunk):
+        # ratios[k, i, j] = (points[k] - x[j]) / (x[i] - x[j]), with the factor j == i left out
+        ratios = (points[start:start + chunk, None, None] - x[None, None, :]) / denominators
+        ratios[:, diagonal, diagonal] = 1.0
+        result[start:start + chunk] = np.prod(ratios, axis=2) @ y
+    return result
+
+
+@cached_result
+def lagrange_interpolation(x, y, x_interp):
+    """ Compute Lagrange interpolation at x_interp (a number or an array of points). """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    points = np.asarray(x_interp, dtype=float)
+
+    result = run_kernel("lagrange", None, x, y, points.ravel())
+    if result is None:
+        result = _lagrange_numpy(x, y, points.ravel())
+    return result.reshape(points.shape)[()]
@@ -3,7 +3,11 @@ import numpy as np
 import matplotlib.pyplot as plt
 from PyQt6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QLabel, QLineEdit, QPushButton, QMessageBox
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from Methods.instrumentation import instrumented
+from Methods.linear_solvers import iterative_matrix_inversion
 
+@instrumented(handlers=["compute_inverse", "plot_inverse_matrix"],
+              solvers={"iterative_matrix_inversion": None})
 class IterativeMatrixInversionWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -49,33 +53,12 @@ class IterativeMatrixInversionWindow(QMainWindow):
 
     def iterative_matrix_inversion(self, A, tol=1e-6, max_iter=50):
         """ Compute the inverse of A using a stabilized iterative method. """
-        n = A.shape[0]
-        I = np.eye(n)
-
-        # Check if matrix is invertible
-        det_A = np.linalg.det(A)
-        if abs(det_A) < 1e-10:
-            QMessageBox.critical(self, "Error", "Matrix is singular or nearly singular. Cannot compute inverse.")
+        try:
+            return iterative_matrix_inversion(A, tol, max_iter)
+        except ValueError as e:
+            QMessageBox.critical(self, "Error", str(e))
             return None
 
-        # Use a more stable initial guess: (A^T A)^{-1} A^T
-        X_k = np.linalg.pinv(A)  # Pseudo-inverse for better stability
-
-        for _ in range(max_iter):
-            X_k_next = X_k @ (2 * I - A @ X_k)
-
-            # Check for divergence (values growing too large)
-            if np.isnan(X_k_next).any() or np.isinf(X_k_next).any():
-                QMessageBox.critical(self, "Error", "Iteration diverged. Try a better-conditioned matrix.")
-                return None
-
-            # Convergence check
-            if np.linalg.norm(X_k_next - X_k) < tol:
-                return X_k_next
-            X_k = X_k_next
-
-        return X_k  # Return the last approximation
-
     def compute_inverse(self):
         """ Compute and display the inverse matrix. """
         A = self.parse_input_matrix()
@@ -0,0 +1,177 @@
+"""
+Optional JIT compilation of the scalar-loop solvers with Numba.
+
+The inner loops of bisection, false position, Lagrange interpolation and the Runge-Kutta
+2nd order method are written once here as kernels. With Numba installed, the user's
+expression is compiled to a nopython function and passed to the compiled kernel, so the
+kernel is specialized for that expression and the whole loop runs without returning to
+the interpreter.
+
+Only functions from compile_expression or compile_system are compiled; wrappers around
+them (parallel evaluation, evaluation counters) are unwrapped first, so their calls inside
+a kernel are not counted. Other functions and expressions Numba cannot type keep the NumPy
+implementations, as does everything when Numba is absent (pip install numba) or
+COMPMATH_JIT=0 is set.
+"""
+import functools
+import inspect
+import os
+
+import numpy as np
+
+from Methods.expressions import compile_expression, power
+
+try:
+    import numba
+    import numba.extending
+except ImportError:
+    numba = None
+
+JIT_AVAILABLE = numba is not None
+JIT_ENABLED = JIT_AVAILABLE and os.environ.get("COMPMATH_JIT", "1").lower() not in ("0", "false", "no", "off")
+
+if JIT_AVAILABLE:
+    @numba.extending.overload(power)
+    def _power(base, exponent):
+        # Compiled integers have a fixed width, so the plain power cannot grow without bound
+        return lambda base, exponent: base ** exponent
+
+
+def _bisection(f, a, b, tol, max_iter):
+    """ Bisection loop; returns (root, iterations), with iterations -1 if f(a) and f(b) have the same sign. """
+    fa = f(a)
+    if fa * f(b) > 0:
+        return np.nan, -1
+
+    iter_count = 0
+    while (b - a) / 2 > tol and iter_count < max_iter:
+        c = (a + b) / 2
+        fc = f(c)
+        if fc == 0:
+            return c, iter_count
+        elif fa * fc < 0:
+            b = c
+        else:
+            a = c
+            fa = fc
+        iter_count += 1
+    return (a + b) / 2, iter_count
+
+
+def _false_position(f, a, b, tol, max_iter):
+    """ False position loop; returns (root, iterations) like _bisection. """
+    fa = f(a)
+    fb = f(b)
+    if fa * fb > 0:
+        return np.nan, -1
+
+    iter_count = 0
+    c = a
+    c_old = a
+    while iter_count < max_iter:
+        c = (a * fb - b * fa) / (fb - fa)
+        if abs(c - c_old) < tol:
+            return c, iter_count
+        c_old = c
+        fc = f(c)
+        if fc == 0:
+            return c, iter_count
+        elif fa * fc < 0:
+            b = c
+            fb = fc
+        else:
+            a = c
+            fa = fc
+        iter_count += 1
+    return c, iter_count
+
+
+def _lagrange(x, y, points):
+    """ Lagrange interpolation polynomial through (x, y) at every one of the points. """
+    n = len(x)
+    result = np.zeros(len(points))
+    for k in range(len(points)):
+        total = 0.0
+        for i in range(n):
+            L_i = 1.0
+            for j in range(n):
+                if i != j:
+                    L_i *= (points[k] - x[j]) / (x[i] - x[j])
+            total += y[i] * L_i
+        result[k] = total
+    return result
+
+
+def _runge_kutta_2nd_order(f, x0, y0, h, x_target):
+    """ Heun steps from (x0, y0) to x_target for a float or 1-D array state. """
+    x = x0
+    y = y0
+    while x_target - x > 1e-12 * max(1.0, abs(x_target)):
+        step = min(h, x_target - x)
+        k1 = f(x, y)
+        k2 = f(x + step, y + step * k1)
+        y = y + step * (k1 + k2) / 2
+        x += step
+    return y
+
+
+KERNELS = {
+    "bisection": _bisection,
+    "false_position": _false_position,
+    "lagrange": _lagrange,
+    "runge_kutta_2nd_order": _runge_kutta_2nd_order,
+}
+
+# Compiled user functions by cache key, and the (kernel, key) pairs Numba failed to compile
+_FUNCTIONS = {}
+_FAILED = set()
+
+
+@functools.lru_cache(maxsize=None)
+def _kernel(name):
+    # Division by zero gives inf/nan as in NumPy instead of raising
+    return numba.njit(error_model="numpy")(KERNELS[name])
+
+
+def _jit_function(f):
+    """ Nopython version of a compiled expression or system (or of a wrapper around one), or None for any other callable. """
+    key = getattr(f, "cache_key", None)
+    if not isinstance(key, tuple) or not key or key[0] not in ("expression", "system"):
+        return None
+    # Wrappers (parallel evaluation, evaluation counters) carry the cache key of the function
+    # they wrap, and the result cache already treats them as that function: compile it instead
+    f = inspect.unwrap(f)
+    if getattr(f, "cache_key", None) != key:
+        return None
+    if key not in _FUNCTIONS:
+        if key[0] == "system":
+            # The components of a system are stacked into an array instead of a list
+            parts = [part.strip() for part in key[1].split(";") if part.strip()]
+            expression = parts[0] if len(parts) == 1 else "np.array([" + ", ".join(parts) + "])"
+            f = compile_expression(expression, ("x", "y"))
+        _FUNCTIONS[key] = numba.njit(error_model="numpy")(f)
+    return _FUNCTIONS[key]
+
+
+def run_kernel(name, f, *args):
+    """
+    Run the named kernel compiled with the nopython version of f as its first argument
+    (f=None for kernels without a function). Returns None when the kernel cannot be used,
+    and the caller runs its NumPy implementation instead.
+    """
+    if not JIT_ENABLED:
+        return None
+    key = getattr(f, "cache_key", None)
+    if (name, key) in _FAILED:
+        return None
+    if f is not None:
+        g = _jit_function(f)
+        if g is None:
+            return None
+        args = (g,) + args
+    try:
+        return _kernel(name)(*args)
+    except numba.core.errors.NumbaError:
+        # Not compilable in nopython mode (e.g. an unsupported NumPy function): remember and fall back
+        _FAILED.add((name, key))
+        return None
@@ -2,8 +2,13 @@ import sys
 import numpy as np
 import matplotlib.pyplot as plt
 from PyQt6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QLabel, QLineEdit, QPushButton, QMessageBox
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas, NavigationToolbar2QT as NavigationToolbar
+from Methods.instrumentation import instrumented
+from Methods.plotting import PlotLayer
+from Methods.interpolation import lagrange_interpolation
 
+@instrumented(handlers=["compute_interpolation", "plot_interpolation"],
+              solvers={"lagrange_interpolation": None})
 class LagrangeInterpolationWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -45,7 +50,9 @@ class LagrangeInterpolationWindow(QMainWindow):
         # Matplotlib figure and canvas
         self.figure, self.ax = plt.subplots()
         self.canvas = FigureCanvas(self.figure)
+        layout.addWidget(NavigationToolbar(self.canvas, self))
         layout.addWidget(self.canvas)
+        self.plot_layer = PlotLayer(self.ax, self.canvas)
 
     def parse_inputs(self):
         """ Parse user input and return x, y data arrays and interpolation point. """
@@ -64,17 +71,7 @@ class LagrangeInterpolationWindow(QMainWindow):
 
     def lagrange_interpolation(self, x, y, x_interp):
         """ Compute Lagrange interpolation at x_interp """
-        n = len(x)
-        result = 0.0
-
-        for i in range(n):
-            L_i = 1.0
-            for j in range(n):
-                if i != j:
-                    L_i *= (x_interp - x[j]) / (x[i] - x[j])
-            result += y[i] * L_i  # Correctly summing weighted basis polynomials
-
-        return result
+        return lagrange_interpolation(x, y, x_interp)
 
     def compute_interpolation(self):
         """ Compute and display interpolated value. """
@@ -93,29 +90,22 @@ class LagrangeInterpolationWindow(QMainWindow):
 
         # Generate smooth curve for visualization
         x_plot = np.linspace(min(x) - 1, max(x) + 1, 100)
-        y_plot = [self.lagrange_interpolation(x, y, xi) for xi in x_plot]
+        y_plot = self.lagrange_interpolation(x, y, x_plot)
 
-        # Clear previous plot
-        self.ax.clear()
+        self.plot_layer.begin()
 
         # Plot data points
-        self.ax.scatter(x, y, color="red", label="Data Points")
+        self.plot_layer.points("data", x, y, color="red", label="Data Points")
 
         # Plot interpolation polynomial
-        self.ax.plot(x_plot, y_plot, color="blue", label="Lagrange Polynomial")
+        self.plot_layer.line("polynomial", x_plot, y_plot, color="blue", label="Lagrange Polynomial")
 
         # Mark interpolated point
         interp_value = self.lagrange_interpolation(x, y, x_interp)
-        self.ax.scatter([x_interp], [interp_value], color="green", marker="o", label=f"f({x_interp}) = {interp_value:.2f}")
-
-        self.ax.set_xlabel("x")
-        self.ax.set_ylabel("f(x)")
-        self.ax.set_title("Lagrange Interpolation")
-        self.ax.legend()
-        self.ax.grid()
+        self.plot_layer.points("interpolated", x_interp, interp_value, color="green", label=f"f({x_interp}) = {interp_value:.2f}")
 
         # Redraw the canvas
-        self.canvas.draw()
+        self.plot_layer.finish(title="Lagrange Interpolation", xlabel="x", ylabel="f(x)")
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -0,0 +1,241 @@
+import numpy as np
+from scipy.linalg import solve_triangular
+from Methods.result_cache import cached_result
+
+
+@cached_result
+def gaussian_elimination_with_partial_pivoting(A, b):
+    """ Performs Gaussian elimination with partial pivoting and returns the solution and final augmented matrix. """
+    n = len(b)
+    augmented_matrix = np.hstack([A, b.reshape(-1, 1)])  # Create augmented matrix
+
+    # Forward elimination with partial pivoting
+    for i in range(n):
+        max_row = np.argmax(abs(augmented_matrix[i:n, i])) + i
+        augmented_matrix[[i, max_row]] = augmented_matrix[[max_row, i]]  # Swap rows
+
+        for j in range(i+1, n):
+            factor = augmented_matrix[j, i] / augmented_matrix[i, i]
+            augmented_matrix[j, i:] -= factor * augmented_matrix[i, i:]
+
+    # Back-substitution
+    x = np.zeros(n)
+    for i in range(n-1, -1, -1):
+        x[i] = (augmented_matrix[i, -1] - np.sum(augmented_matrix[i, i+1:n] * x[i+1:n])) / augmented_matrix[i, i]
+
+    return x, augmented_matrix
+
+
+def lu_factorization(A, dtype=float, overwrite_a=False, block_size=64):
+    """
+    Gaussian elimination with partial pivoting on A alone, keeping the multipliers so
+    the work can be reused for any number of right-hand sides.
+    Returns (LU, perm): U on and above the diagonal, the multipliers of L below it,
+    and the row order produced by the pivoting.
+
+    The factorization is computed in `dtype` and in place: A itself is overwritten when
+    overwrite_a is set and A already has that dtype, otherwise one copy is made.
+    Columns are eliminated in panels of `block_size`, so most of the work is done by
+    matrix products on bounded row chunks instead of full-size rank-1 updates.
+    """
+    LU = np.asarray(A, dtype=dtype) if overwrite_a else np.array(A, dtype=dtype)
+    n = len(LU)
+    perm = np.arange(n)
+
+    for k in range(0, n, block_size):
+        end = min(k + block_size, n)
+
+        # Eliminate within the panel of columns k:end, swapping whole rows
+        for i in range(k, end):
+            max_row = np.argmax(abs(LU[i:, i])) + i
+            if max_row != i:
+                LU[[i, max_row]] = LU[[max_row, i]]  # Swap rows
+                perm[[i, max_row]] = perm[[max_row, i]]
+            LU[i+1:, i] /= LU[i, i]
+            LU[i+1:, i+1:end] -= np.outer(LU[i+1:, i], LU[i, i+1:end])
+
+        if end < n:
+            # Rows of U to the right of the panel, then the update of the trailing matrix
+            LU[k:end, end:] = solve_triangular(LU[k:end, k:end], LU[k:end, end:], lower=True,
+                                               unit_diagonal=True, check_finite=False)
+            # Row chunks keep the temporary product small however large A is
+            chunk = max(1, 2 ** 18 // (n - end))
+            for row in range(end, n, chunk):
+                LU[row:row+chunk, end:] -= LU[row:row+chunk, k:end] @ LU[k:end, end:]
+
+    return LU, perm
+
+
+def _substitute(factorization, b):
+    """ Forward and back substitution with lu_factorization(A); returns (x, c) with Ux = c. """
+    LU, perm = factorization
+    # LU.T is Fortran-ordered, so LAPACK can use it without copying the matrix
+    c = solve_triangular(LU.T, b[perm], trans="T", lower=False, unit_diagonal=True, check_finite=False)
+    x = solve_triangular(LU.T, c, trans="T", lower=True, check_finite=False)
+    return x, c
+
+
+def solve_with_factorization(factorization, b):
+    """
+    Solve Ax = b from lu_factorization(A).
+    Returns the solution and the final augmented matrix [U | c], the same as
+    gaussian_elimination_with_partial_pivoting.
+    """
+    LU, _ = factorization
+    x, c = _substitute(factorization, np.asarray(b, dtype=LU.dtype))
+    return x, np.hstack([np.triu(LU), c.reshape(-1, 1)])
+
+
+@cached_result
+def mixed_precision_solve(A, b, max_iter=30):
+    """
+    Solve Ax = b to double precision with a single precision factorization.
+    A is factored once in float32 (half the memory of a float64 copy and faster),
+    then the solution is corrected with float64 residuals r = b - Ax until
+    ||r|| <= sqrt(n) * eps * ||A|| * ||x|| (the LAPACK dsgesv criterion).
+    When the refinement stalls or does not converge, e.g. for matrices too
+    ill-conditioned for single precision, A is factored again in float64.
+    Returns (x, refinement steps, precision of the factorization used).
+    """
+    A = np.asarray(A, dtype=float)
+    b = np.asarray(b, dtype=float)
+    n = len(b)
+    # Infinity norm of A by row chunks, to avoid a full-size temporary of |A|
+    chunk = max(1, 2 ** 18 // max(n, 1))
+    a_norm = max((np.abs(A[row:row+chunk]).sum(axis=1).max() for row in range(0, n, chunk)), default=0.0)
+    tol = np.sqrt(n) * np.finfo(float).eps * a_norm
+
+    iterations = 0
+    try:
+        with np.errstate(all="ignore"):
+            factorization = lu_factorization(A, dtype=np.float32, overwrite_a=True)
+            x = _substitute(factorization, b.astype(np.float32))[0].astype(float)
+            previous = np.inf
+            for iterations in range(max_iter + 1):
+                r = b - A @ x
+                r_norm = np.linalg.norm(r, np.inf)
+                if not np.isfinite(r_norm) or r_norm > 0.5 * previous:
+                    # Diverging or stalled: single precision is not enough for this matrix
+                    break
+                if r_norm <= tol * np.linalg.norm(x, np.inf):
+                    return x, iterations, "float32"
+                previous = r_norm
+                # The residual is scaled before rounding so small residuals do not underflow in float32
+                d = _substitute(factorization, (r / r_norm).astype(np.float32))[0]
+                x += r_norm * d.astype(float)
+    except np.linalg.LinAlgError:
+        # A zero pivot in single precision; the matrix may still be regular in double
+        pass
+
+    try:
+        with np.errstate(all="ignore"):
+            x, _ = _substitute(lu_factorization(A), b)
+    except np.linalg.LinAlgError:
+        x = None
+    if x is None or not np.all(np.isfinite(x)):
+        raise ValueError("Matrix is singular. Cannot solve the system.")
+    return x, iterations, "float64"
+
+
+@cached_result
+def iterative_matrix_inversion(A, tol=1e-6, max_iter=50):
+    """
+    Compute the inverse of A using a stabilized iterative method.
+    Raises ValueError for singular matrices and diverging iterations.
+    """
+    n = A.shape[0]
+    I = np.eye(n)
+
+    # Check if matrix is invertible
+    det_A = np.linalg.det(A)
+    if abs(det_A) < 1e-10:
+        raise ValueError("Matrix is singular or nearly singular. Cannot compute inverse.")
+
+    # Use a more stable initial guess: (A^T A)^{-1} A^T
+    X_k = np.linalg.pinv(A)  # Pseudo-inverse for better stability
+
+    for _ in range(max_iter):
+        X_k_next = X_k @ (2 * I - A @ X_k)
+
+        # Check for divergence (values growing too large)
+        if np.isnan(X_k_next).any() or np.isinf(X_k_next).any():
+            raise ValueError("Iteration diverged. Try a better-conditioned matrix.")
+
+        # Convergence check
+        if np.linalg.norm(X_k_next - X_k) < tol:
+            return X_k_next
+        X_k = X_k_next
+
+    return X_k  # Return the last approximation
+
+
+@cached_result
+def batch_matrix_inversion(A, tol=1e-8, max_iter=100, order=2):
+    """
+    Invert a stack of matrices A of shape (k, n, n) (or a single (n, n) matrix) with the
+    hyperpower iteration X <- X (I + R + ... + R^(order-1)), R = I - AX, run on the whole
+    stack at once; order 2 is the Newton-Schulz iteration.
+    Starting from X = A^T / (||A||_1 ||A||_inf), which converges for every regular A, each
+    matrix is iterated until its residual ||I - AX||_F is below tol. Finished matrices are
+    dropped from the working stack, so they cost no further work. A matrix fails when its
+    iteration diverges, stalls (singular or too ill-conditioned) or reaches max_iter.
+    Returns (X, residuals, failed, iterations), with one residual, failure flag and
+    iteration count per matrix; X of failed matrices is the last iterate.
+    """
+    A = np.asarray(A, dtype=float)
+    single = A.ndim == 2
+    if single:
+        A = A[np.newaxis]
+    if A.ndim != 3 or A.shape[1] != A.shape[2]:
+        raise ValueError("A must be a square matrix or a stack of square matrices of shape (k, n, n).")
+    if order < 2:
+        raise ValueError("The order of the hyperpower iteration must be at least 2.")
+
+    k, n, _ = A.shape
+    I = np.eye(n)
+    X = np.empty_like(A)
+    residuals = np.full(k, np.inf)
+    failed = np.zeros(k, dtype=bool)
+    iterations = np.zeros(k, dtype=int)
+
+    # Working stack of the matrices still iterating, and their positions in the result
+    active = np.arange(k)
+    A_active = A
+    with np.errstate(all="ignore"):
+        scale = np.abs(A).sum(axis=1).max(axis=1) * np.abs(A).sum(axis=2).max(axis=1)
+        X_active = np.swapaxes(A, 1, 2) / scale[:, np.newaxis, np.newaxis]
+        previous = np.full(k, np.inf)
+
+        for iteration in range(max_iter + 1):
+            R = I - A_active @ X_active
+            residual = np.sqrt(np.einsum("kij,kij->k", R, R))
+            converged = residual <= tol
+            # Once the residual is below 1 the iteration converges quadratically, so a residual
+            # that stops decreasing has reached the accuracy limit of the matrix
+            stalled = ~np.isfinite(residual) | ((previous < 1) & (residual >= previous))
+            done = converged | stalled if iteration < max_iter else np.ones(len(active), dtype=bool)
+
+            if done.any():
+                finished = active[done]
+                X[finished] = X_active[done]
+                residuals[finished] = residual[done]
+                failed[finished] = ~converged[done]
+                iterations[finished] = iteration
+                keep = ~done
+                active, A_active, X_active, R = active[keep], A_active[keep], X_active[keep], R[keep]
+                residual = residual[keep]
+                if not len(active):
+                    break
+
+            # X (I + R + ... + R^(order-1)), accumulated as X + XR + XR^2 + ...
+            term = X_active
+            X_next = X_active.copy()
+            for _ in range(order - 1):
+                term = term @ R
+                X_next += term
+            X_active = X_next
+            previous = residual
+
+    if single:
+        return X[0], residuals[0], bool(failed[0]), int(iterations[0])
+    return X, residuals, failed, iterations
@@ -0,0 +1,329 @@
+import numpy as np
+from Methods.expressions import compile_expression
+from Methods.jit import run_kernel
+from Methods.result_cache import cached_result, register_result_type
+
+
+def as_derivative(value, y):
+    """
+    Convert the value of a right-hand side into an array with the shape of the state y.
+    A list of component expressions is stacked along the first axis, with scalar
+    components broadcast against array components.
+    """
+    if isinstance(value, (list, tuple)):
+        value = np.stack(np.broadcast_arrays(*[np.asarray(v, dtype=float) for v in value]))
+    value = np.asarray(value, dtype=float)
+    # Components that did not depend on y still need a trailing axis to broadcast
+    y_shape = np.shape(y)
+    if 0 < value.ndim < len(y_shape) and value.shape == y_shape[:value.ndim]:
+        value = value.reshape(value.shape + (1,) * (len(y_shape) - value.ndim))
+    return np.broadcast_to(value, y_shape)
+
+
+def compile_system(func_str):
+    """
+    Compile dy/dx = f(x, y) from user input.
+    Either a single expression (scalar y, or an expression returning an array such as
+    "np.array([y[1], -y[0]])") or several expressions separated by ';', one per component
+    of y. The components are compiled into one expression so a whole system costs a
+    single call per Runge-Kutta stage.
+    """
+    parts = [part.strip() for part in func_str.split(';') if part.strip()]
+    if not parts:
+        raise ValueError("Function input cannot be empty.")
+    expression = parts[0] if len(parts) == 1 else "[" + ", ".join(parts) + "]"
+    g = compile_expression(expression, ("x", "y"))
+
+    def f(x, y):
+        return as_derivative(g(x, y), y)
+
+    f.cache_key = ("system", func_str)
+    return f
+
+
+# Explicit Runge-Kutta methods for fixed steps, as tableaus in the format of EMBEDDED_PAIRS
+FIXED_STEP_METHODS = {
+    "Runge-Kutta 2nd Order": {
+        "order": 2,
+        "c": [0.0, 1.0],
+        "A": [[], [1.0]],
+        "b": [1/2, 1/2],
+    },
+}
+
+
+# Embedded Runge-Kutta pairs: nodes c, coefficients A, the weights b of the propagated
+# solution and the weights b_low of the embedded lower order solution used for error control
+EMBEDDED_PAIRS = {
+    "Heun-Euler 2(1)": {
+        "order": 2,
+        "c": [0.0, 1.0],
+        "A": [[], [1.0]],
+        "b": [1/2, 1/2],
+        "b_low": [1.0, 0.0],
+    },
+    "Bogacki-Shampine 3(2)": {
+        "order": 3,
+        "c": [0.0, 1/2, 3/4, 1.0],
+        "A": [[], [1/2], [0.0, 3/4], [2/9, 1/3, 4/9]],
+        "b": [2/9, 1/3, 4/9, 0.0],
+        "b_low": [7/24, 1/4, 1/3, 1/8],
+    },
+    "Dormand-Prince 5(4)": {
+        "order": 5,
+        "c": [0.0, 1/5, 3/10, 4/5, 8/9, 1.0, 1.0],
+        "A": [
+            [],
+            [1/5],
+            [3/40, 9/40],
+            [44/45, -56/15, 32/9],
+            [19372/6561, -25360/2187, 64448/6561, -212/729],
+            [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656],
+            [35/384, 0.0, 500/1113, 125/192, -2187/6784, 11/84],
+        ],
+        "b": [35/384, 0.0, 500/1113, 125/192, -2187/6784, 11/84, 0.0],
+        "b_low": [5179/57600, 0.0, 7571/16695, 393/640, -92097/339200, 187/2100, 1/40],
+    },
+}
+
+
+def _weighted_sum(weights, k):
+    """ Sum of w * k_j over the nonzero weights, without multiplying by unit weights. """
+    total = None
+    for w, k_j in zip(weights, k):
+        if w != 0.0:
+            term = k_j if w == 1.0 else w * k_j
+            total = term if total is None else total + term
+    return total
+
+
+def explicit_step(f, tableau, x, y, h, k_first=None):
+    """
+    One step of an explicit Runge-Kutta method given by its tableau (c, A, b).
+    Returns the new state and the stage derivatives.
+    `k_first` reuses f(x, y) when it is already known (first-same-as-last pairs).
+    """
+    k = [f(x, y) if k_first is None else k_first]
+    for c_i, a_i in zip(tableau["c"][1:], tableau["A"][1:]):
+        k.append(f(x + c_i * h, y + h * _weighted_sum(a_i, k)))
+    return y + h * _weighted_sum(tableau["b"], k), k
+
+
+def embedded_step(f, pair, x, y, h, k_first=None):
+    """
+    One step of an embedded Runge-Kutta pair.
+    Returns the new state, the local error estimate and the stage derivatives.
+    """
+    y_new, k = explicit_step(f, pair, x, y, h, k_first)
+    error = h * _weighted_sum([b_i - b_low_i for b_i, b_low_i in zip(pair["b"], pair["b_low"])], k)
+    return y_new, error, k
+
+
+def error_norm(error, y, y_new, rtol, atol):
+    """ Root-mean-square of the local error scaled by the mixed tolerance. """
+    scale = atol + rtol * np.maximum(np.abs(y), np.abs(y_new))
+    return np.sqrt(np.mean(np.square(error / scale)))
+
+
+def initial_step(x0, y0, dydx0, x_target, rtol, atol):
+    """ Estimate a starting step from the size of y0 and of its derivative. """
+    scale = atol + rtol * np.abs(y0)
+    d0 = np.sqrt(np.mean(np.square(y0 / scale)))
+    d1 = np.sqrt(np.mean(np.square(dydx0 / scale)))
+    h0 = 1e-6 if d0 < 1e-5 or d1 < 1e-5 else 0.01 * d0 / d1
+    return min(h0, abs(x_target - x0))
+
+
+@register_result_type
+class Trajectory:
+    """
+    Solution of an initial value problem at the solver's steps, with dense output.
+    y(x) between steps is the cubic Hermite interpolant built from the values and
+    derivatives at the neighbouring steps, so it can be evaluated anywhere in
+    [x0, x_target] without integrating again.
+    """
+
+    def __init__(self, x, y, dydx, stats, method=None):
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.dydx = np.asarray(dydx, dtype=float)
+        self.stats = stats
+        self.method = method
+
+    def __len__(self):
+        return len(self.x)
+
+    @property
+    def y_final(self):
+        return self.y[-1]
+
+    def __call__(self, x):
+        """ Interpolated y at a point or an array of points. """
+        x = np.asarray(x, dtype=float)
+        if np.any(x < self.x[0]) or np.any(x > self.x[-1]):
+            raise ValueError(f"x must lie in [{self.x[0]}, {self.x[-1]}].")
+
+        i = np.clip(np.searchsorted(self.x, x, side="right") - 1, 0, len(self.x) - 2)
+        h = self.x[i + 1] - self.x[i]
+        t = (x - self.x[i]) / h
+        # Trailing axes so the weights broadcast over the components of a system
+        extra = (1,) * (self.y.ndim - 1)
+        t = t.reshape(t.shape + extra)
+        h = h.reshape(h.shape + extra)
+
+        t2, t3 = t * t, t * t * t
+        return ((2 * t3 - 3 * t2 + 1) * self.y[i] + (t3 - 2 * t2 + t) * h * self.dydx[i]
+                + (-2 * t3 + 3 * t2) * self.y[i + 1] + (t3 - t2) * h * self.dydx[i + 1])
+
+
+@cached_result
+def solve_fixed_step(f, x0, y0, h, x_target, method="Runge-Kutta 2nd Order"):
+    """
+    Solution from x0 to x_target with fixed steps of an explicit method of
+    FIXED_STEP_METHODS, as a Trajectory. The last step is shortened to land exactly
+    on x_target.
+    """
+    tableau = FIXED_STEP_METHODS[method]
+    x = x0
+    y = np.array(y0, dtype=float)
+    x_values, y_values, slopes = [x], [y], []
+
+    # Stop within rounding of the target instead of taking an extra step past it
+    while x_target - x > 1e-12 * max(1.0, abs(x_target)):
+        step = min(h, x_target - x)
+        y, k = explicit_step(f, tableau, x, y, step)
+        slopes.append(k[0])
+        x = x_target if step < h else x + step
+        x_values.append(x)
+        y_values.append(y)
+
+    # Derivative at the final point completes the dense output
+    slopes.append(f(x, y))
+    n_steps = len(x_values) - 1
+    stats = {"accepted": n_steps, "rejected": 0, "n_evals": len(tableau["b"]) * n_steps + 1}
+    return Trajectory(x_values, y_values, slopes, stats, method)
+
+
+@cached_result
+def runge_kutta_2nd_order(f, x0, y0, h, x_target):
+    """ Apply the Runge-Kutta 2nd Order method to solve dy/dx = f(x,y) for scalar or vector y. """
+    y = np.array(y0, dtype=float)
+    if y.ndim <= 1:
+        compiled = run_kernel("runge_kutta_2nd_order", f, float(x0), y if y.ndim else float(y), float(h), float(x_target))
+        if compiled is not None:
+            return compiled if y.ndim else np.float64(compiled)
+    # The same cached trajectory the window plots
+    return solve_fixed_step(f, x0, y0, h, x_target).y_final
+
+
+@cached_result
+def solve_adaptive(f, x0, y0, x_target, method="Dormand-Prince 5(4)", rtol=1e-6, atol=1e-9,
+                   h0=None, max_steps=100000):
+    """
+    Solve dy/dx = f(x,y) from x0 to x_target with an embedded Runge-Kutta pair and
+    error-controlled step sizes. The final step is shortened to land exactly on x_target.
+    Returns a Trajectory whose stats count accepted and rejected steps and function evaluations.
+    """
+    pair = EMBEDDED_PAIRS[method]
+    # The error estimate is O(h**order), since it comes from the lower order solution
+    exponent = 1 / pair["order"]
+    safety, min_factor, max_factor = 0.9, 0.2, 5.0
+    # First-same-as-last: the last stage is f at the new point when it reuses the weights b
+    fsal = pair["A"][-1] == pair["b"][:len(pair["A"][-1])] and pair["c"][-1] == 1.0
+
+    x = x0
+    y = np.array(y0, dtype=float)
+    k_first = f(x, y)
+    h = h0 if h0 is not None else initial_step(x0, y, k_first, x_target, rtol, atol)
+    stats = {"accepted": 0, "rejected": 0, "n_evals": 1}
+
+    x_values, y_values, slopes = [x], [y], [k_first]
+    while x < x_target:
+        if stats["accepted"] + stats["rejected"] >= max_steps:
+            raise RuntimeError(f"Maximum number of steps ({max_steps}) reached at x = {x}.")
+
+        last_step = x + h >= x_target
+        if last_step:
+            h = x_target - x
+
+        # f(x, y) is always known here, either from the start, a rejection or FSAL
+        y_new, error, k = embedded_step(f, pair, x, y, h, k_first)
+        stats["n_evals"] += len(k) - 1
+        err = error_norm(error, y, y_new, rtol, atol)
+
+        if err <= 1.0:
+            # Land exactly on the target instead of accumulating rounding in x
+            x = x_target if last_step else x + h
+            y = y_new
+            if fsal:
+                k_first = k[-1]
+            else:
+                k_first = f(x, y)
+                stats["n_evals"] += 1
+            x_values.append(x)
+            y_values.append(y)
+            slopes.append(k_first)
+            stats["accepted"] += 1
+            factor = max_factor if err == 0 else min(max_factor, safety * err ** -exponent)
+        else:
+            stats["rejected"] += 1
+            factor = max(min_factor, safety * err ** -exponent)
+
+        h *= factor
+        if h < 1e-14 * max(1.0, abs(x)):
+            raise RuntimeError(f"Step size became too small at x = {x}.")
+
+    return Trajectory(x_values, y_values, slopes, stats, method)
+
+
+def _integrate_ensemble_serial(f, x0, y0, x_target, n_steps, method):
+    """ March every member n_steps times; the state is stored component-major as (N, M). """
+    if isinstance(f, str):
+        f = compile_system(f)
+    x = np.array(x0, dtype=float)
+    # Component-major so y[i] in a system expression is component i for all members
+    y = np.array(y0, dtype=float).T.copy()
+    # Every member takes the same number of steps, each with its own step length
+    h = (x_target - x) / n_steps
+
+    # Embedded pairs take fixed steps here, so their error estimate is not needed
+    tableau = FIXED_STEP_METHODS["Runge-Kutta 2nd Order"] if method == "rk2" else EMBEDDED_PAIRS[method]
+    for _ in range(n_steps):
+        y, _ = explicit_step(f, tableau, x, y, h)
+        x = x + h
+
+    return y.T
+
+
+@cached_result(ignore=("workers", "shard_size"))
+def integrate_ensemble(f, x0, y0, x_target, h, method="rk2", workers=None, shard_size=100000):
+    """
+    Integrate dy/dx = f(x,y) for a whole ensemble of initial conditions at once.
+    y0 has shape (M,) for a scalar ODE or (M, N) for a system of N equations; x0 is a
+    scalar or an array of M starting points. Each Runge-Kutta stage is a single vectorized
+    evaluation over all members. `method` is "rk2" or the name of an embedded pair, used
+    with fixed steps no longer than h.
+
+    With `workers` > 1, ensembles larger than `shard_size` are split into shards that run
+    on a process pool. f must then be picklable, e.g. the expression string itself.
+    Returns the states at x_target with the same shape as y0.
+    """
+    y0 = np.asarray(y0, dtype=float)
+    x0 = np.broadcast_to(np.asarray(x0, dtype=float), y0.shape[:1])
+    if np.any(x_target <= x0):
+        raise ValueError("Target x must be greater than every initial x.")
+    if method != "rk2" and method not in EMBEDDED_PAIRS:
+        raise ValueError(f"Unknown method: {method}")
+    n_steps = max(1, int(np.ceil(np.max(x_target - x0) / h - 1e-9)))
+
+    if not workers or workers <= 1 or len(y0) <= shard_size:
+        return _integrate_ensemble_serial(f, x0, y0, x_target, n_steps, method)
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    bounds = range(0, len(y0), shard_size)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_integrate_ensemble_serial, f, x0[start:start + shard_size],
+                               y0[start:start + shard_size], x_target, n_steps, method)
+                   for start in bounds]
+        return np.concatenate([future.result() for future in futures])
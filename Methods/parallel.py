@@ -0,0 +1,134 @@
+"""
+Parallel evaluation of expensive user functions on large arrays.
+
+Above a size threshold, f(x) is split into chunks that are evaluated on a pool of worker
+processes. The abscissae and the results are exchanged through shared memory, so only
+the expression text, the buffer names and the chunk bounds are sent to the workers,
+which compile the expression themselves (once, it is cached). Only elementwise
+expressions are split; anything else, and every smaller array, is evaluated in-process.
+
+COMPMATH_PARALLEL_THRESHOLD sets the smallest array that is split (default 2**22
+elements; below that, copying through shared memory and scheduling the chunks cost about
+as much as they save, see the *_evaluation benchmarks; lower it for costly special
+functions) and COMPMATH_WORKERS the number of worker processes (default: one per CPU;
+1 disables parallel evaluation).
+"""
+import atexit
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from Methods.expressions import compile_expression, is_elementwise
+
+
+def _evaluate_chunk(key, x_name, y_name, n, start, stop):
+    """ Worker: evaluate the expression of `key` on x[start:stop] and write it into y[start:stop]. """
+    _, func_str, variables = key
+    f = compile_expression(func_str, variables)
+    x_buffer = shared_memory.SharedMemory(name=x_name)
+    y_buffer = shared_memory.SharedMemory(name=y_name)
+    try:
+        x = np.ndarray((n,), dtype=float, buffer=x_buffer.buf)
+        y = np.ndarray((n,), dtype=float, buffer=y_buffer.buf)
+        y[start:stop] = np.broadcast_to(np.asarray(f(x[start:stop]), dtype=float), (stop - start,))
+        # The views must be gone before the buffers can be closed
+        del x, y
+    finally:
+        x_buffer.close()
+        y_buffer.close()
+
+
+class ParallelEvaluator:
+    """ Process pool (started on first use) that evaluates compiled expressions on chunks of shared arrays. """
+
+    def __init__(self, workers=None, threshold=None, min_chunk=2**15):
+        self.workers = workers or int(os.environ.get("COMPMATH_WORKERS", 0)) or os.cpu_count() or 1
+        self.threshold = threshold or int(os.environ.get("COMPMATH_PARALLEL_THRESHOLD", 2**22))
+        # Chunks smaller than this cost more to schedule than to evaluate
+        self.min_chunk = min_chunk
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def enabled_for(self, size):
+        return self.workers > 1 and size >= max(self.threshold, 2 * self.min_chunk)
+
+    def pool(self):
+        with self._lock:
+            if self._pool is None:
+                # Spawned workers do not inherit the threads and state of a running Qt application
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+                atexit.register(self.shutdown)
+            return self._pool
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+    def evaluate(self, key, x):
+        """ f(x) for the compiled expression identified by `key`, with the chunks evaluated by the workers. """
+        x = np.asarray(x, dtype=float)
+        n = x.size
+        n_chunks = min(4 * self.workers, math.ceil(n / self.min_chunk))
+        bounds = np.linspace(0, n, n_chunks + 1).astype(int)
+
+        x_buffer = shared_memory.SharedMemory(create=True, size=max(x.nbytes, 1))
+        y_buffer = shared_memory.SharedMemory(create=True, size=max(x.nbytes, 1))
+        try:
+            shared_x = np.ndarray((n,), dtype=float, buffer=x_buffer.buf)
+            shared_x[:] = x.ravel()
+            del shared_x
+            futures = [self.pool().submit(_evaluate_chunk, key, x_buffer.name, y_buffer.name, n, start, stop)
+                       for start, stop in zip(bounds[:-1], bounds[1:])]
+            try:
+                for future in futures:
+                    future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+            shared_y = np.ndarray((n,), dtype=float, buffer=y_buffer.buf)
+            # Copied out, since the shared buffer is released below
+            y = shared_y.reshape(x.shape).copy()
+            del shared_y
+        finally:
+            for buffer in (x_buffer, y_buffer):
+                buffer.close()
+                buffer.unlink()
+        return y
+
+
+PARALLEL = ParallelEvaluator()
+
+
+class ParallelFunction:
+    """
+    A compiled expression f(x) whose evaluations on arrays of at least PARALLEL.threshold
+    elements are split across the worker processes. Keeps the cache key of f, so results
+    computed with it are cached like those of f itself.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.__wrapped__ = f
+        self.cache_key = f.cache_key
+
+    def __call__(self, x, *args, **kwargs):
+        if not args and not kwargs and PARALLEL.enabled_for(np.size(x)) and not np.iscomplexobj(x):
+            return PARALLEL.evaluate(self.cache_key, x)
+        return self.f(x, *args, **kwargs)
+
+
+def parallel_function(f):
+    """ Wrap a compiled elementwise expression of x in a ParallelFunction; other functions are returned as they are. """
+    key = getattr(f, "cache_key", None)
+    if (isinstance(key, tuple) and len(key) == 3 and key[0] == "expression" and key[2] == ("x",)
+            and is_elementwise(key[1], key[2])):
+        return ParallelFunction(f)
+    return f
@@ -0,0 +1,194 @@
+import numpy as np
+
+
+def minmax_decimate(x, y, n_bins):
+    """
+    Reduce a curve with sorted x to at most 4 points per bin of equal x width:
+    the first, last, lowest and highest point of each bin, in their original order.
+    With one bin per pixel column the decimated line is drawn identically to the
+    full one, since every pixel column still spans the same vertical range.
+    Returns the indices of the points to keep.
+    """
+    n = len(x)
+    if n <= 4 * n_bins or x[-1] <= x[0]:
+        return np.arange(n)
+
+    # Bin of every point; x is sorted, so each bin is a contiguous run of indices
+    bins = np.minimum(((x - x[0]) / (x[-1] - x[0]) * n_bins).astype(np.intp), n_bins - 1)
+    starts = np.flatnonzero(np.diff(bins)) + 1
+    starts = np.concatenate([[0], starts])
+    ends = np.concatenate([starts[1:], [n]]) - 1
+    segment = np.repeat(np.arange(len(starts)), np.diff(np.concatenate([starts, [n]])))
+
+    keep = [starts, ends]
+    y_finite = np.where(np.isfinite(y), y, np.nan)
+    for reduce in (np.fmin, np.fmax):
+        # First index in each bin whose value equals the bin's extreme
+        extreme = reduce.reduceat(y_finite, starts)
+        matches = np.flatnonzero(y_finite == extreme[segment])
+        first = np.concatenate([[True], np.diff(segment[matches]) > 0]) if len(matches) else matches
+        keep.append(matches[first.astype(bool)])
+    mask = np.zeros(n, dtype=bool)
+    mask[np.concatenate(keep)] = True
+    return np.flatnonzero(mask)
+
+
+class DecimatedLine:
+    """ A persistent Line2D showing a possibly huge curve decimated to the visible x range. """
+
+    def __init__(self, line):
+        self.line = line
+        self.x = np.empty(0)
+        self.y = np.empty(0)
+        self.sorted = True
+
+    def set_data(self, x, y):
+        self.x = np.asarray(x, dtype=float).ravel()
+        self.y = np.asarray(y, dtype=float).ravel()
+        self.sorted = len(self.x) < 2 or bool(np.all(np.diff(self.x) >= 0))
+
+    def update(self, x_min, x_max, n_bins):
+        """ Show the points in [x_min, x_max] (plus one on each side so the line reaches the edges). """
+        x, y = self.x, self.y
+        if self.sorted and len(x) > 4 * n_bins:
+            start = max(np.searchsorted(x, x_min) - 1, 0)
+            stop = min(np.searchsorted(x, x_max, side="right") + 1, len(x))
+            x, y = x[start:stop], y[start:stop]
+            keep = minmax_decimate(x, y, n_bins)
+            x, y = x[keep], y[keep]
+        self.line.set_data(x, y)
+
+
+class PlotLayer:
+    """
+    Plotting shared by the method windows.
+    Artists are created once per name and their data replaced on later plots instead
+    of clearing the axes. Curves are min/max decimated to the pixel width of the axes
+    and re-decimated whenever the x range changes (zoom, pan) or the canvas is resized.
+    When a replot leaves the limits, labels and legend unchanged, only the curves are
+    redrawn over a cached background (blitting).
+
+    A plot is begin(), any number of line()/points() calls, then finish().
+    """
+
+    # Curves with more points than this are drawn without markers
+    MAX_MARKERS = 200
+
+    def __init__(self, ax, canvas):
+        self.ax = ax
+        self.canvas = canvas
+        self.lines = {}
+        self.artists = {}
+        # Names used by the current plot, in plot order
+        self._used = {}
+        self._background = None
+        self._drawn_state = None
+        self._busy = False
+        self.blitting = bool(getattr(canvas, "supports_blit", False))
+
+        ax.callbacks.connect("xlim_changed", lambda _ax: self.redecimate())
+        canvas.mpl_connect("resize_event", lambda _event: self.redecimate())
+        canvas.mpl_connect("draw_event", self._on_draw)
+
+    def begin(self):
+        self._used = {}
+
+    def _artist(self, name, **style):
+        # Unlabelled artists are left out of the legend, also when they had a label before
+        style["label"] = style.get("label") or "_nolegend_"
+        if name not in self.artists:
+            # Animated artists are left out of full draws and drawn by _on_draw, so they can be blitted
+            (artist,) = self.ax.plot([], [], animated=self.blitting, **style)
+            self.artists[name] = artist
+        else:
+            self.artists[name].update(style)
+        self._used[name] = True
+        return self.artists[name]
+
+    def line(self, name, x, y, label=None, marker=None, **style):
+        """ Show a curve, decimated for display; markers are dropped on long curves. """
+        if marker is None or len(x) > self.MAX_MARKERS:
+            marker = "none"
+        artist = self._artist(name, label=label, marker=marker, linestyle=style.pop("linestyle", "-"), **style)
+        if name not in self.lines:
+            self.lines[name] = DecimatedLine(artist)
+        self.lines[name].set_data(x, y)
+        # Until the new limits are known, decimate over the whole curve
+        self.lines[name].update(-np.inf, np.inf, self._n_bins())
+        return artist
+
+    def points(self, name, x, y, label=None, marker="o", **style):
+        """ Show individual points (not decimated), e.g. data points or a root. """
+        artist = self._artist(name, label=label, marker=marker, linestyle="none", **style)
+        artist.set_data(np.atleast_1d(x), np.atleast_1d(y))
+        return artist
+
+    def reference_axes(self):
+        """ Thin lines through the origin, drawn once. """
+        if "axes" not in self.artists:
+            self.artists["axes"] = (self.ax.axhline(0, color="black", linewidth=0.5),
+                                    self.ax.axvline(0, color="black", linewidth=0.5))
+
+    def _n_bins(self):
+        return max(int(self.ax.bbox.width), 100)
+
+    def redecimate(self):
+        if self._busy:
+            return
+        x_min, x_max = sorted(self.ax.get_xlim())
+        n_bins = self._n_bins()
+        for line in self.lines.values():
+            line.update(x_min, x_max, n_bins)
+
+    def finish(self, title=None, xlabel=None, ylabel=None, legend=True, grid=True):
+        """ Hide artists not used by this plot, rescale, label and draw. """
+        for name, artist in self.artists.items():
+            if name != "axes":
+                artist.set_visible(name in self._used)
+
+        self._busy = True
+        try:
+            self.ax.relim(visible_only=True)
+            self.ax.autoscale(True)
+            self.ax.autoscale_view()
+        finally:
+            self._busy = False
+        self.redecimate()
+
+        self.ax.set_title(title or "")
+        self.ax.set_xlabel(xlabel or "")
+        self.ax.set_ylabel(ylabel or "")
+        self.ax.grid(grid)
+        handles = [self.artists[name] for name in self._used if not self.artists[name].get_label().startswith("_")]
+        labels = tuple(handle.get_label() for handle in handles)
+        if legend:
+            # Only the artists of this plot; hidden ones from earlier plots are left out
+            self.ax.legend(handles=handles)
+        elif self.ax.get_legend() is not None:
+            self.ax.get_legend().remove()
+
+        state = (self.ax.get_xlim(), self.ax.get_ylim(), labels, title, xlabel, ylabel, legend, grid)
+        if self.blitting and state == self._drawn_state and self._background is not None:
+            self.blit()
+        else:
+            self.canvas.draw()
+            self._drawn_state = state
+
+    def _on_draw(self, event):
+        """ After a full draw, keep the background and draw the animated curves on it. """
+        if not self.blitting:
+            return
+        self._background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        for name in self._used:
+            artist = self.artists[name]
+            if not isinstance(artist, tuple):
+                self.ax.draw_artist(artist)
+
+    def blit(self):
+        """ Redraw only the curves over the background of the last full draw. """
+        self.canvas.restore_region(self._background)
+        self._draw_artists()
+        self.canvas.blit(self.canvas.figure.bbox)
@@ -1,11 +1,19 @@
 import sys
 import numpy as np
 import matplotlib.pyplot as plt
-from PyQt6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QLabel, QLineEdit, QPushButton, QMessageBox
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from PyQt6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QLabel, QLineEdit, QPushButton, QMessageBox, QComboBox
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas, NavigationToolbar2QT as NavigationToolbar
+from Methods.instrumentation import instrumented
+from Methods.plotting import PlotLayer
+from Methods.curve_fitting import exponential_basis, fit_linear_model, polynomial_basis
 
 
+@instrumented(handlers=["compute_curve_fit", "plot_curve"],
+              solvers={"fit_model": None})
 class PolynomialCurveFittingWindow(QMainWindow):
+    # Curves beyond this many are fitted and summarized but not drawn
+    MAX_PLOTTED_CURVES = 10
+
     def __init__(self):
         super().__init__()
 
@@ -18,11 +26,23 @@ class PolynomialCurveFittingWindow(QMainWindow):
         layout = QVBoxLayout(central_widget)
 
         # Label and Input for Data Points
-        layout.addWidget(QLabel("Enter data points (comma-separated, e.g., 0,0;1,1;2,4;3,9;4,16):"))
+        layout.addWidget(QLabel("Enter data points (comma-separated, e.g., 0,0;1,1;2,4;3,9;4,16; "
+                                "x,y1,y2,... fits several curves):"))
         self.data_input = QLineEdit()
         self.data_input.setPlaceholderText("0,0;1,1;2,4;3,9;4,16")
         layout.addWidget(self.data_input)
 
+        # Model: polynomial of a degree, exponentials of given rates, or any basis expressions of x
+        layout.addWidget(QLabel("Model:"))
+        self.model_input = QComboBox()
+        self.model_input.addItems(["Quadratic", "Polynomial", "Exponential", "Custom basis"])
+        layout.addWidget(self.model_input)
+
+        layout.addWidget(QLabel("Degree, exponential rates (comma-separated) or basis functions (separated by ';'):"))
+        self.basis_input = QLineEdit()
+        self.basis_input.setPlaceholderText("e.g., 3  |  -1, -2  |  1; x; np.sin(x)")
+        layout.addWidget(self.basis_input)
+
         # Buttons
         self.calculate_button = QPushButton("Compute Polynomial Fit")
         self.calculate_button.clicked.connect(self.compute_curve_fit)
@@ -35,64 +55,119 @@ class PolynomialCurveFittingWindow(QMainWindow):
         # Matplotlib figure and canvas
         self.figure, self.ax = plt.subplots()
         self.canvas = FigureCanvas(self.figure)
+        layout.addWidget(NavigationToolbar(self.canvas, self))
         layout.addWidget(self.canvas)
+        self.plot_layer = PlotLayer(self.ax, self.canvas)
 
     def parse_data(self):
-        """ Parse user input and return x, y data arrays. """
+        """ Parse user input and return the x values and y values (one column per curve). """
         try:
             raw_data = self.data_input.text().strip()
-            points = [tuple(map(float, p.split(','))) for p in raw_data.split(';')]
-            x_values, y_values = zip(*points)
-            return np.array(x_values), np.array(y_values)
+            points = np.array([list(map(float, p.split(','))) for p in raw_data.split(';')])
+            if points.ndim != 2 or points.shape[1] < 2:
+                raise ValueError("Every point needs an x value and at least one y value.")
+            y = points[:, 1] if points.shape[1] == 2 else points[:, 1:]
+            return points[:, 0], y
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Invalid data input: {e}")
             return None, None
 
-    def compute_curve_fit(self):
-        """ Compute least squares polynomial fit and display equation. """
+    def parse_basis(self):
+        """ Basis expressions of the selected model. """
+        try:
+            model = self.model_input.currentText()
+            text = self.basis_input.text().strip()
+            if model == "Quadratic":
+                return polynomial_basis(2)
+            if model == "Polynomial":
+                degree = int(text)
+                if degree < 0:
+                    raise ValueError("Degree must be non-negative.")
+                return polynomial_basis(degree)
+            if model == "Exponential":
+                return exponential_basis(list(map(float, text.split(','))))
+            basis = [term.strip() for term in text.split(';') if term.strip()]
+            if not basis:
+                raise ValueError("Enter at least one basis function.")
+            return basis
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Invalid model: {e}")
+            return None
+
+    def fit_model(self, x, y, basis):
+        """ Least squares fit of the basis functions to every curve; returns a LinearModel. """
+        return fit_linear_model(x, y, basis)
+
+    def current_fit(self):
+        """
+        (x, y, model) for the current inputs. The inputs are parsed and fitted once, and
+        the fit is reused by later computations and plots until they change.
+        """
+        inputs = (self.data_input.text(), self.model_input.currentText(), self.basis_input.text())
+        if getattr(self, "_fit", None) is not None and self._fit[0] == inputs:
+            return self._fit[1]
+
         x, y = self.parse_data()
         if x is None:
-            return
-
-        # Construct the design matrix
-        A = np.vstack([x ** 2, x, np.ones_like(x)]).T
-        # Solve for coefficients using least squares
-        coeffs = np.linalg.lstsq(A, y, rcond=None)[0]
+            return None
+        basis = self.parse_basis()
+        if basis is None:
+            return None
+        try:
+            model = self.fit_model(x, y, basis)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Fitting failed: {e}")
+            return None
 
-        # Store coefficients for plotting
-        self.coeffs = coeffs
+        self._fit = (inputs, (x, y, model))
+        return self._fit[1]
 
-        # Display equation
-        equation = f"y = {coeffs[0]:.4f}x² + {coeffs[1]:.4f}x + {coeffs[2]:.4f}"
-        QMessageBox.information(self, "Polynomial Fit", f"Computed equation:\n{equation}")
+    def compute_curve_fit(self):
+        """ Compute the least squares fit and display the equation and residual statistics of each curve. """
+        fit = self.current_fit()
+        if fit is None:
+            return
+        _, _, model = fit
+
+        stats = {name: np.atleast_1d(value) for name, value in model.stats.items() if name != "standard_errors"}
+        lines = []
+        for curve in range(min(model.n_curves, self.MAX_PLOTTED_CURVES)):
+            lines.append(f"{model.equation(curve)}\n"
+                         f"    R² = {stats['r_squared'][curve]:.6f}, RMSE = {stats['rmse'][curve]:.4g}, "
+                         f"max |residual| = {stats['max_residual'][curve]:.4g}")
+        if model.n_curves > self.MAX_PLOTTED_CURVES:
+            lines.append(f"... {model.n_curves} curves in total; median R² = {np.median(stats['r_squared']):.6f}")
+        if model.rank < len(model.basis):
+            lines.append(f"The basis functions are linearly dependent (rank {model.rank} of {len(model.basis)}).")
+        QMessageBox.information(self, "Polynomial Fit", "Computed equation:\n" + "\n".join(lines))
 
     def plot_curve(self):
-        """ Plot the original data points and fitted quadratic curve. """
-        x, y = self.parse_data()
-        if x is None or not hasattr(self, 'coeffs'):
+        """ Plot the original data points and the fitted curves. """
+        fit = self.current_fit()
+        if fit is None:
             return
+        x, y, model = fit
 
-        # Generate fitted curve
+        # Every fitted curve is evaluated in one call
         x_fit = np.linspace(min(x), max(x), 100)
-        y_fit = self.coeffs[0] * x_fit ** 2 + self.coeffs[1] * x_fit + self.coeffs[2]
-
-        # Clear previous plot
-        self.ax.clear()
+        y_fit = model(x_fit).reshape(len(x_fit), -1)
+        y = y.reshape(len(x), -1)
 
-        # Plot original data points
-        self.ax.scatter(x, y, color="red", label="Data Points")
+        self.plot_layer.begin()
 
-        # Plot fitted curve
-        self.ax.plot(x_fit, y_fit, color="blue", label="Fitted Curve (Quadratic)")
+        for curve in range(min(model.n_curves, self.MAX_PLOTTED_CURVES)):
+            several = model.n_curves > 1
+            suffix = f" {curve + 1}" if several else ""
+            # Plot original data points
+            self.plot_layer.points(f"data{curve}", x, y[:, curve], color=f"C{curve}" if several else "red",
+                                   label=f"Data Points{suffix}")
 
-        self.ax.set_xlabel("x")
-        self.ax.set_ylabel("y")
-        self.ax.set_title("Polynomial Curve Fitting")
-        self.ax.legend()
-        self.ax.grid()
+            # Plot fitted curve
+            self.plot_layer.line(f"fit{curve}", x_fit, y_fit[:, curve], color=f"C{curve}" if several else "blue",
+                                 label=f"Fitted Curve{suffix} ({self.model_input.currentText()})")
 
         # Redraw the canvas
-        self.canvas.draw()
+        self.plot_layer.finish(title="Polynomial Curve Fitting", xlabel="x", ylabel="y")
 
 
 if __name__ == "__main__":
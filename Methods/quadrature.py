@@ -0,0 +1,267 @@
+import functools
+import heapq
+import math
+import numpy as np
+from Methods.result_cache import cached_result
+
+
+class CountingFunction:
+    """ Wrap a vectorized f(x, **params) and count the number of abscissae it is evaluated at. """
+
+    def __init__(self, f):
+        self.f = f
+        self.n_evals = 0
+
+    def __call__(self, x, **params):
+        self.n_evals += np.size(x)
+        # Broadcast so constant expressions such as "1" still return one value per abscissa
+        return np.broadcast_to(np.asarray(self.f(x, **params), dtype=float), np.shape(x))
+
+
+def oriented(rule):
+    """
+    Let an adaptive rule written for a < b take any limits: the integral over an empty
+    interval is 0 without evaluating f, and reversed limits negate the integral over [b, a].
+    """
+    @functools.wraps(rule)
+    def wrapper(f, a, b, *args, **kwargs):
+        if a == b:
+            return 0.0, 0.0, 0
+        if a > b:
+            value, error, n_evals = rule(f, b, a, *args, **kwargs)
+            return -value, error, n_evals
+        return rule(f, a, b, *args, **kwargs)
+
+    return wrapper
+
+
+def trapezoidal_rule(f, a, b, n):
+    """ Trapezoidal rule for numerical integration. """
+    h = (b - a) / n
+    x = np.linspace(a, b, n+1)
+    y = np.broadcast_to(np.asarray(f(x), dtype=float), x.shape)
+    return (h / 2) * (y[0] + 2 * np.sum(y[1:-1]) + y[-1])
+
+
+def romberg_integration(f, a, b, h_values):
+    """ Compute Romberg Integration table with user-defined step sizes. """
+    R = np.zeros((len(h_values), len(h_values)))
+
+    # Compute R[i,0] using the trapezoidal rule with fixed step sizes
+    for i, h in enumerate(h_values):
+        n = int((b - a) / h)  # Compute the number of intervals for given h
+        R[i, 0] = trapezoidal_rule(f, a, b, n)
+
+    # Compute higher-order Romberg estimates
+    for j in range(1, len(h_values)):
+        for i in range(j, len(h_values)):
+            R[i, j] = (4**j * R[i, j-1] - R[i-1, j-1]) / (4**j - 1)
+
+    return R
+
+
+@cached_result
+def romberg(f, a, b, h_values):
+    """
+    Romberg integration reported like the adaptive rules.
+    Returns (value, error estimate, number of evaluations, table).
+    """
+    counted = CountingFunction(f)
+    R = romberg_integration(counted, a, b, h_values)
+    value = R[-1, -1]
+    # Difference between the last two diagonal entries is the usual Romberg error estimate
+    error = abs(R[-1, -1] - R[-2, -2]) if len(h_values) > 1 else float("nan")
+    return value, error, counted.n_evals, R
+
+
+@cached_result
+@oriented
+def adaptive_simpson(f, a, b, tol=1e-10, max_depth=50):
+    """
+    Adaptive Simpson quadrature.
+    All intervals that still need refinement are split together, so every level
+    costs a single vectorized call to f. Returns (value, error estimate, number of evaluations).
+    """
+    counted = CountingFunction(f)
+
+    left = np.array([a], dtype=float)
+    right = np.array([b], dtype=float)
+    fa, fm, fb = counted(np.array([a, (a + b) / 2, b]))
+    f_left, f_mid, f_right = np.array([fa]), np.array([fm]), np.array([fb])
+    whole = (right - left) / 6 * (f_left + 4 * f_mid + f_right)
+    tols = np.array([tol])
+
+    total = 0.0
+    error = 0.0
+    depth = 0
+    while left.size:
+        mid = (left + right) / 2
+        f_new = counted(np.concatenate([(left + mid) / 2, (mid + right) / 2]))
+        f_lm, f_rm = f_new[:left.size], f_new[left.size:]
+
+        s_left = (mid - left) / 6 * (f_left + 4 * f_lm + f_mid)
+        s_right = (right - mid) / 6 * (f_mid + 4 * f_rm + f_right)
+        delta = s_left + s_right - whole
+
+        depth += 1
+        # Non-finite estimates (e.g. a singular endpoint) cannot improve by splitting
+        done = (np.abs(delta) <= 15 * tols) | (depth >= max_depth) | ~np.isfinite(delta)
+        # Richardson correction for the intervals that converged
+        total += np.sum(s_left[done] + s_right[done] + delta[done] / 15)
+        error += np.sum(np.abs(delta[done])) / 15
+
+        keep = ~done
+        left, mid, right = left[keep], mid[keep], right[keep]
+        f_left, f_mid, f_right = f_left[keep], f_mid[keep], f_right[keep]
+        f_lm, f_rm = f_lm[keep], f_rm[keep]
+        s_left, s_right = s_left[keep], s_right[keep]
+        tols = tols[keep] / 2
+
+        # Children: [left, mid] and [mid, right]
+        left, right = np.concatenate([left, mid]), np.concatenate([mid, right])
+        f_left, f_right = np.concatenate([f_left, f_mid]), np.concatenate([f_mid, f_right])
+        f_mid = np.concatenate([f_lm, f_rm])
+        whole = np.concatenate([s_left, s_right])
+        tols = np.concatenate([tols, tols])
+
+    return total, error, counted.n_evals
+
+
+# Gauss-Kronrod 7-15 nodes and weights on [-1, 1]
+_KRONROD_NODES = np.array([
+    0.991455371120812639206854697526329,
+    0.949107912342758524526189684047851,
+    0.864864423359769072789712788640926,
+    0.741531185599394439863864773280788,
+    0.586087235467691130294144845693013,
+    0.405845151377397166906606412076961,
+    0.207784955007898467600689403773245,
+    0.000000000000000000000000000000000,
+])
+_KRONROD_WEIGHTS = np.array([
+    0.022935322010529224963732008058970,
+    0.063092092629978553290700663189204,
+    0.104790010322250183839876322541518,
+    0.140653259715525918745189590510238,
+    0.169004726639267902826583426598550,
+    0.190350578064785409913256402421014,
+    0.204432940075298892414161999234649,
+    0.209482141084727828012999174891714,
+])
+_GAUSS_WEIGHTS = np.array([
+    0.129484966168869693270611432679082,
+    0.279705391489276667901467771423780,
+    0.381830050505118944950369775488975,
+    0.417959183673469387755102040816327,
+])
+
+GK15_NODES = np.concatenate([-_KRONROD_NODES[:-1], _KRONROD_NODES[::-1]])
+GK15_KRONROD_WEIGHTS = np.concatenate([_KRONROD_WEIGHTS[:-1], _KRONROD_WEIGHTS[::-1]])
+# The 7 Gauss nodes are every other Kronrod node; the remaining nodes get zero Gauss weight
+GK15_GAUSS_WEIGHTS = np.zeros(15)
+GK15_GAUSS_WEIGHTS[1::2] = np.concatenate([_GAUSS_WEIGHTS[:-1], _GAUSS_WEIGHTS[::-1]])
+
+
+def gauss_kronrod_15(f, left, right):
+    """
+    Apply the 7-15 Gauss-Kronrod pair to arrays of intervals in one vectorized call.
+    Returns the Kronrod estimates and |Kronrod - Gauss| error estimates per interval.
+    """
+    center = (left + right) / 2
+    half = (right - left) / 2
+    x = center[:, None] + half[:, None] * GK15_NODES[None, :]
+    y = f(x)
+    kronrod = half * (y @ GK15_KRONROD_WEIGHTS)
+    gauss = half * (y @ GK15_GAUSS_WEIGHTS)
+    return kronrod, np.abs(kronrod - gauss)
+
+
+@cached_result
+@oriented
+def gauss_kronrod(f, a, b, tol=1e-10, max_intervals=500):
+    """
+    Globally adaptive Gauss-Kronrod 7-15 quadrature.
+    Subintervals are kept in a priority queue ordered by error estimate and the worst
+    one is bisected until the total error meets the tolerance.
+    Returns (value, error estimate, number of evaluations).
+    """
+    counted = CountingFunction(f)
+
+    value, error = gauss_kronrod_15(counted, np.array([a], dtype=float), np.array([b], dtype=float))
+    # heapq is a min-heap, so intervals are stored by negative error
+    heap = [(-error[0], a, b, value[0])]
+    total_value = value[0]
+    total_error = error[0]
+
+    while total_error > max(tol, tol * abs(total_value)) and len(heap) < max_intervals:
+        neg_error, left, right, old_value = heapq.heappop(heap)
+        mid = (left + right) / 2
+        if mid <= left or mid >= right:
+            # Interval cannot be split any further in floating point
+            heapq.heappush(heap, (neg_error, left, right, old_value))
+            break
+
+        values, errors = gauss_kronrod_15(counted, np.array([left, mid]), np.array([mid, right]))
+        heapq.heappush(heap, (-errors[0], left, mid, values[0]))
+        heapq.heappush(heap, (-errors[1], mid, right, values[1]))
+
+        total_value += values[0] + values[1] - old_value
+        total_error += errors[0] + errors[1] + neg_error
+
+    # Re-sum from the queue to avoid drift from the running updates
+    total_value = math.fsum(item[3] for item in heap)
+    total_error = math.fsum(-item[0] for item in heap)
+    return total_value, total_error, counted.n_evals
+
+
+@cached_result
+@oriented
+def tanh_sinh(f, a, b, tol=1e-10, max_level=10, t_max=3.5):
+    """
+    Tanh-sinh (double exponential) quadrature.
+    The substitution clusters nodes near a and b, so integrable endpoint singularities
+    such as 1/sqrt(x) are handled without ever evaluating f at the endpoints.
+    Returns (value, error estimate, number of evaluations).
+    """
+    counted = CountingFunction(f)
+    half = (b - a) / 2
+
+    def weighted_sum(t):
+        """ Sum of w(t) * f(x(t)) over t >= 0 nodes mirrored onto both ends of [a, b]. """
+        u = np.pi / 2 * np.sinh(t)
+        # Distance from the nearest endpoint, computed without cancellation: 1 - tanh(u)
+        distance = half * np.exp(-u) / np.cosh(u)
+        weight = half * np.pi / 2 * np.cosh(t) / np.cosh(u) ** 2
+        x = np.concatenate([a + distance, b - distance])
+        w = np.concatenate([weight, weight])
+        # Nodes that round onto an endpoint would evaluate a possible singularity
+        inside = (x > a) & (x < b)
+        return np.sum(w[inside] * counted(x[inside]))
+
+    h = 1.0
+    t = np.arange(1, int(t_max / h) + 1) * h
+    # The centre node t = 0 is shared by both halves, so count it once
+    center_weight = half * np.pi / 2
+    s = center_weight * counted(np.array([(a + b) / 2]))[0] + weighted_sum(t)
+    value = h * s
+    error = float("inf")
+
+    for _ in range(max_level):
+        h /= 2
+        # New nodes are the odd multiples of the halved step
+        t = np.arange(1, int(t_max / h) + 1, 2) * h
+        s += weighted_sum(t)
+        new_value = h * s
+        error = abs(new_value - value)
+        value = new_value
+        if error <= tol * max(1.0, abs(value)):
+            break
+
+    return value, error, counted.n_evals
+
+
+QUADRATURE_METHODS = {
+    "Adaptive Simpson": adaptive_simpson,
+    "Gauss-Kronrod 7-15": gauss_kronrod,
+    "Tanh-Sinh": tanh_sinh,
+}
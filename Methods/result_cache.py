@@ -0,0 +1,322 @@
+"""
+Persistent, content-addressed cache of method results.
+
+A result is stored under the hash of the method name and all of its inputs: numbers,
+arrays (by dtype, shape and bytes), strings, and user functions by their expression
+text (see compile_expression). Entries live under the user cache directory and the
+least recently used ones are evicted beyond a size limit. Arrays are stored as .npy
+files, and large ones are memory-mapped when read back, so a hit costs little more
+than opening the files.
+
+Set COMPMATH_CACHE=0 to disable the cache, or COMPMATH_CACHE_DIR to move it.
+"""
+import functools
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import uuid
+
+import numpy as np
+
+# Bump when a cached method changes its results, so old entries are no longer found
+CACHE_VERSION = 2
+
+_MISSING = object()
+
+# Result classes that can be stored, by name (see register_result_type)
+_RESULT_TYPES = {}
+
+
+class Uncacheable(Exception):
+    """ An input or result that has no stable content to hash or store. """
+
+
+def user_cache_dir():
+    """ Platform cache directory for this application. """
+    if os.environ.get("COMPMATH_CACHE_DIR"):
+        return os.environ["COMPMATH_CACHE_DIR"]
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+        return os.path.join(base, "CompMath", "Cache")
+    if sys.platform == "darwin":
+        return os.path.expanduser("~/Library/Caches/CompMath")
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "compmath")
+
+
+def register_result_type(cls):
+    """ Class decorator allowing instances (rebuilt from their attributes) to be cached. """
+    _RESULT_TYPES[cls.__name__] = cls
+    return cls
+
+
+def _hash_value(h, value):
+    """ Feed a canonical, type-tagged encoding of an input into the hash. """
+    if value is None or isinstance(value, (bool, int, float, complex, str, np.generic)):
+        if isinstance(value, np.generic):
+            value = value.item()
+        h.update(f"{type(value).__name__}:{value!r};".encode())
+    elif isinstance(value, np.ndarray) or (isinstance(value, (list, tuple)) and _is_numeric(value)):
+        array = np.ascontiguousarray(value)
+        if array.dtype == object:
+            raise Uncacheable("Object arrays cannot be hashed.")
+        # The dtype is part of the key: a bool mask and a 0/1 float array can give different results
+        h.update(f"array:{array.dtype.str}:{array.shape};".encode())
+        h.update(array.tobytes())
+    elif isinstance(value, (list, tuple)):
+        h.update(f"{type(value).__name__}:{len(value)};".encode())
+        for item in value:
+            _hash_value(h, item)
+    elif isinstance(value, dict):
+        h.update(f"dict:{len(value)};".encode())
+        for key in sorted(value, key=str):
+            _hash_value(h, key)
+            _hash_value(h, value[key])
+    elif callable(value) and getattr(value, "cache_key", None) is not None:
+        h.update(b"function;")
+        _hash_value(h, value.cache_key)
+    else:
+        raise Uncacheable(f"Cannot hash an input of type {type(value).__name__}.")
+
+
+def _is_numeric(value):
+    try:
+        return np.asarray(value).dtype.kind in "iufcb"
+    except ValueError:
+        # Ragged nested lists
+        return False
+
+
+def result_key(method, inputs):
+    """ Hex digest identifying a method called with the given inputs. """
+    h = hashlib.sha256(f"v{CACHE_VERSION}:{method};".encode())
+    _hash_value(h, inputs)
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    Directory of cached results, one subdirectory per key holding result.json and
+    the .npy files of the result's arrays. The modification time of result.json is
+    refreshed on every hit and is the recency used for LRU eviction.
+    """
+
+    def __init__(self, directory=None, max_bytes=512 * 1024 ** 2, mmap_bytes=64 * 1024, min_compute_s=1e-3):
+        self.directory = directory or user_cache_dir()
+        self.max_bytes = max_bytes
+        # Arrays at least this large are memory-mapped instead of read
+        self.mmap_bytes = mmap_bytes
+        # Results computed faster than this are cheaper to recompute than to store
+        self.min_compute_s = min_compute_s
+        self.enabled = os.environ.get("COMPMATH_CACHE", "1").lower() not in ("0", "false", "no", "off")
+        self.hits = 0
+        self.misses = 0
+        self._size = None
+        self._lock = threading.Lock()
+
+    def _entry(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key, default=None):
+        """ The stored result for key, or default if there is none. """
+        entry = self._entry(key)
+        try:
+            with open(os.path.join(entry, "result.json")) as file:
+                encoded = json.load(file)
+            value = self._decode(entry, encoded)
+        except (OSError, ValueError, KeyError):
+            # Missing, partially evicted or unreadable entries are simply misses
+            self.misses += 1
+            return default
+        try:
+            os.utime(os.path.join(entry, "result.json"))
+        except OSError:
+            pass
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """ Store a result; values that cannot be stored are skipped. """
+        tmp = os.path.join(self.directory, f"tmp-{uuid.uuid4().hex}")
+        try:
+            os.makedirs(tmp)
+            arrays = []
+            encoded = self._encode(value, arrays)
+            size = 0
+            for index, array in enumerate(arrays):
+                path = os.path.join(tmp, f"{index}.npy")
+                np.save(path, array, allow_pickle=False)
+                size += os.path.getsize(path)
+            with open(os.path.join(tmp, "result.json"), "w") as file:
+                json.dump(encoded, file)
+            size += os.path.getsize(os.path.join(tmp, "result.json"))
+
+            entry = self._entry(key)
+            os.makedirs(os.path.dirname(entry), exist_ok=True)
+            # Renaming the finished directory makes the entry appear atomically
+            os.rename(tmp, entry)
+        except (Uncacheable, OSError):
+            # Unstorable result, or another process stored the same key first
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+
+        with self._lock:
+            if self._size is not None:
+                self._size += size
+        if self._total_size() > self.max_bytes:
+            self.evict()
+
+    def _encode(self, value, arrays):
+        """ JSON form of a result; arrays are appended to `arrays` and referenced by index. """
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        if isinstance(value, np.generic):
+            return {"__scalar__": value.item(), "dtype": value.dtype.str}
+        if isinstance(value, np.ndarray):
+            if value.dtype == object:
+                raise Uncacheable("Object arrays cannot be stored.")
+            arrays.append(np.ascontiguousarray(value))
+            return {"__array__": len(arrays) - 1}
+        if isinstance(value, (list, tuple)):
+            items = [self._encode(item, arrays) for item in value]
+            return items if isinstance(value, list) else {"__tuple__": items}
+        if isinstance(value, dict):
+            return {"__dict__": [[self._encode(k, arrays), self._encode(v, arrays)] for k, v in value.items()]}
+        if type(value).__name__ in _RESULT_TYPES:
+            return {"__object__": type(value).__name__, "state": self._encode(vars(value), arrays)}
+        raise Uncacheable(f"Cannot store a result of type {type(value).__name__}.")
+
+    def _decode(self, entry, value):
+        if isinstance(value, list):
+            return [self._decode(entry, item) for item in value]
+        if not isinstance(value, dict):
+            return value
+        if "__scalar__" in value:
+            return np.dtype(value["dtype"]).type(value["__scalar__"])
+        if "__array__" in value:
+            path = os.path.join(entry, f"{value['__array__']}.npy")
+            # Copy-on-write mapping: callers may modify the array without touching the file
+            mmap_mode = "c" if os.path.getsize(path) >= self.mmap_bytes else None
+            return np.load(path, mmap_mode=mmap_mode, allow_pickle=False)
+        if "__tuple__" in value:
+            return tuple(self._decode(entry, item) for item in value["__tuple__"])
+        if "__dict__" in value:
+            return {self._decode(entry, k): self._decode(entry, v) for k, v in value["__dict__"]}
+        if "__object__" in value:
+            obj = _RESULT_TYPES[value["__object__"]].__new__(_RESULT_TYPES[value["__object__"]])
+            obj.__dict__.update(self._decode(entry, value["state"]))
+            return obj
+        raise KeyError("Unknown encoding")
+
+    def _entries(self):
+        """ (last use, size, path) of every entry. """
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir() or shard.name.startswith("tmp-"):
+                continue
+            for entry in os.scandir(shard.path):
+                try:
+                    files = list(os.scandir(entry.path))
+                    last_use = os.stat(os.path.join(entry.path, "result.json")).st_mtime
+                except OSError:
+                    continue
+                entries.append((last_use, sum(f.stat().st_size for f in files), entry.path))
+        return entries
+
+    def _total_size(self):
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            return self._size
+
+    def evict(self, target=None):
+        """ Delete least recently used entries until the cache is below target (90% of the limit). """
+        target = 0.9 * self.max_bytes if target is None else target
+        with self._lock:
+            # Other processes share the directory, so recount instead of trusting the running total
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+            self._size = total
+
+    def clear(self):
+        """ Delete every entry. """
+        self.evict(target=0)
+
+    def stats(self):
+        return {"directory": self.directory, "enabled": self.enabled, "hits": self.hits,
+                "misses": self.misses, "size_bytes": self._total_size(), "max_bytes": self.max_bytes}
+
+    def cached_call(self, method, compute, inputs):
+        """ Result of compute() for these inputs, from the cache when possible. """
+        if not self.enabled:
+            return compute()
+        try:
+            key = result_key(method, inputs)
+        except Uncacheable:
+            return compute()
+
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        start = time.perf_counter()
+        value = compute()
+        if time.perf_counter() - start >= self.min_compute_s:
+            self.put(key, value)
+        return value
+
+
+RESULT_CACHE = ResultCache()
+
+
+def cached_result(func=None, ignore=()):
+    """
+    Decorator that looks a function's result up in RESULT_CACHE before computing it.
+    The key covers every argument after defaults are applied, except those named in
+    `ignore` (such as worker counts, which do not change the result). Calls with an
+    input that cannot be hashed, e.g. a plain Python function, are computed as usual.
+    """
+    if func is None:
+        return functools.partial(cached_result, ignore=ignore)
+
+    signature = inspect.signature(func)
+    method = f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not RESULT_CACHE.enabled:
+            return func(*args, **kwargs)
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        inputs = {name: value for name, value in bound.arguments.items() if name not in ignore}
+        return RESULT_CACHE.cached_call(method, lambda: func(*args, **kwargs), inputs)
+
+    return wrapper
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or clear the result cache.")
+    parser.add_argument("--clear", action="store_true", help="Delete every cached result.")
+    args = parser.parse_args(argv)
+    if args.clear:
+        RESULT_CACHE.clear()
+    for name, value in RESULT_CACHE.stats().items():
+        print(f"{name}: {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,18 @@
 import sys
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
-from PyQt6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QLabel, QLineEdit, QPushButton, QMessageBox, QTextEdit
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from PyQt6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QLabel, QLineEdit, QPushButton, QMessageBox, QTextEdit, QComboBox, QFileDialog
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas, NavigationToolbar2QT as NavigationToolbar
+from Methods.cubature import CUBATURE_METHODS, VARIABLES
+from Methods.expressions import compile_expression
+from Methods.instrumentation import instrumented
+from Methods.parallel import parallel_function
+from Methods.plotting import PlotLayer
+from Methods.quadrature import QUADRATURE_METHODS, romberg, romberg_integration, trapezoidal_rule
+from Methods.romberg_table import format_romberg_html, export_romberg_csv, export_romberg_npy, export_romberg_text
 
+@instrumented(handlers=["compute_integral", "plot_function", "export_romberg_table"],
+              solvers={"integrate_romberg": None, "integrate_adaptive": None, "integrate_cubature": None})
 class RombergIntegrationWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -34,23 +42,50 @@ class RombergIntegrationWindow(QMainWindow):
         self.upper_limit_input.setPlaceholderText("e.g., 1")
         layout.addWidget(self.upper_limit_input)
 
+        # Limits of y and z turn the integral into a double or triple integral of f(x, y[, z])
+        layout.addWidget(QLabel("Limits for y (optional, for f(x, y)):"))
+        self.y_limits_input = QLineEdit()
+        self.y_limits_input.setPlaceholderText("e.g., 0, 1")
+        layout.addWidget(self.y_limits_input)
+
+        layout.addWidget(QLabel("Limits for z (optional, for f(x, y, z)):"))
+        self.z_limits_input = QLineEdit()
+        self.z_limits_input.setPlaceholderText("e.g., 0, 1")
+        layout.addWidget(self.z_limits_input)
+
         # Step sizes input
         layout.addWidget(QLabel("Enter step sizes h (comma-separated):"))
         self.h_values_input = QLineEdit()
         self.h_values_input.setPlaceholderText("e.g., 0.5, 0.25, 0.125")
         layout.addWidget(self.h_values_input)
 
+        # Integration method selection
+        layout.addWidget(QLabel("Integration method:"))
+        self.method_input = QComboBox()
+        self.method_input.addItems(["Romberg"] + list(QUADRATURE_METHODS)
+                                   + [name for name in CUBATURE_METHODS if name != "Romberg"])
+        layout.addWidget(self.method_input)
+
+        layout.addWidget(QLabel("Tolerance (adaptive and multidimensional methods):"))
+        self.tolerance_input = QLineEdit()
+        self.tolerance_input.setPlaceholderText("e.g., 1e-10")
+        layout.addWidget(self.tolerance_input)
+
         # Buttons
-        self.calculate_button = QPushButton("Compute Romberg Table")
-        self.calculate_button.clicked.connect(self.compute_romberg_table)
+        self.calculate_button = QPushButton("Compute Integral")
+        self.calculate_button.clicked.connect(self.compute_integral)
         layout.addWidget(self.calculate_button)
 
         self.plot_button = QPushButton("Plot Function")
         self.plot_button.clicked.connect(self.plot_function)
         layout.addWidget(self.plot_button)
 
+        self.export_button = QPushButton("Export Romberg Table")
+        self.export_button.clicked.connect(self.export_romberg_table)
+        layout.addWidget(self.export_button)
+
         # Display Romberg Table
-        layout.addWidget(QLabel("Romberg Integration Table:"))
+        layout.addWidget(QLabel("Integration Results:"))
         self.result_display = QTextEdit()
         self.result_display.setReadOnly(True)
         layout.addWidget(self.result_display)
@@ -58,7 +93,9 @@ class RombergIntegrationWindow(QMainWindow):
         # Matplotlib figure and canvas
         self.figure, self.ax = plt.subplots()
         self.canvas = FigureCanvas(self.figure)
+        layout.addWidget(NavigationToolbar(self.canvas, self))
         layout.addWidget(self.canvas)
+        self.plot_layer = PlotLayer(self.ax, self.canvas)
 
     def parse_inputs(self):
         """ Parse user inputs for function, limits, and step sizes. """
@@ -66,77 +103,212 @@ class RombergIntegrationWindow(QMainWindow):
             func_str = self.function_input.text()
             a = float(self.lower_limit_input.text())
             b = float(self.upper_limit_input.text())
-            h_values = list(map(float, self.h_values_input.text().split(',')))
+            # Step sizes are only required by Romberg; adaptive methods choose their own
+            h_text = self.h_values_input.text().strip()
+            h_values = list(map(float, h_text.split(','))) if h_text else []
 
-            def f(x):
-                return eval(func_str, {"x": x, "np": np})
+            # Large trapezoid grids are evaluated on the worker processes
+            f = parallel_function(compile_expression(func_str))
 
             return f, a, b, h_values
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Invalid input: {e}")
             return None, None, None, None
 
+    def parse_box_inputs(self):
+        """ Parse the function and the limits of every dimension for a multidimensional integral. """
+        try:
+            lower = [float(self.lower_limit_input.text())]
+            upper = [float(self.upper_limit_input.text())]
+            for name, field in (("y", self.y_limits_input), ("z", self.z_limits_input)):
+                text = field.text().strip()
+                if not text:
+                    break
+                limits = list(map(float, text.split(',')))
+                if len(limits) != 2:
+                    raise ValueError(f"Limits for {name} must be two comma-separated numbers.")
+                lower.append(limits[0])
+                upper.append(limits[1])
+
+            f = compile_expression(self.function_input.text(), VARIABLES[:len(lower)])
+
+            return f, lower, upper
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Invalid input: {e}")
+            return None, None, None
+
+    def is_multidimensional(self):
+        return bool(self.y_limits_input.text().strip())
+
+    def parse_tolerance(self):
+        """ Parse the tolerance for the adaptive methods, defaulting to 1e-10. """
+        try:
+            tol_text = self.tolerance_input.text().strip()
+            tol = float(tol_text) if tol_text else 1e-10
+            if tol <= 0:
+                raise ValueError("Tolerance must be positive.")
+            return tol
+        except ValueError as e:
+            QMessageBox.critical(self, "Error", f"Invalid tolerance: {e}")
+            return None
+
     def trapezoidal_rule(self, f, a, b, n):
         """ Trapezoidal rule for numerical integration. """
-        h = (b - a) / n
-        x = np.linspace(a, b, n+1)
-        y = f(x)
-        return (h / 2) * (y[0] + 2 * np.sum(y[1:-1]) + y[-1])
+        return trapezoidal_rule(f, a, b, n)
 
     def romberg_integration(self, f, a, b, h_values):
         """ Compute Romberg Integration table with user-defined step sizes. """
-        R = np.zeros((len(h_values), len(h_values)))
+        return romberg_integration(f, a, b, h_values)
+
+    def integrate_romberg(self, f, a, b, h_values):
+        """ Romberg integration returning (value, error estimate, evaluations, table). """
+        return romberg(f, a, b, h_values)
 
-        # Compute R[i,0] using the trapezoidal rule with fixed step sizes
-        for i, h in enumerate(h_values):
-            n = int((b - a) / h)  # Compute the number of intervals for given h
-            R[i, 0] = self.trapezoidal_rule(f, a, b, n)
+    def integrate_adaptive(self, method, f, a, b, tol):
+        """ Adaptive integration returning (value, error estimate, evaluations). """
+        return QUADRATURE_METHODS[method](f, a, b, tol=tol)
 
-        # Compute higher-order Romberg estimates
-        for j in range(1, len(h_values)):
-            for i in range(j, len(h_values)):
-                R[i, j] = (4**j * R[i, j-1] - R[i-1, j-1]) / (4**j - 1)
+    def integrate_cubature(self, method, f, lower, upper, tol):
+        """ Integration over a box returning (value, error estimate, evaluations, estimate per level). """
+        return CUBATURE_METHODS[method](f, lower, upper, tol=tol)
 
-        return R
+    def compute_integral(self):
+        """ Integrate with the selected method and display the result. """
+        method = self.method_input.currentText()
+        if self.is_multidimensional() or method not in ["Romberg"] + list(QUADRATURE_METHODS):
+            self.compute_cubature(method)
+        elif method == "Romberg":
+            self.compute_romberg_table()
+        else:
+            self.compute_adaptive_integral(method)
+
+    def compute_adaptive_integral(self, method):
+        """ Integrate with an adaptive method and compare it against Romberg. """
+        f, a, b, h_values = self.parse_inputs()
+        if f is None:
+            return
+        tol = self.parse_tolerance()
+        if tol is None:
+            return
+
+        try:
+            value, error, n_evals = self.integrate_adaptive(method, f, a, b, tol)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Integration failed: {e}")
+            return
+
+        lines = [
+            f"{method}:",
+            f"  Integral = {value:.12g}",
+            f"  Error estimate = {error:.3e}",
+            f"  Function evaluations = {n_evals}",
+        ]
+
+        # Compare against Romberg when step sizes were given
+        if h_values:
+            r_value, r_error, r_evals, _ = self.integrate_romberg(f, a, b, h_values)
+            lines += [
+                "",
+                "Romberg:",
+                f"  Integral = {r_value:.12g}",
+                f"  Error estimate = {r_error:.3e}",
+                f"  Function evaluations = {r_evals}",
+                "",
+                f"Difference from Romberg = {abs(value - r_value):.3e}",
+            ]
+
+        self.result_display.setText("\n".join(lines))
+
+    def compute_cubature(self, method):
+        """ Integrate over a rectangle or box (or an interval) with the tensor or sparse grid rule. """
+        if method not in CUBATURE_METHODS:
+            QMessageBox.critical(self, "Error", f"{method} integrates functions of x only; "
+                                                f"use one of: {', '.join(CUBATURE_METHODS)}.")
+            return
+        f, lower, upper = self.parse_box_inputs()
+        if f is None:
+            return
+        tol = self.parse_tolerance()
+        if tol is None:
+            return
+
+        try:
+            value, error, n_evals, estimates = self.integrate_cubature(method, f, lower, upper, tol)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Integration failed: {e}")
+            return
+
+        box = " x ".join(f"[{a:g}, {b:g}]" for a, b in zip(lower, upper))
+        lines = [
+            f"{method} over {box}:",
+            f"  Integral = {value:.12g}",
+            f"  Error estimate = {error:.3e}",
+            f"  Function evaluations = {n_evals}",
+            "",
+            "Estimate per level:",
+        ]
+        lines += [f"  {level}: {estimate:.12g}" for level, estimate in enumerate(estimates)]
+        self.result_display.setText("\n".join(lines))
 
     def compute_romberg_table(self):
         """ Compute Romberg table and display results. """
         f, a, b, h_values = self.parse_inputs()
         if f is None:
             return
+        if not h_values:
+            QMessageBox.critical(self, "Error", "Invalid input: Romberg requires step sizes h.")
+            return
+
+        _, error, n_evals, romberg_table = self.integrate_romberg(f, a, b, h_values)
 
-        romberg_table = self.romberg_integration(f, a, b, h_values)
+        # Store for exporting
+        self.romberg_table = romberg_table
+        self.romberg_h_values = h_values
 
-        # Convert to DataFrame for better visualization
-        romberg_df = pd.DataFrame(romberg_table, index=h_values, columns=[f"Order {i}" for i in range(len(h_values))])
-        romberg_df = romberg_df.replace(0, np.nan)  # Hide unnecessary zeros
+        # Format and display result (only the triangular part is rendered)
+        table_html = format_romberg_html(romberg_table, h_values)
+        table_html += f"<p>Error estimate = {error:.3e}<br>Function evaluations = {n_evals}</p>"
+        self.result_display.setHtml(table_html)
 
-        # Format and display result
-        table_str = romberg_df.to_string(index=True, na_rep=" ")
-        self.result_display.setText(table_str)
+    def export_romberg_table(self):
+        """ Export the full Romberg table to a CSV, text or NPY file. """
+        if not hasattr(self, 'romberg_table'):
+            QMessageBox.warning(self, "Warning", "Please compute the Romberg table first.")
+            return
+
+        path, selected_filter = QFileDialog.getSaveFileName(self, "Export Romberg Table", "romberg_table.csv",
+                                                            "CSV Files (*.csv);;Text Files (*.txt);;NumPy Arrays (*.npy)")
+        if not path:
+            return
+
+        try:
+            if path.endswith(".npy") or selected_filter.startswith("NumPy"):
+                export_romberg_npy(path, self.romberg_table)
+            elif path.endswith(".txt") or selected_filter.startswith("Text"):
+                export_romberg_text(path, self.romberg_table, self.romberg_h_values)
+            else:
+                export_romberg_csv(path, self.romberg_table, self.romberg_h_values)
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Could not export table: {e}")
 
     def plot_function(self):
-        """ Plot the function within the integration range. """
-        f, a, b, h_values = self.parse_inputs()
+        """ Plot the function within the integration range (along x through the middle of the box). """
+        f, lower, upper = self.parse_box_inputs()
         if f is None:
             return
 
-        x = np.linspace(a, b, 100)
-        y = f(x)
+        x = np.linspace(lower[0], upper[0], 100)
+        middle = [(a + b) / 2 for a, b in zip(lower[1:], upper[1:])]
+        y = np.broadcast_to(f(x, *middle), x.shape)
+        fixed = "".join(f", {name}={value:g}" for name, value in zip(VARIABLES[1:], middle))
 
-        # Clear previous plot
-        self.ax.clear()
+        self.plot_layer.begin()
 
         # Plot function
-        self.ax.plot(x, y, label=f"f(x) = {self.function_input.text()}", color="blue")
-        self.ax.set_xlabel("x")
-        self.ax.set_ylabel("f(x)")
-        self.ax.set_title("Function Plot for Integration")
-        self.ax.legend()
-        self.ax.grid()
+        self.plot_layer.line("function", x, y, label=f"f(x{fixed}) = {self.function_input.text()}", color="blue")
 
         # Redraw the canvas
-        self.canvas.draw()
+        self.plot_layer.finish(title="Function Plot for Integration", xlabel="x", ylabel="f(x)")
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -0,0 +1,59 @@
+import csv
+import html
+import numpy as np
+
+
+def _column_headers(R):
+    return [f"Order {j}" for j in range(R.shape[1])]
+
+
+def format_romberg_text(R, h_values, precision=6):
+    """ Render the lower-triangular part of a Romberg table as aligned plain text. """
+    n = len(h_values)
+    h_cells = [f"{h:g}" for h in h_values]
+    # Only entries with j <= i are part of the Romberg table
+    cells = [[f"{R[i, j]:.{precision}f}" for j in range(i + 1)] for i in range(n)]
+
+    h_width = max([len("h")] + [len(c) for c in h_cells])
+    widths = [max([len(header)] + [len(cells[i][j]) for i in range(j, n)])
+              for j, header in enumerate(_column_headers(R))]
+
+    lines = ["h".rjust(h_width) + "  " + "  ".join(header.rjust(w) for header, w in zip(_column_headers(R), widths))]
+    for i in range(n):
+        row = "  ".join(cell.rjust(widths[j]) for j, cell in enumerate(cells[i]))
+        lines.append(h_cells[i].rjust(h_width) + "  " + row)
+    return "\n".join(line.rstrip() for line in lines)
+
+
+def format_romberg_html(R, h_values, precision=6):
+    """ Render the lower-triangular part of a Romberg table as an HTML table for a QTextEdit. """
+    n = len(h_values)
+    header = "".join(f"<th>{html.escape(title)}</th>" for title in ["h"] + _column_headers(R))
+    rows = []
+    for i in range(n):
+        cells = [f"<td align='right'>{R[i, j]:.{precision}f}</td>" for j in range(i + 1)]
+        cells += ["<td></td>"] * (n - i - 1)
+        rows.append(f"<tr><td align='right'>{h_values[i]:g}</td>{''.join(cells)}</tr>")
+    return ("<table border='1' cellspacing='0' cellpadding='4'>"
+            f"<tr>{header}</tr>{''.join(rows)}</table>")
+
+
+def export_romberg_csv(path, R, h_values):
+    """ Write the full Romberg table to CSV at full precision, one row per step size. """
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["h"] + _column_headers(R))
+        for i, h in enumerate(h_values):
+            # Entries above the diagonal are not defined and are left empty
+            writer.writerow([repr(float(h))] + [repr(float(R[i, j])) if j <= i else "" for j in range(R.shape[1])])
+
+
+def export_romberg_text(path, R, h_values, precision=10):
+    """ Write the Romberg table as aligned plain text, as it reads in the window. """
+    with open(path, "w") as file:
+        file.write(format_romberg_text(R, h_values, precision) + "\n")
+
+
+def export_romberg_npy(path, R):
+    """ Save the full Romberg table array as a .npy file. """
+    np.save(path, R)
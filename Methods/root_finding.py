@@ -0,0 +1,379 @@
+import numpy as np
+from Methods.jit import run_kernel
+from Methods.result_cache import cached_result
+
+
+@cached_result
+def find_approximate_root(x, y):
+    """
+    Find the approximate root from sampled values (where the curve crosses the x-axis).
+    Returns the approximate root or None if no root is found.
+    """
+    crossings = np.where(np.diff(np.sign(y)))[0]
+    if len(crossings) > 0:
+        return x[crossings[0]]  # Return the first crossing point
+    return None  # No root found
+
+
+@cached_result
+def find_sign_change_interval(f, start, end):
+    """ Automatically finds a valid interval where a root exists in [start, end] """
+    x_values = np.linspace(start, end, 100)
+    # One call for the whole grid, so large or expensive scans can be vectorized (or parallelized)
+    y_values = np.broadcast_to(np.asarray(f(x_values), dtype=float), x_values.shape)
+    changes = np.flatnonzero(y_values[:-1] * y_values[1:] < 0)
+    if len(changes):
+        i = changes[0]
+        return x_values[i], x_values[i + 1]  # Found sign change
+    return None, None  # No valid interval found
+
+
+@cached_result
+def bisection_method(f, a, b, tol=1e-6, max_iter=100):
+    """ Bisection method for root finding. """
+    compiled = run_kernel("bisection", f, float(a), float(b), float(tol), int(max_iter))
+    if compiled is not None:
+        root, iter_count = compiled
+        return (None, None) if iter_count < 0 else (root, iter_count)
+
+    if f(a) * f(b) > 0:
+        return None, None  # No sign change, root might not exist
+
+    iter_count = 0
+    while (b - a) / 2 > tol and iter_count < max_iter:
+        c = (a + b) / 2
+        if f(c) == 0:
+            return c, iter_count
+        elif f(a) * f(c) < 0:
+            b = c
+        else:
+            a = c
+        iter_count += 1
+    return (a + b) / 2, iter_count
+
+
+@cached_result
+def false_position_method(f, a, b, tol=1e-6, max_iter=100):
+    """ False Position method for root finding. """
+    compiled = run_kernel("false_position", f, float(a), float(b), float(tol), int(max_iter))
+    if compiled is not None:
+        root, iter_count = compiled
+        return (None, None) if iter_count < 0 else (root, iter_count)
+
+    if f(a) * f(b) > 0:
+        return None, None  # No sign change
+
+    iter_count = 0
+    c_old = a
+    while iter_count < max_iter:
+        c = (a * f(b) - b * f(a)) / (f(b) - f(a))
+        if abs(c - c_old) < tol:
+            return c, iter_count
+        c_old = c
+        if f(c) == 0:
+            return c, iter_count
+        elif f(a) * f(c) < 0:
+            b = c
+        else:
+            a = c
+        iter_count += 1
+    return c, iter_count
+
+
+def _refine_brackets(g, a, b, tol=1e-12, max_iter=100):
+    """
+    Roots of a vectorized g inside the brackets [a, b] (arrays, with a sign change in each),
+    refined together by Newton steps with a difference derivative. A step leaving its
+    bracket is replaced by a bisection step, and every step shrinks the bracket.
+    """
+    a = np.array(a, dtype=float)
+    b = np.array(b, dtype=float)
+    fa = g(a)
+    x = (a + b) / 2
+    active = np.ones(len(x), dtype=bool)
+    with np.errstate(all="ignore"):
+        for _ in range(max_iter):
+            if not active.any():
+                break
+            i = np.flatnonzero(active)
+            h = 1e-7 * np.maximum(1.0, np.abs(x[i]))
+            values = g(np.concatenate([x[i], x[i] + h]))
+            fx, df = values[:len(i)], (values[len(i):] - values[:len(i)]) / h
+
+            # Shrink the brackets around the sign change
+            left = np.sign(fx) == np.sign(fa[i])
+            a[i] = np.where(left, x[i], a[i])
+            fa[i] = np.where(left, fx, fa[i])
+            b[i] = np.where(left, b[i], x[i])
+
+            step = x[i] - fx / df
+            inside = np.isfinite(step) & (step > a[i]) & (step < b[i])
+            x_new = np.where(inside, step, (a[i] + b[i]) / 2)
+            converged = (fx == 0) | (np.abs(x_new - x[i]) <= tol * (1 + np.abs(x[i])))
+            x[i] = np.where(fx == 0, x[i], x_new)
+            active[i[converged]] = False
+    return x
+
+
+def _correct(g, x, lower, upper, tol=1e-12, max_iter=20):
+    """
+    Newton corrector from predicted roots x (arrays), with a difference derivative.
+    A corrected root must stay within (lower, upper), so the iteration cannot jump to a
+    neighbouring branch. Returns the roots and a mask of successful corrections.
+    """
+    x0 = np.asarray(x, dtype=float)
+    x = x0
+    converged = np.zeros(len(x), dtype=bool)
+    with np.errstate(all="ignore"):
+        for _ in range(max_iter):
+            # Roots that have converged are iterated along with the others; their steps are ~0
+            h = 1e-7 * np.maximum(1.0, np.abs(x))
+            values = g(np.concatenate([x, x + h]))
+            fx = values[:len(x)]
+            step = np.where(fx == 0, 0.0, fx * h / (values[len(x):] - fx))
+            x = x - step
+            converged = ~(np.abs(step) > tol * (1 + np.abs(x)))
+            if converged.all():
+                break
+    ok = converged & (x > lower) & (x < upper)
+    return x, ok
+
+
+def _brackets(g, grid):
+    """ Brackets [a, b] of the sign changes of g on a grid. """
+    with np.errstate(all="ignore"):
+        y = g(grid)
+    i = np.flatnonzero(np.sign(y[:-1]) * np.sign(y[1:]) < 0)
+    exact = np.flatnonzero(y == 0)
+    return np.concatenate([grid[i], grid[exact]]), np.concatenate([grid[i + 1], grid[exact]])
+
+
+def _sign_change_counts(f, grid, p_values, max_elements=2 ** 20):
+    """
+    Number of sign changes of f(x, p) on the grid for every p, evaluated on (x, p) blocks
+    at once. Returns None when f does not broadcast over p.
+    """
+    counts = np.empty(len(p_values), dtype=int)
+    chunk = max(1, max_elements // len(grid))
+    try:
+        with np.errstate(all="ignore"):
+            for start in range(0, len(p_values), chunk):
+                p = p_values[start:start + chunk]
+                y = np.asarray(f(grid[:, np.newaxis], p[np.newaxis, :]), dtype=float)
+                if y.shape != (len(grid), len(p)):
+                    return None
+                s = np.sign(y)
+                counts[start:start + chunk] = (s[:-1] * s[1:] < 0).sum(axis=0) + (y == 0).sum(axis=0)
+    except Exception:
+        return None
+    return counts
+
+
+@cached_result
+def track_roots(f, start, end, p_values, tol=1e-12, n_scan=400):
+    """
+    Follow the roots of f(x, p) in [start, end] as the parameter p runs through p_values.
+    The roots at the first p are bracketed on a grid of n_scan points and refined. Each
+    later root is predicted from the previous ones of its branch by a secant step in p
+    and corrected by Newton's method, falling back to a local bracket search when the
+    correction fails. New roots are looked for on the grid only where the number of sign
+    changes of f on it changes (counted for all p in one vectorized evaluation) or a
+    branch ends, and only those are bracketed from scratch.
+
+    Returns (branches, events). branches has one row per root branch and one column
+    per p, NaN where the branch does not exist. events lists where branches start and
+    end, as dicts with the p index, p, type, the branches involved and the root x:
+      "appear": a new root (entering the interval or born in a pair)
+      "merge":  two branches meeting; both end, or the second if the root persists
+      "vanish": a root disappearing without a neighbour
+      "exit":   a root leaving [start, end]
+    """
+    p_values = np.asarray(p_values, dtype=float).ravel()
+    if start >= end:
+        raise ValueError("Start must be less than end.")
+    if len(p_values) == 0:
+        raise ValueError("At least one parameter value is required.")
+
+    grid = np.linspace(start, end, n_scan)
+    spacing = grid[1] - grid[0]
+    counts = _sign_change_counts(f, grid, p_values)
+    branches = np.full((4, len(p_values)), np.nan)
+    n_branches = 0
+    active = np.empty(0, dtype=int)
+    events = []
+
+    def event(index, kind, ids, x):
+        events.append({"index": index, "p": float(p_values[index]), "type": kind,
+                       "branches": [int(k) for k in ids], "x": float(x)})
+
+    for j, p in enumerate(p_values):
+        def g(x):
+            y = np.asarray(f(x, p), dtype=float)
+            return y if y.shape == np.shape(x) else np.broadcast_to(y, np.shape(x))
+
+        ended = False
+        if len(active):
+            # Secant predictor in p for branches with two previous roots, the last root otherwise
+            last = branches[active, j - 1]
+            predicted = last.copy()
+            if j >= 2 and p_values[j - 1] != p_values[j - 2]:
+                before = branches[active, j - 2]
+                has_two = np.isfinite(before)
+                predicted[has_two] += (last - before)[has_two] * (p - p_values[j - 1]) / (p_values[j - 1] - p_values[j - 2])
+
+            # A root cannot move past the midpoints to its neighbours without the branches crossing
+            width = end - start
+            neighbours = np.sort(last)
+            midpoints = np.concatenate([[start - width], (neighbours[:-1] + neighbours[1:]) / 2, [end + width]])
+            position = np.searchsorted(neighbours, last)
+            lower = np.minimum(midpoints[position], predicted - 2 * spacing)
+            upper = np.maximum(midpoints[position + 1], predicted + 2 * spacing)
+            roots, ok = _correct(g, predicted, lower, upper, tol)
+
+            # Usually every root is corrected, inside the interval and apart from the others
+            ordered = np.sort(roots)
+            distinct = np.all(np.diff(ordered) > 1e3 * tol * (1 + np.abs(ordered[:-1])) + 1e-9)
+            if ok.all() and ordered[0] >= start and ordered[-1] <= end and distinct:
+                branches[active, j] = roots
+            else:
+                for n in np.flatnonzero(~ok):
+                    # Search for a sign change near the prediction before giving up on the branch
+                    a, b = _brackets(g, np.linspace(lower[n], upper[n], 33))
+                    if len(a):
+                        nearest_bracket = np.argmin(np.abs((a + b) / 2 - predicted[n]))
+                        roots[n] = _refine_brackets(g, a[nearest_bracket:nearest_bracket + 1],
+                                                    b[nearest_bracket:nearest_bracket + 1], tol)[0]
+                        ok[n] = True
+
+                # Roots leaving the interval
+                outside = ok & ((roots < start) | (roots > end))
+                for n in np.flatnonzero(outside):
+                    event(j, "exit", [active[n]], last[n])
+
+                # Branches converging to the same root have merged; the first one carries on
+                order = np.argsort(last)
+                alive = (ok & ~outside)[order]
+                same = alive[:-1] & alive[1:] & (
+                    np.abs(np.diff(roots[order])) <= 1e3 * tol * (1 + np.abs(roots[order][:-1])) + 1e-9)
+                merged = np.zeros(len(active), dtype=bool)
+                for i in np.flatnonzero(same):
+                    event(j, "merge", [active[order[i]], active[order[i + 1]]], roots[order[i]])
+                    merged[order[i + 1]] = True
+
+                # Neighbouring branches lost at the same p met and vanished together
+                lost = (~ok & ~outside)[order]
+                i = 0
+                while i < len(order):
+                    if lost[i] and i + 1 < len(order) and lost[i + 1]:
+                        event(j, "merge", [active[order[i]], active[order[i + 1]]],
+                              (last[order[i]] + last[order[i + 1]]) / 2)
+                        i += 2
+                        continue
+                    if lost[i]:
+                        event(j, "vanish", [active[order[i]]], last[order[i]])
+                    i += 1
+
+                ok &= ~outside & ~merged
+                branches[active[ok], j] = roots[ok]
+                ended = not ok.all()
+                active = active[ok]
+
+        # New roots: sign changes on the grid away from every followed root
+        if j == 0 or ended or counts is None or counts[j] != counts[j - 1]:
+            a, b = _brackets(g, grid)
+            current = branches[active, j]
+            new = [n for n in range(len(a)) if not np.any((current >= a[n] - spacing) & (current <= b[n] + spacing))]
+            if new:
+                for x in np.sort(_refine_brackets(g, a[new], b[new], tol)):
+                    if n_branches == len(branches):
+                        branches = np.vstack([branches, np.full_like(branches, np.nan)])
+                    branches[n_branches, j] = x
+                    active = np.append(active, n_branches)
+                    if j > 0:
+                        event(j, "appear", [n_branches], x)
+                    n_branches += 1
+
+    return branches[:n_branches], events
+
+
+def _companion_roots(c):
+    """ Roots of a polynomial (leading coefficient 1 not required) as companion matrix eigenvalues. """
+    d = len(c) - 1
+    companion = np.zeros((d, d))
+    companion[0] = -c[1:] / c[0]
+    companion[1:, :-1] = np.eye(d - 1)
+    return np.linalg.eigvals(companion)
+
+
+def _aberth_roots(c, tol=1e-14, max_iter=500):
+    """ Roots of a polynomial by the Aberth-Ehrlich iteration, all improved together. """
+    d = len(c) - 1
+    dc = np.polyder(c)
+    # Start on a circle around the centroid of the roots, with a radius bounding them all
+    center = -c[1] / (d * c[0])
+    radius = 2 * np.max(np.abs(c[1:] / c[0]) ** (1.0 / np.arange(1, d + 1)))
+    z = center + radius * np.exp(1j * (2 * np.pi * np.arange(d) / d + 0.4))
+    with np.errstate(all="ignore"):
+        for _ in range(max_iter):
+            difference = z[:, np.newaxis] - z[np.newaxis, :]
+            np.fill_diagonal(difference, np.inf)
+            # Newton correction p/p' deflated by the other roots; exact roots get a zero correction
+            w = 1 / (np.polyval(dc, z) / np.polyval(c, z) - (1 / difference).sum(axis=1))
+            w[~np.isfinite(w)] = 0
+            z = z - w
+            if np.all(np.abs(w) <= tol * np.maximum(np.abs(z), 1e-300)):
+                break
+    return z
+
+
+# Root finders for polynomial coefficients (highest degree first)
+POLYNOMIAL_METHODS = {
+    "companion": _companion_roots,
+    "aberth": _aberth_roots,
+}
+
+
+@cached_result
+def polynomial_roots(coefficients, method="companion", polish=2):
+    """
+    All real and complex roots of a polynomial at once (coefficients highest degree first,
+    e.g. from polynomial_coefficients): as the eigenvalues of the companion matrix, O(d^3),
+    or by the Aberth iteration, O(d^2) per iteration. Zero roots are factored out exactly
+    and every root is then polished by up to `polish` Newton steps on the original
+    polynomial, each kept only if it reduces |p|. Returns the roots sorted by real part.
+    """
+    if method not in POLYNOMIAL_METHODS:
+        raise ValueError(f"Unknown polynomial method: {method}")
+    c = np.trim_zeros(np.asarray(coefficients, dtype=float), "f")
+    if len(c) == 0:
+        raise ValueError("The zero polynomial has no isolated roots.")
+    n_zero = len(c) - len(np.trim_zeros(c, "b"))
+    reduced = np.trim_zeros(c, "b")
+
+    roots = POLYNOMIAL_METHODS[method](reduced) if len(reduced) > 1 else np.empty(0, dtype=complex)
+    roots = np.asarray(roots, dtype=complex)
+    dc = np.polyder(c) if len(c) > 1 else np.zeros(1)
+    with np.errstate(all="ignore"):
+        for _ in range(polish):
+            value = np.polyval(c, roots)
+            candidate = roots - value / np.polyval(dc, roots)
+            better = np.isfinite(candidate) & (np.abs(np.polyval(c, candidate)) < np.abs(value))
+            roots = np.where(better, candidate, roots)
+
+    roots = np.concatenate([roots, np.zeros(n_zero, dtype=complex)])
+    return roots[np.argsort(roots.real, kind="stable")]
+
+
+def real_roots(roots, coefficients, factor=100):
+    """
+    Real parts of the roots that are real within rounding: those close to the real axis
+    at whose real part the polynomial is zero to within `factor` times its evaluation
+    error bound. This keeps multiple real roots, which the eigenvalues split into nearby
+    complex pairs.
+    """
+    roots = np.asarray(roots, dtype=complex)
+    c = np.asarray(coefficients, dtype=float)
+    x = roots.real
+    bound = factor * np.finfo(float).eps * np.polyval(np.abs(c), np.abs(x))
+    near_axis = np.abs(roots.imag) <= 1e-3 * np.maximum(1.0, np.abs(x))
+    return np.sort(x[(roots.imag == 0) | (near_axis & (np.abs(np.polyval(c, x)) <= bound))])
@@ -2,8 +2,22 @@ import sys
 import numpy as np
 import matplotlib.pyplot as plt
 from PyQt6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QLabel, QLineEdit, QPushButton, QMessageBox
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas, NavigationToolbar2QT as NavigationToolbar
+from Methods.expressions import ARRAY_FUNCTIONS, compile_expression, polynomial_coefficients
+from Methods.instrumentation import instrumented
+from Methods.parallel import parallel_function
+from Methods.plotting import PlotLayer
+from Methods.root_finding import (bisection_method, false_position_method, find_sign_change_interval, polynomial_roots,
+                                  real_roots, track_roots)
+
+def _iteration_count(result):
+    return result[1]
+
+
+@instrumented(handlers=["calculate_roots", "plot_function", "track_parameter_roots"],
+              solvers={"find_sign_change_interval": None, "bisection_method": _iteration_count,
+                       "false_position_method": _iteration_count, "track_roots": None,
+                       "polynomial_roots": None})
 class RootFindingMethodsWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -33,6 +47,12 @@ class RootFindingMethodsWindow(QMainWindow):
         self.end_input.setPlaceholderText("e.g., 3")
         layout.addWidget(self.end_input)
 
+        # Parameter values for continuation (the function may then use p)
+        layout.addWidget(QLabel("Parameter values p (optional, for tracking roots of f(x, p)):"))
+        self.parameter_input = QLineEdit()
+        self.parameter_input.setPlaceholderText("e.g., np.linspace(-1, 1, 1000) with f(x) = x**3 - x - p")
+        layout.addWidget(self.parameter_input)
+
         # Buttons
         self.calculate_button = QPushButton("Calculate Roots")
         self.calculate_button.clicked.connect(self.calculate_roots)
@@ -42,15 +62,21 @@ class RootFindingMethodsWindow(QMainWindow):
         self.plot_button.clicked.connect(self.plot_function)
         layout.addWidget(self.plot_button)
 
+        self.track_button = QPushButton("Track Roots over p")
+        self.track_button.clicked.connect(self.track_parameter_roots)
+        layout.addWidget(self.track_button)
+
         # Matplotlib figure and canvas
         self.figure, self.ax = plt.subplots()
         self.canvas = FigureCanvas(self.figure)
+        layout.addWidget(NavigationToolbar(self.canvas, self))
         layout.addWidget(self.canvas)
+        self.plot_layer = PlotLayer(self.ax, self.canvas)
 
-    def f(self, x):
-        """ Evaluate the user-defined function. """
+    def parse_function(self):
+        """ Compile the user-defined function once for every solver of a click. """
         try:
-            return eval(self.function_input.text(), {"x": x, "np": np})
+            return compile_expression(self.function_input.text())
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Invalid function: {e}")
             return None
@@ -67,51 +93,44 @@ class RootFindingMethodsWindow(QMainWindow):
             QMessageBox.critical(self, "Error", f"Invalid interval: {e}")
             return None, None
 
+    def parse_parameter_values(self):
+        """ Parse the parameter values and compile f(x, p). """
+        try:
+            p = np.asarray(compile_expression(self.parameter_input.text(), (), functions=ARRAY_FUNCTIONS)(),
+                           dtype=float).ravel()
+            if len(p) == 0:
+                raise ValueError("At least one parameter value is required.")
+            f = compile_expression(self.function_input.text(), ("x", "p"))
+            return f, p
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Invalid parameter input: {e}")
+            return None, None
+
     def find_sign_change_interval(self, f, start, end):
         """ Automatically finds a valid interval where a root exists in [start, end] """
-        x_values = np.linspace(start, end, 100)
-        for i in range(len(x_values) - 1):
-            if f(x_values[i]) * f(x_values[i + 1]) < 0:
-                return x_values[i], x_values[i + 1]  # Found sign change
-        return None, None  # No valid interval found
+        # Only the grid scans evaluate arrays large enough for the worker processes; the scalar
+        # solvers get f itself, which the JIT kernels can compile
+        return find_sign_change_interval(parallel_function(f), start, end)
 
     def bisection_method(self, f, a, b, tol=1e-6, max_iter=100):
         """ Bisection method for root finding. """
-        if f(a) * f(b) > 0:
-            return None, None  # No sign change, root might not exist
-
-        iter_count = 0
-        while (b - a) / 2 > tol and iter_count < max_iter:
-            c = (a + b) / 2
-            if f(c) == 0:
-                return c, iter_count
-            elif f(a) * f(c) < 0:
-                b = c
-            else:
-                a = c
-            iter_count += 1
-        return (a + b) / 2, iter_count
+        return bisection_method(f, a, b, tol, max_iter)
 
     def false_position_method(self, f, a, b, tol=1e-6, max_iter=100):
         """ False Position method for root finding. """
-        if f(a) * f(b) > 0:
-            return None, None  # No sign change
-
-        iter_count = 0
-        c_old = a
-        while iter_count < max_iter:
-            c = (a * f(b) - b * f(a)) / (f(b) - f(a))
-            if abs(c - c_old) < tol:
-                return c, iter_count
-            c_old = c
-            if f(c) == 0:
-                return c, iter_count
-            elif f(a) * f(c) < 0:
-                b = c
-            else:
-                a = c
-            iter_count += 1
-        return c, iter_count
+        return false_position_method(f, a, b, tol, max_iter)
+
+    def track_roots(self, f, start, end, p):
+        """ Follow the roots of f(x, p) over the parameter values. """
+        return track_roots(f, start, end, p)
+
+    def polynomial_roots(self):
+        """ All roots at once if the function is a polynomial, otherwise None. """
+        coefficients = polynomial_coefficients(self.function_input.text())
+        if coefficients is None or len(coefficients) < 2:
+            return None
+        roots = polynomial_roots(coefficients)
+        return roots, real_roots(roots, coefficients)
 
     def calculate_roots(self):
         """ Compute roots using both methods and show results. """
@@ -119,14 +138,29 @@ class RootFindingMethodsWindow(QMainWindow):
         if start is None or end is None:
             return
 
-        f = self.f
+        f = self.parse_function()
         if f is None:
             return
 
+        # Polynomials: every real and complex root from the coefficients
+        polynomial = self.polynomial_roots()
+        polynomial_message = ""
+        if polynomial is not None:
+            roots, real = polynomial
+            inside = real[(real >= start) & (real <= end)]
+            polynomial_message = (
+                f"Polynomial of degree {len(roots)}\n"
+                f"Real roots in the interval: {', '.join(f'{x:.6f}' for x in inside) or 'none'}\n"
+                f"All roots: {', '.join(f'{z.real:.6f}{z.imag:+.6f}i' if z.imag else f'{z.real:.6f}' for z in roots)}"
+            )
+
         # Find valid interval for a root
         valid_start, valid_end = self.find_sign_change_interval(f, start, end)
         if valid_start is None or valid_end is None:
-            QMessageBox.warning(self, "Warning", "No root found in the given interval.")
+            if polynomial_message:
+                QMessageBox.information(self, "Root Finding Results", polynomial_message)
+            else:
+                QMessageBox.warning(self, "Warning", "No root found in the given interval.")
             return
 
         root_bisection, iter_bisection = self.bisection_method(f, valid_start, valid_end)
@@ -140,6 +174,8 @@ class RootFindingMethodsWindow(QMainWindow):
             f"Root (False Position Method): {root_false_position:.6f} (Iterations: {iter_false_position})\n"
             f"Absolute Error: {abs_error:.6f}"
         )
+        if polynomial_message:
+            message += "\n\n" + polynomial_message
         QMessageBox.information(self, "Root Finding Results", message)
 
     def plot_function(self):
@@ -148,20 +184,18 @@ class RootFindingMethodsWindow(QMainWindow):
         if start is None or end is None:
             return
 
-        f = self.f
+        f = self.parse_function()
         if f is None:
             return
 
         x = np.linspace(start, end, 400)
-        y = f(x)
+        y = parallel_function(f)(x)
 
-        # Clear previous plot
-        self.ax.clear()
+        self.plot_layer.begin()
 
         # Plot the function
-        self.ax.plot(x, y, label=f"f(x) = {self.function_input.text()}")
-        self.ax.axhline(0, color='black', linewidth=0.5)
-        self.ax.axvline(0, color='black', linewidth=0.5)
+        self.plot_layer.line("function", x, y, label=f"f(x) = {self.function_input.text()}")
+        self.plot_layer.reference_axes()
 
         # Compute a valid root interval
         valid_start, valid_end = self.find_sign_change_interval(f, start, end)
@@ -171,18 +205,55 @@ class RootFindingMethodsWindow(QMainWindow):
 
             # Plot roots
             if root_bisection is not None:
-                self.ax.plot(root_bisection, f(root_bisection), 'ro', label="Bisection Root")
+                self.plot_layer.points("bisection", root_bisection, f(root_bisection), color="red", label="Bisection Root")
             if root_false_position is not None:
-                self.ax.plot(root_false_position, f(root_false_position), 'go', label="False Position Root")
-
-        self.ax.set_xlabel("x")
-        self.ax.set_ylabel("f(x)")
-        self.ax.set_title("Graph of f(x)")
-        self.ax.legend()
-        self.ax.grid(True)
+                self.plot_layer.points("false_position", root_false_position, f(root_false_position), color="green",
+                                       label="False Position Root")
+
+        # Every real root of a polynomial in the interval
+        polynomial = self.polynomial_roots()
+        if polynomial is not None:
+            real = polynomial[1]
+            inside = real[(real >= start) & (real <= end)]
+            if len(inside):
+                self.plot_layer.points("polynomial", inside, np.zeros(len(inside)), color="purple", marker="x",
+                                       label="Polynomial Roots")
 
         # Redraw the canvas
-        self.canvas.draw()
+        self.plot_layer.finish(title="Graph of f(x)", xlabel="x", ylabel="f(x)")
+
+    def track_parameter_roots(self):
+        """ Track the roots of f(x, p) over p, plot the branches and summarize the events. """
+        start, end = self.parse_inputs()
+        if start is None or end is None:
+            return
+
+        f, p = self.parse_parameter_values()
+        if f is None:
+            return
+
+        try:
+            branches, events = self.track_roots(f, start, end, p)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Root tracking failed: {e}")
+            return
+
+        self.plot_layer.begin()
+        for k, branch in enumerate(branches):
+            self.plot_layer.line(f"branch {k}", p, branch, label=f"Branch {k + 1}")
+        for kind, color in (("appear", "green"), ("merge", "red"), ("vanish", "black"), ("exit", "gray")):
+            found = [e for e in events if e["type"] == kind]
+            if found:
+                self.plot_layer.points(f"event {kind}", [e["p"] for e in found], [e["x"] for e in found],
+                                       color=color, label=kind.capitalize())
+        self.plot_layer.finish(title="Roots of f(x, p)", xlabel="p", ylabel="x", legend=len(branches) <= 10)
+
+        lines = [f"Branches: {len(branches)}", f"Roots at p = {p[0]:g}: {int(np.isfinite(branches[:, 0]).sum())}"]
+        lines += [f"p = {e['p']:.6g}: {e['type']} (x = {e['x']:.6f}, branches {', '.join(str(k + 1) for k in e['branches'])})"
+                  for e in events[:20]]
+        if len(events) > 20:
+            lines.append(f"... and {len(events) - 20} more events")
+        QMessageBox.information(self, "Root Tracking Results", "\n".join(lines))
 
 
 if __name__ == "__main__":
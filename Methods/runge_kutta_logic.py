@@ -1,11 +1,26 @@
 import sys
 import numpy as np
 import matplotlib.pyplot as plt
-from PyQt6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QLabel, QLineEdit, QPushButton, QMessageBox
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from PyQt6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QLabel, QLineEdit, QPushButton, QMessageBox, QComboBox
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas, NavigationToolbar2QT as NavigationToolbar
+from Methods.instrumentation import instrumented
+from Methods.plotting import PlotLayer
+from Methods.expressions import ARRAY_FUNCTIONS, compile_expression
+from Methods.ode_solvers import EMBEDDED_PAIRS, compile_system, integrate_ensemble, runge_kutta_2nd_order, solve_adaptive, solve_fixed_step
+from Methods.stiff_solvers import STIFF_METHODS, is_stiff, solve_stiff
 
 
+def _trajectory_steps(trajectory):
+    return trajectory.stats["accepted"] + trajectory.stats["rejected"]
+
+
+@instrumented(handlers=["compute_runge_kutta", "plot_solution", "compute_ensemble"],
+              solvers={"get_trajectory": _trajectory_steps, "integrate_ensemble": None})
 class RungeKuttaWindow(QMainWindow):
+    FIXED_STEP_METHOD = "Runge-Kutta 2nd Order (fixed h)"
+    AUTO_METHOD = "Auto (switch to TR-BDF2 when stiff)"
+    STIFF_SUFFIX = " (stiff, fixed h)"
+
     def __init__(self):
         super().__init__()
 
@@ -18,9 +33,9 @@ class RungeKuttaWindow(QMainWindow):
         layout = QVBoxLayout(central_widget)
 
         # Differential equation input
-        layout.addWidget(QLabel("Enter the function dy/dx = f(x, y):"))
+        layout.addWidget(QLabel("Enter the function dy/dx = f(x, y) (separate components of a system with ';'):"))
         self.function_input = QLineEdit()
-        self.function_input.setPlaceholderText("e.g., np.exp(x) - y")
+        self.function_input.setPlaceholderText("e.g., np.exp(x) - y   or   y[1]; -y[0]")
         layout.addWidget(self.function_input)
 
         # Initial condition input
@@ -29,9 +44,9 @@ class RungeKuttaWindow(QMainWindow):
         self.x0_input.setPlaceholderText("e.g., 0")
         layout.addWidget(self.x0_input)
 
-        layout.addWidget(QLabel("Enter initial y (y0):"))
+        layout.addWidget(QLabel("Enter initial y (y0, comma-separated for a system):"))
         self.y0_input = QLineEdit()
-        self.y0_input.setPlaceholderText("e.g., 0")
+        self.y0_input.setPlaceholderText("e.g., 0   or   0, 1")
         layout.addWidget(self.y0_input)
 
         # Step size and target x
@@ -45,6 +60,29 @@ class RungeKuttaWindow(QMainWindow):
         self.x_target_input.setPlaceholderText("e.g., 0.2")
         layout.addWidget(self.x_target_input)
 
+        # Solver selection: fixed-step RK2 or an adaptive embedded pair
+        layout.addWidget(QLabel("Solver (adaptive solvers use h as the initial step):"))
+        self.method_input = QComboBox()
+        self.method_input.addItems([self.FIXED_STEP_METHOD] + list(EMBEDDED_PAIRS)
+                                   + [name + self.STIFF_SUFFIX for name in STIFF_METHODS] + [self.AUTO_METHOD])
+        layout.addWidget(self.method_input)
+
+        layout.addWidget(QLabel("Relative tolerance (adaptive solvers):"))
+        self.tolerance_input = QLineEdit()
+        self.tolerance_input.setPlaceholderText("e.g., 1e-6")
+        layout.addWidget(self.tolerance_input)
+
+        layout.addWidget(QLabel("Also evaluate y at (optional, comma-separated x values):"))
+        self.x_eval_input = QLineEdit()
+        self.x_eval_input.setPlaceholderText("e.g., 0.05, 0.15")
+        layout.addWidget(self.x_eval_input)
+
+        # Ensemble of initial values, given as an array expression of shape (M,) or (M, N)
+        layout.addWidget(QLabel("Ensemble initial y values (optional, array expression):"))
+        self.ensemble_input = QLineEdit()
+        self.ensemble_input.setPlaceholderText("e.g., np.linspace(-1, 1, 1000)")
+        layout.addWidget(self.ensemble_input)
+
         # Buttons
         self.calculate_button = QPushButton("Compute y(x)")
         self.calculate_button.clicked.connect(self.compute_runge_kutta)
@@ -54,17 +92,29 @@ class RungeKuttaWindow(QMainWindow):
         self.plot_button.clicked.connect(self.plot_solution)
         layout.addWidget(self.plot_button)
 
+        self.ensemble_button = QPushButton("Run Ensemble")
+        self.ensemble_button.clicked.connect(self.compute_ensemble)
+        layout.addWidget(self.ensemble_button)
+
         # Matplotlib figure and canvas
         self.figure, self.ax = plt.subplots()
         self.canvas = FigureCanvas(self.figure)
+        layout.addWidget(NavigationToolbar(self.canvas, self))
         layout.addWidget(self.canvas)
+        self.plot_layer = PlotLayer(self.ax, self.canvas)
+
+        # Last computed trajectory and the inputs it was computed from
+        self.trajectory = None
+        self.trajectory_key = None
 
     def parse_inputs(self):
         """ Parse user inputs and return function, initial conditions, step size, and target x. """
         try:
             func_str = self.function_input.text()
             x0 = float(self.x0_input.text())
-            y0 = float(self.y0_input.text())
+            y0_values = list(map(float, self.y0_input.text().split(',')))
+            # A single value is a scalar ODE, several values are the state of a system
+            y0 = y0_values[0] if len(y0_values) == 1 else np.array(y0_values)
             h = float(self.h_input.text())
             x_target = float(self.x_target_input.text())
 
@@ -73,36 +123,157 @@ class RungeKuttaWindow(QMainWindow):
             if x_target <= x0:
                 raise ValueError("Target x must be greater than initial x.")
 
-            # Define function f(x, y)
-            def f(x, y):
-                return eval(func_str, {"x": x, "y": y, "np": np})
+            # Define function f(x, y), compiled once for all stages
+            f = compile_system(func_str)
+            f(x0, np.array(y0, dtype=float))  # Validate that the system matches the size of y0
 
             return f, x0, y0, h, x_target
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Invalid input: {e}")
             return None, None, None, None, None
 
+    def parse_tolerance(self):
+        """ Parse the relative tolerance for the adaptive solvers, defaulting to 1e-6. """
+        try:
+            tol_text = self.tolerance_input.text().strip()
+            rtol = float(tol_text) if tol_text else 1e-6
+            if rtol <= 0:
+                raise ValueError("Tolerance must be positive.")
+            return rtol
+        except ValueError as e:
+            QMessageBox.critical(self, "Error", f"Invalid tolerance: {e}")
+            return None
+
+    def get_trajectory(self, f, x0, y0, h, x_target):
+        """
+        Return the trajectory for the current inputs, integrating only when they changed.
+        Both the computed value and the plot are read from the same trajectory.
+        """
+        method = self.method_input.currentText()
+        rtol = None
+        if method in EMBEDDED_PAIRS:
+            rtol = self.parse_tolerance()
+            if rtol is None:
+                return None
+
+        key = (self.function_input.text(), x0, tuple(np.atleast_1d(y0)), h, x_target, method, rtol)
+        if key == self.trajectory_key:
+            return self.trajectory
+
+        try:
+            if method == self.AUTO_METHOD:
+                # Explicit RK2 is unstable for this h when h * spectral radius exceeds 2
+                stiff = is_stiff(f, x0, np.array(y0, dtype=float), h)
+                method = "TR-BDF2" + self.STIFF_SUFFIX if stiff else self.FIXED_STEP_METHOD
+
+            if method == self.FIXED_STEP_METHOD:
+                trajectory = solve_fixed_step(f, x0, y0, h, x_target)
+            elif method in EMBEDDED_PAIRS:
+                trajectory = solve_adaptive(f, x0, y0, x_target, method=method, rtol=rtol, atol=rtol * 1e-3, h0=h)
+            else:
+                trajectory = solve_stiff(f, x0, y0, h, x_target, method=method.removesuffix(self.STIFF_SUFFIX))
+        except RuntimeError as e:
+            QMessageBox.critical(self, "Error", f"Solver failed: {e}")
+            return None
+
+        self.trajectory, self.trajectory_key = trajectory, key
+        return trajectory
+
+    def integrate_ensemble(self, f, x0, y0, x_target, h, method):
+        """ Integrate all initial values of an ensemble together. """
+        return integrate_ensemble(f, x0, y0, x_target, h, method=method)
+
     def runge_kutta_2nd_order(self, f, x0, y0, h, x_target):
         """ Apply the Runge-Kutta 2nd Order method to solve dy/dx = f(x,y). """
-        x = x0
-        y = y0
-
-        while x < x_target:
-            k1 = f(x, y)
-            k2 = f(x + h, y + h * k1)
-            y += h * (k1 + k2) / 2
-            x += h
+        return runge_kutta_2nd_order(f, x0, y0, h, x_target)
 
-        return y
+    def format_state(self, y):
+        """ Format a scalar or vector state for display. """
+        y = np.asarray(y)
+        if y.ndim == 0:
+            return f"{y:.6f}"
+        return "[" + ", ".join(f"{value:.6f}" for value in y) + "]"
 
     def compute_runge_kutta(self):
-        """ Compute y(x) using Runge-Kutta 2nd order and display result. """
+        """ Compute y(x) using the selected Runge-Kutta solver and display result. """
         f, x0, y0, h, x_target = self.parse_inputs()
         if f is None:
             return
 
-        y_result = self.runge_kutta_2nd_order(f, x0, y0, h, x_target)
-        QMessageBox.information(self, "Computed Value", f"y({x_target}) = {y_result:.6f}")
+        trajectory = self.get_trajectory(f, x0, y0, h, x_target)
+        if trajectory is None:
+            return
+
+        lines = [f"y({x_target}) = {self.format_state(trajectory.y_final)}"]
+
+        # Interpolated values from the dense output, without integrating again
+        x_eval_text = self.x_eval_input.text().strip()
+        if x_eval_text:
+            try:
+                for x in map(float, x_eval_text.split(',')):
+                    lines.append(f"y({x}) = {self.format_state(trajectory(x))}")
+            except ValueError as e:
+                QMessageBox.critical(self, "Error", f"Invalid evaluation points: {e}")
+                return
+
+        stats = trajectory.stats
+        lines += [
+            f"Solver: {trajectory.method}",
+            f"Accepted steps: {stats['accepted']}",
+            f"Rejected steps: {stats['rejected']}",
+            f"Function evaluations: {stats['n_evals']}",
+        ]
+        if "n_jacobians" in stats:
+            lines += [
+                f"Jacobian evaluations: {stats['n_jacobians']}",
+                f"LU factorizations: {stats['n_factorizations']}",
+            ]
+        QMessageBox.information(self, "Computed Value", "\n".join(lines))
+
+    def compute_ensemble(self):
+        """ Integrate every initial value of the ensemble together and plot y(x_target) against y0. """
+        f, x0, _, h, x_target = self.parse_inputs()
+        if f is None:
+            return
+
+        try:
+            y0 = np.asarray(compile_expression(self.ensemble_input.text(), (), functions=ARRAY_FUNCTIONS)(), dtype=float)
+            if y0.ndim not in (1, 2):
+                raise ValueError("Ensemble must be an array of shape (M,) or (M, N).")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Invalid ensemble: {e}")
+            return
+
+        method = self.method_input.currentText()
+        if method != self.FIXED_STEP_METHOD and method not in EMBEDDED_PAIRS:
+            QMessageBox.critical(self, "Error", "Ensemble mode supports the explicit solvers only.")
+            return
+        # Adaptive pairs run with fixed steps h so all members advance together
+        method = "rk2" if method == self.FIXED_STEP_METHOD else method
+        try:
+            y_final = self.integrate_ensemble(f, x0, y0, x_target, h, method)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Ensemble integration failed: {e}")
+            return
+
+        message = (
+            f"Members: {len(y0)}\n"
+            f"Mean y({x_target}) = {self.format_state(np.mean(y_final, axis=0))}\n"
+            f"Std y({x_target}) = {self.format_state(np.std(y_final, axis=0))}\n"
+            f"Min y({x_target}) = {self.format_state(np.min(y_final, axis=0))}\n"
+            f"Max y({x_target}) = {self.format_state(np.max(y_final, axis=0))}"
+        )
+
+        self.plot_layer.begin()
+
+        # Plot the final value of each member against its initial value (first component)
+        y0_first = y0 if y0.ndim == 1 else y0[:, 0]
+        y_first = y_final if y_final.ndim == 1 else y_final[:, 0]
+        self.plot_layer.points("ensemble", y0_first, y_first, marker=".", color="b", markersize=2,
+                               label="Ensemble members")
+        self.plot_layer.finish(title="Ensemble Final Values", xlabel="y0", ylabel=f"y({x_target})")
+
+        QMessageBox.information(self, "Ensemble Results", message)
 
     def plot_solution(self):
         """ Solve and plot y(x) over the given range. """
@@ -110,30 +281,24 @@ class RungeKuttaWindow(QMainWindow):
         if f is None:
             return
 
-        x_values = np.arange(x0, x_target + h, h)
-        y_values = []
-
-        x = x0
-        y = y0
-        for x in x_values:
-            y_values.append(y)
-            k1 = f(x, y)
-            k2 = f(x + h, y + h * k1)
-            y += h * (k1 + k2) / 2
+        trajectory = self.get_trajectory(f, x0, y0, h, x_target)
+        if trajectory is None:
+            return
+        x_values, y_values = trajectory.x, trajectory.y
+        method = trajectory.method
 
-        # Clear previous plot
-        self.ax.clear()
+        self.plot_layer.begin()
 
-        # Plot the numerical solution
-        self.ax.plot(x_values, y_values, marker="o", linestyle="-", color="b", label="Runge-Kutta 2nd Order")
-        self.ax.set_xlabel("x")
-        self.ax.set_ylabel("y(x)")
-        self.ax.set_title("Runge-Kutta 2nd Order Solution")
-        self.ax.legend()
-        self.ax.grid()
+        # Plot the numerical solution, one curve per component of a system
+        # (markers are only drawn while the steps are few enough to tell apart)
+        if y_values.ndim == 1:
+            self.plot_layer.line("y", x_values, y_values, marker="o", color="b", label=method)
+        else:
+            for i in range(y_values.shape[1]):
+                self.plot_layer.line(f"y[{i}]", x_values, y_values[:, i], marker="o", color=f"C{i}", label=f"y[{i}]")
 
         # Redraw the canvas
-        self.canvas.draw()
+        self.plot_layer.finish(title="Runge-Kutta 2nd Order Solution", xlabel="x", ylabel="y(x)")
 
 
 if __name__ == "__main__":
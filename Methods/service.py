@@ -0,0 +1,258 @@
+"""
+Local JSON-over-HTTP service for the numerical methods (standard library only, no PyQt).
+
+Start it:
+    python -m Methods.service --port 8765 --workers 4
+
+Every method of the command-line runner is an endpoint; the request body is one job,
+or a list of jobs, in the same format as a line of a job file:
+    curl -d '{"function": "x**3 - 2*x - 5", "start": 0, "end": 3}' localhost:8765/solve/bisection
+
+GET /methods lists the endpoints and GET /health reports the service and cache state.
+Jobs run on a process pool so the event loop stays responsive; each worker keeps its
+compiled expressions and matrix factorizations in LRU caches between requests.
+
+Each job has a time limit (--timeout, or COMPMATH_JOB_TIMEOUT seconds; default 60). A
+single job that exceeds it gets 504 Gateway Timeout, and a job in a list gets an error
+record. Its worker cannot be interrupted, so the pool is replaced and the old one is
+terminated once its other jobs have finished or timed out.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+
+from Methods import cli
+from Methods.result_cache import RESULT_CACHE
+
+MAX_BODY_BYTES = 64 * 1024 * 1024
+MAX_HEADER_LINES = 100
+DEFAULT_TIMEOUT_S = 60.0
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def cache_info():
+    """ Hits, misses and size of the warm caches in this process. """
+    caches = {"expressions": cli._function, "systems": cli._system, "factorizations": cli._factorization}
+    return {name: cache.cache_info()._asdict() for name, cache in caches.items()}
+
+
+class ComputeService:
+    """ Routes HTTP requests to the method runners and dispatches the work to a pool. """
+
+    def __init__(self, workers=None, timeout=None):
+        self.workers = workers if workers is not None else os.cpu_count() or 1
+        self.timeout = timeout or float(os.environ.get("COMPMATH_JOB_TIMEOUT", DEFAULT_TIMEOUT_S))
+        # With no workers, jobs run in the event loop's default thread pool instead
+        self.pool = self._new_pool()
+        # Pools with a hung worker, waiting to be terminated
+        self.retired = set()
+        self._tasks = set()
+        self.started = time.time()
+        self.n_requests = 0
+        self.n_jobs = 0
+        self.n_timeouts = 0
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(max_workers=self.workers) if self.workers > 0 else None
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+        for pool in list(self.retired):
+            self._terminate(pool)
+
+    async def run_job(self, command, job):
+        """ Record of one job, or None if it did not finish within the time limit. """
+        pool = self.pool
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(loop.run_in_executor(pool, cli.run_job, command, job), self.timeout)
+        except asyncio.TimeoutError:
+            self.n_timeouts += 1
+            # A thread cannot be stopped; it keeps running until the job ends on its own
+            if pool is not None:
+                self._recycle(pool)
+            return None
+
+    def _recycle(self, pool):
+        """ Send new jobs to a fresh pool and terminate `pool`, which has a hung worker. """
+        if pool in self.retired:
+            return
+        if pool is self.pool:
+            self.pool = self._new_pool()
+        self.retired.add(pool)
+        task = asyncio.get_running_loop().create_task(self._retire(pool))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _retire(self, pool):
+        # Every other job on the pool was started before now, so it has ended or timed out by then
+        await asyncio.sleep(self.timeout)
+        self._terminate(pool)
+
+    def _terminate(self, pool):
+        # A running call cannot be cancelled, so the worker processes are stopped directly
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+        self.retired.discard(pool)
+
+    async def handle_request(self, method, path, body):
+        """ Return (status, JSON-serializable response) for one request. """
+        parts = [part for part in path.split("?")[0].split("/") if part]
+
+        if method == "GET" and parts == ["health"]:
+            return HTTPStatus.OK, {
+                "status": "ok",
+                "uptime_s": time.time() - self.started,
+                "workers": self.workers,
+                "requests": self.n_requests,
+                "jobs": self.n_jobs,
+                "timeout_s": self.timeout,
+                "timeouts": self.n_timeouts,
+                # Worker processes keep their own caches; these are the ones of the service process
+                "caches": cache_info(),
+                "result_cache": RESULT_CACHE.stats(),
+            }
+        if method == "GET" and parts == ["methods"]:
+            return HTTPStatus.OK, {command: list(methods) for command, methods in cli.COMMANDS.items()}
+
+        if not parts or parts[0] not in cli.COMMANDS or len(parts) > 2:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"Unknown endpoint: {path}")
+        if method != "POST":
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "Use POST with a JSON job as the body.")
+        command = parts[0]
+        method_name = parts[1] if len(parts) == 2 else None
+        if method_name is not None and method_name not in cli.COMMANDS[command]:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"Unknown {command} method: {method_name}")
+
+        try:
+            payload = json.loads(body or b"null")
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Invalid JSON: {e}")
+        batch = isinstance(payload, list)
+        jobs = payload if batch else [payload]
+        if not all(isinstance(job, dict) for job in jobs):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "The body must be a job object or a list of job objects.")
+        if method_name is not None:
+            # The method in the URL takes precedence over one named in the job
+            jobs = [{**job, "method": method_name} for job in jobs]
+
+        records = await asyncio.gather(*[self.run_job(command, job) for job in jobs])
+        self.n_jobs += len(records)
+
+        if batch:
+            return HTTPStatus.OK, [record if record is not None else self._timeout_record(job)
+                                   for record, job in zip(records, jobs)]
+        if records[0] is None:
+            raise HTTPError(HTTPStatus.GATEWAY_TIMEOUT, f"The job did not finish within {self.timeout:g} s.")
+        status = HTTPStatus.OK if records[0]["status"] == "ok" else HTTPStatus.UNPROCESSABLE_ENTITY
+        return status, records[0]
+
+    def _timeout_record(self, job):
+        return {"id": job.get("id"), "method": job.get("method"), "status": "error",
+                "error": f"TimeoutError: the job did not finish within {self.timeout:g} s.",
+                "elapsed_s": self.timeout}
+
+    async def handle_connection(self, reader, writer):
+        """ Serve requests on one connection until the client closes it (HTTP/1.1 keep-alive). """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                keep_alive = True
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                    headers = await self._read_headers(reader)
+                    keep_alive = (headers.get("connection", "").lower() != "close"
+                                  and (version == "HTTP/1.1" or headers.get("connection", "").lower() == "keep-alive"))
+                    length = int(headers.get("content-length", 0))
+                    if length > MAX_BODY_BYTES:
+                        keep_alive = False
+                        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body is too large.")
+                    body = await reader.readexactly(length) if length else b""
+
+                    self.n_requests += 1
+                    status, response = await self.handle_request(method, path, body)
+                except HTTPError as e:
+                    status, response = e.status, {"status": "error", "error": str(e)}
+                except ValueError:
+                    status, response = HTTPStatus.BAD_REQUEST, {"status": "error", "error": "Malformed request."}
+                    keep_alive = False
+
+                await self._write_response(writer, status, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_headers(reader):
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                return headers
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Too many headers.")
+
+    @staticmethod
+    async def _write_response(writer, status, response, keep_alive):
+        body = json.dumps(response, default=cli._to_json).encode()
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+
+async def serve(host="127.0.0.1", port=8765, workers=None, ready=None, timeout=None):
+    """ Run the service until cancelled. `ready` is called with the bound port once listening. """
+    service = ComputeService(workers, timeout)
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    try:
+        if ready is not None:
+            ready(server.sockets[0].getsockname()[1])
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the numerical methods over local HTTP.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to bind (default: localhost only).")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", "-j", type=int, default=None,
+                        help="Worker processes (default: one per CPU; 0 runs jobs in threads).")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help=f"Time limit of each job in seconds (default: {DEFAULT_TIMEOUT_S:g}).")
+    args = parser.parse_args(argv)
+
+    def ready(port):
+        print(f"Serving on http://{args.host}:{port}", file=sys.stderr)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, ready, args.timeout))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
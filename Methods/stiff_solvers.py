@@ -0,0 +1,202 @@
+import numpy as np
+from scipy.linalg import lu_factor, lu_solve
+from Methods.ode_solvers import Trajectory
+from Methods.result_cache import cached_result
+
+
+def flatten_system(f, y0):
+    """
+    Wrap f(x, y) so it works on a flat 1-D state, as the linear algebra needs.
+    A trailing batch axis is passed through, so f can evaluate several states at once.
+    Returns (flat f, flat y0, shape of the original state).
+    """
+    shape = np.shape(y0)
+
+    def f_flat(x, y):
+        batch = y.shape[1:]
+        return np.reshape(f(x, y.reshape(shape + batch)), (-1,) + batch)
+
+    return f_flat, np.array(y0, dtype=float).reshape(-1), shape
+
+
+def numerical_jacobian(f, x, y, fy=None):
+    """
+    Forward-difference Jacobian of a flat f(x, y) with respect to y.
+    All perturbed states are evaluated together in one vectorized call.
+    """
+    if fy is None:
+        fy = f(x, y)
+    steps = np.sqrt(np.finfo(float).eps) * np.maximum(1.0, np.abs(y))
+    # Column j of the batch is y with component j perturbed
+    batch = y[:, None] + np.diag(steps)
+    try:
+        f_batch = f(x, batch)
+        if f_batch.shape != batch.shape:
+            raise ValueError
+    except (ValueError, IndexError):
+        # The right-hand side does not broadcast over a batch axis: perturb one column at a time
+        f_batch = np.column_stack([f(x, batch[:, j]) for j in range(len(y))])
+    return (f_batch - fy[:, None]) / steps
+
+
+def spectral_radius(f, x, y):
+    """ Largest eigenvalue magnitude of the Jacobian of f(x, y) at a point. """
+    f_flat, y_flat, _ = flatten_system(f, y)
+    J = numerical_jacobian(f_flat, x, y_flat)
+    return np.max(np.abs(np.linalg.eigvals(J)))
+
+
+def is_stiff(f, x0, y0, h, stability_bound=2.0):
+    """
+    Detect stiffness at the initial point.
+    The problem is treated as stiff when h times the spectral radius of the Jacobian
+    is outside the stability interval of the explicit method (2 for RK2 on the
+    negative real axis), i.e. when the explicit method would need a smaller h to stay stable.
+    """
+    return h * spectral_radius(f, x0, y0) > stability_bound
+
+
+class _JacobianCache:
+    """ Jacobian and LU factorization of I - c*h*J, reused until h or the Jacobian changes. """
+
+    def __init__(self, f, jac, stats):
+        self.f = f
+        self.jac = jac
+        self.stats = stats
+        self.J = None
+        self.lu = None
+        self.lu_dh = None
+
+    def refresh(self, x, y, fy=None):
+        if self.jac is not None:
+            self.J = np.atleast_2d(np.asarray(self.jac(x, y), dtype=float))
+        else:
+            self.J = numerical_jacobian(self.f, x, y, fy)
+            self.stats["n_evals"] += len(y)
+        self.stats["n_jacobians"] += 1
+        self.lu = None
+
+    def factor(self, dh):
+        """ LU factorization of I - dh*J, recomputed only when dh changed. """
+        if self.lu is None or dh != self.lu_dh:
+            self.lu = lu_factor(np.eye(len(self.J)) - dh * self.J)
+            self.lu_dh = dh
+            self.stats["n_factorizations"] += 1
+        return self.lu
+
+
+def _newton(f, cache, x_new, z, base, dh, tol, max_iter):
+    """
+    Simplified Newton iteration for z = base + dh * f(x_new, z), using the cached
+    factorization of I - dh*J. Returns (z, converged).
+    """
+    lu = cache.factor(dh)
+    for _ in range(max_iter):
+        residual = z - base - dh * f(x_new, z)
+        cache.stats["n_evals"] += 1
+        cache.stats["n_newton"] += 1
+        delta = lu_solve(lu, -residual)
+        z = z + delta
+        if np.linalg.norm(delta) <= tol * (1 + np.linalg.norm(z)):
+            return z, True
+    return z, False
+
+
+def _implicit_stage(f, cache, x, y, fy, x_new, z, base, dh, tol, max_iter):
+    """ Solve an implicit stage, refreshing the Jacobian once if Newton does not converge. """
+    z_new, converged = _newton(f, cache, x_new, z, base, dh, tol, max_iter)
+    if not converged:
+        cache.refresh(x, y, fy)
+        z_new, converged = _newton(f, cache, x_new, z, base, dh, tol, max_iter)
+        if not converged:
+            raise RuntimeError(f"Newton iteration did not converge at x = {x_new}; try a smaller h.")
+    return z_new
+
+
+def _backward_euler_step(f, cache, x, y, fy, h, tol, max_iter):
+    # Explicit Euler predictor, then z = y + h * f(x + h, z)
+    return _implicit_stage(f, cache, x, y, fy, x + h, y + h * fy, y, h, tol, max_iter)
+
+
+# TR-BDF2 uses the same matrix I - d*h*J in both stages when gamma = 2 - sqrt(2)
+_TRBDF2_GAMMA = 2 - np.sqrt(2)
+_TRBDF2_D = _TRBDF2_GAMMA / 2
+
+
+def _trbdf2_step(f, cache, x, y, fy, h, tol, max_iter):
+    g, d = _TRBDF2_GAMMA, _TRBDF2_D
+    # Trapezoidal stage to x + gamma*h
+    base = y + d * h * fy
+    z = _implicit_stage(f, cache, x, y, fy, x + g * h, y + g * h * fy, base, d * h, tol, max_iter)
+    # BDF2 stage from y and z to x + h
+    base = (z - (1 - g) ** 2 * y) / (g * (2 - g))
+    return _implicit_stage(f, cache, x, y, fy, x + h, z + (1 - g) * h * fy, base, d * h, tol, max_iter)
+
+
+# ROS2: L-stable two-stage Rosenbrock method
+_ROS2_GAMMA = 1 + 1 / np.sqrt(2)
+
+
+def _rosenbrock_step(f, cache, x, y, fy, h, tol, max_iter):
+    """
+    One ROS2 step. Only I - gamma*h*J is factored (and reused); the explicit x
+    dependence enters through df/dx, which is cheap to refresh every step.
+    """
+    lu = cache.factor(_ROS2_GAMMA * h)
+    dx = np.sqrt(np.finfo(float).eps) * max(1.0, abs(x))
+    dfdx = (f(x + dx, y) - fy) / dx
+    k1 = lu_solve(lu, fy + _ROS2_GAMMA * h * dfdx)
+    k2 = lu_solve(lu, f(x + h, y + h * k1) - 2 * k1 - _ROS2_GAMMA * h * dfdx)
+    cache.stats["n_evals"] += 2
+    return y + h * (1.5 * k1 + 0.5 * k2)
+
+
+STIFF_METHODS = {
+    "Backward Euler": _backward_euler_step,
+    "TR-BDF2": _trbdf2_step,
+    "Rosenbrock ROS2": _rosenbrock_step,
+}
+
+
+@cached_result
+def solve_stiff(f, x0, y0, h, x_target, method="TR-BDF2", jac=None, tol=1e-10, max_newton=10,
+                jacobian_age=None):
+    """
+    Solve a stiff problem dy/dx = f(x,y) with an implicit or linearly implicit method.
+    The Jacobian (from `jac(x, y)` if given, otherwise finite differences) is computed once
+    and the factorization of I - c*h*J is reused across steps. The Jacobian is only
+    recomputed when the Newton iteration fails or every `jacobian_age` steps if set; the
+    factorization is also redone when the last step is shortened to land on x_target.
+    Returns a Trajectory; its stats count steps, evaluations, Jacobians and factorizations.
+    """
+    step = STIFF_METHODS[method]
+    f_flat, y, shape = flatten_system(f, y0)
+    stats = {"accepted": 0, "rejected": 0, "n_evals": 0, "n_jacobians": 0,
+             "n_factorizations": 0, "n_newton": 0}
+    cache = _JacobianCache(f_flat, None if jac is None else lambda x, y: jac(x, y.reshape(shape)), stats)
+
+    x = x0
+    fy = f_flat(x, y)
+    stats["n_evals"] += 1
+    cache.refresh(x, y, fy)
+
+    x_values, y_values, slopes = [x], [y], [fy]
+    while x_target - x > 1e-12 * max(1.0, abs(x_target)):
+        h_step = min(h, x_target - x)
+        if jacobian_age and stats["accepted"] and stats["accepted"] % jacobian_age == 0:
+            cache.refresh(x, y, fy)
+
+        y = step(f_flat, cache, x, y, fy, h_step, tol, max_newton)
+        x = x_target if h_step < h else x + h_step
+
+        # Slope at the new point serves both the next step and the dense output
+        fy = f_flat(x, y)
+        stats["n_evals"] += 1
+        stats["accepted"] += 1
+        x_values.append(x)
+        y_values.append(y)
+        slopes.append(fy)
+
+    y_values = np.array(y_values).reshape((-1,) + shape)
+    slopes = np.array(slopes).reshape((-1,) + shape)
+    return Trajectory(x_values, y_values, slopes, stats, method)
@@ -0,0 +1,115 @@
+"""
+Load test for the local compute service.
+
+Start a service on a free port and measure it with 32 concurrent keep-alive clients:
+    python -m benchmarks.load_test --spawn --concurrency 32 --requests 5000
+
+Or measure a service that is already running:
+    python -m benchmarks.load_test --port 8765 --endpoint /integrate/gauss_kronrod \\
+        --job '{"function": "np.exp(-x**2)", "a": 0, "b": 1}'
+"""
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+
+import numpy as np
+
+DEFAULT_ENDPOINT = "/solve/bisection"
+DEFAULT_JOB = {"function": "x**3 - 2*x - 5", "start": 0, "end": 3}
+
+
+async def _client(host, port, endpoint, body, counter, latencies, statuses):
+    """ One keep-alive connection sending requests until the shared counter runs out. """
+    reader, writer = await asyncio.open_connection(host, port)
+    request = (f"POST {endpoint} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+               f"Content-Length: {len(body)}\r\n\r\n").encode("latin-1") + body
+    try:
+        while counter[0] > 0:
+            counter[0] -= 1
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.strip().lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def load_test(host, port, endpoint=DEFAULT_ENDPOINT, job=None, concurrency=16, requests=2000):
+    """ Send `requests` requests over `concurrency` connections and return the measurements. """
+    body = json.dumps(DEFAULT_JOB if job is None else job).encode()
+    counter, latencies, statuses = [requests], [], {}
+    start = time.perf_counter()
+    await asyncio.gather(*[_client(host, port, endpoint, body, counter, latencies, statuses)
+                           for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "elapsed_s": elapsed,
+        "requests_per_s": len(latencies) / elapsed,
+        "latency_ms": {f"p{q}": float(np.percentile(latencies_ms, q)) for q in (50, 90, 99)},
+        "statuses": statuses,
+    }
+
+
+def _spawn_service(workers):
+    """ Run the service in a background thread and return the port it listens on. """
+    from Methods.service import serve
+
+    bound = []
+    ready = threading.Event()
+
+    def run():
+        asyncio.run(serve("127.0.0.1", 0, workers, lambda port: (bound.append(port), ready.set())))
+
+    threading.Thread(target=run, daemon=True).start()
+    if not ready.wait(30):
+        raise RuntimeError("The service did not start.")
+    return bound[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure requests/sec of the compute service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--spawn", action="store_true", help="Start a service on a free port for the test.")
+    parser.add_argument("--workers", "-j", type=int, default=None, help="Workers of the spawned service.")
+    parser.add_argument("--endpoint", default=DEFAULT_ENDPOINT)
+    parser.add_argument("--job", type=json.loads, default=None, help="JSON job sent with every request.")
+    parser.add_argument("--concurrency", "-c", type=int, default=16)
+    parser.add_argument("--requests", "-n", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=100, help="Requests sent before measuring.")
+    args = parser.parse_args(argv)
+
+    port = _spawn_service(args.workers) if args.spawn else args.port
+    if args.warmup:
+        asyncio.run(load_test(args.host, port, args.endpoint, args.job, args.concurrency, args.warmup))
+    result = asyncio.run(load_test(args.host, port, args.endpoint, args.job, args.concurrency, args.requests))
+
+    print(f"{result['requests']} requests in {result['elapsed_s']:.2f}s over {result['concurrency']} connections: "
+          f"{result['requests_per_s']:.0f} requests/s")
+    print("latency " + ", ".join(f"{name}={value:.2f}ms" for name, value in result["latency_ms"].items()))
+    print(f"status codes: {result['statuses']}")
+    return 0 if set(result["statuses"]) == {200} else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
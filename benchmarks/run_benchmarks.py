@@ -0,0 +1,522 @@
+"""
+Headless benchmark harness for the numerical methods.
+
+Run all benchmarks and save the results:
+    python -m benchmarks.run_benchmarks --output results.json
+
+Compare two runs and flag regressions (exit code 1 if any are found):
+    python -m benchmarks.run_benchmarks --compare baseline.json results.json
+"""
+import argparse
+import contextlib
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+from Methods.batch_quadrature import batch_integrate
+from Methods.cubature import sparse_grid_romberg, tensor_romberg
+from Methods.curve_fitting import exponential_basis, fit_linear_model, quadratic_fit
+from Methods.expressions import compile_expression
+from Methods.interpolation import lagrange_interpolation
+from Methods import jit
+from Methods.linear_solvers import (batch_matrix_inversion, gaussian_elimination_with_partial_pivoting,
+                                    iterative_matrix_inversion, lu_factorization, mixed_precision_solve,
+                                    solve_with_factorization)
+from Methods.ode_solvers import compile_system, integrate_ensemble, runge_kutta_2nd_order, solve_adaptive
+from Methods.parallel import PARALLEL, parallel_function
+from Methods.quadrature import CountingFunction, QUADRATURE_METHODS, romberg
+from Methods.result_cache import RESULT_CACHE
+from Methods.root_finding import (bisection_method, false_position_method, find_approximate_root,
+                                  find_sign_change_interval, polynomial_roots)
+from Methods.stiff_solvers import solve_stiff
+
+# name -> (sizes, setup); setup(size) returns a callable that runs the method once and
+# returns the number of function evaluations, or None when the method evaluates no function
+BENCHMARKS = {}
+# name -> benchmark of the same problem that this one is reported against (speedup, memory)
+REFERENCES = {}
+
+
+def benchmark(name, sizes, reference=None):
+    """ Register a benchmark setup function for the given problem sizes. """
+    def register(setup):
+        BENCHMARKS[name] = (sizes, setup)
+        if reference is not None:
+            REFERENCES[name] = reference
+        return setup
+    return register
+
+
+def _counted(func_str, variables=("x",)):
+    """ Compile an expression and wrap it in an evaluation counter. """
+    return CountingFunction(compile_expression(func_str, variables))
+
+
+class _CountingSystem:
+    """ Count right-hand side evaluations of an ODE system (one per call). """
+
+    def __init__(self, f):
+        self.f = f
+        self.n_evals = 0
+
+    def __call__(self, x, y):
+        self.n_evals += 1
+        return self.f(x, y)
+
+
+def _well_conditioned_matrix(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((n, n)) + n * np.eye(n)
+
+
+@benchmark("gaussian_elimination", sizes=[10, 50, 100, 200])
+def _gaussian_elimination(n):
+    A = _well_conditioned_matrix(n)
+    b = np.ones(n)
+    def run():
+        gaussian_elimination_with_partial_pivoting(A, b)
+    return run
+
+
+@benchmark("lu_solve_float64", sizes=[200, 500, 1000])
+def _lu_solve_float64(n):
+    A = _well_conditioned_matrix(n)
+    b = np.ones(n)
+    def run():
+        solve_with_factorization(lu_factorization(A), b)
+    return run
+
+
+@benchmark("mixed_precision_solve", sizes=[200, 500, 1000], reference="lu_solve_float64")
+def _mixed_precision_solve(n):
+    A = _well_conditioned_matrix(n)
+    b = np.ones(n)
+    def run():
+        mixed_precision_solve(A, b)
+    return run
+
+
+@benchmark("iterative_inversion", sizes=[10, 50, 100, 200])
+def _iterative_inversion(n):
+    A = _well_conditioned_matrix(n)
+    def run():
+        iterative_matrix_inversion(A)
+    return run
+
+
+@benchmark("batch_inversion", sizes=[100, 10000, 100000])
+def _batch_inversion(k):
+    # Stack of k random 4x4 covariance matrices
+    rng = np.random.default_rng(0)
+    B = rng.standard_normal((k, 4, 4))
+    A = B @ np.swapaxes(B, 1, 2) + 0.1 * np.eye(4)
+    def run():
+        batch_matrix_inversion(A)
+    return run
+
+
+@benchmark("lagrange_interpolation", sizes=[5, 10, 20, 40])
+def _lagrange_interpolation(n):
+    x = np.linspace(0, 1, n)
+    y = np.sin(2 * np.pi * x)
+    x_plot = np.linspace(0, 1, 100)
+    def run():
+        for xi in x_plot:
+            lagrange_interpolation(x, y, xi)
+    return run
+
+
+@benchmark("lagrange_vectorized", sizes=[5, 10, 20, 40], reference="lagrange_interpolation")
+def _lagrange_vectorized(n):
+    x = np.linspace(0, 1, n)
+    y = np.sin(2 * np.pi * x)
+    x_plot = np.linspace(0, 1, 100)
+    def run():
+        lagrange_interpolation(x, y, x_plot)
+    return run
+
+
+@benchmark("quadratic_fit", sizes=[100, 10000, 1000000])
+def _quadratic_fit(n):
+    x = np.linspace(0, 1, n)
+    y = 3 * x ** 2 - x + 2
+    def run():
+        quadratic_fit(x, y)
+    return run
+
+
+def _curves(k, n=200, seed=0):
+    """ k noisy curves a*exp(-x) + b*exp(-3x) + c sampled at the same n points, one per column. """
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 1, n)
+    Y = (np.exp(-x)[:, None] * rng.standard_normal(k) + np.exp(-3 * x)[:, None] * rng.standard_normal(k)
+         + rng.standard_normal(k) + 0.01 * rng.standard_normal((n, k)))
+    return x, Y
+
+
+@benchmark("linear_model_per_curve", sizes=[10, 1000, 10000])
+def _linear_model_per_curve(k):
+    x, Y = _curves(k)
+    basis = exponential_basis([-1, -3])
+    def run():
+        for curve in Y.T:
+            fit_linear_model(x, curve, basis)
+    return run
+
+
+@benchmark("linear_model_batch", sizes=[10, 1000, 10000], reference="linear_model_per_curve")
+def _linear_model_batch(k):
+    x, Y = _curves(k)
+    basis = exponential_basis([-1, -3])
+    def run():
+        fit_linear_model(x, Y, basis)
+    return run
+
+
+@benchmark("graphical_root_scan", sizes=[400, 10000, 1000000])
+def _graphical_root_scan(n):
+    def run():
+        f = _counted("x**3 - 3*x + 1")
+        x = np.linspace(-2, 0, n)
+        find_approximate_root(x, f(x))
+        return f.n_evals
+    return run
+
+
+# An integrand dominated by special functions, evaluated on one large array
+_EXPENSIVE = "np.sin(x)**2 * np.exp(-x) + np.log1p(x*x) + np.arctan(x) * np.cosh(x / 10)"
+
+
+def _evaluation(parallel):
+    def setup(n):
+        f = compile_expression(_EXPENSIVE)
+        f = parallel_function(f) if parallel else f
+        x = np.linspace(0, 10, n)
+        def run():
+            f(x)
+            return n
+        return run
+    return setup
+
+
+# The parallel run uses COMPMATH_WORKERS processes (default one per CPU) from the threshold
+# (2**22 by default) up; the smallest size checks that arrays below it are not slowed down
+benchmark("serial_evaluation", sizes=[2**20, 2**22, 2**23])(_evaluation(parallel=False))
+benchmark("parallel_evaluation", sizes=[2**20, 2**22, 2**23], reference="serial_evaluation")(_evaluation(parallel=True))
+
+
+@benchmark("bisection", sizes=[1, 10, 100])
+def _bisection(n):
+    def run():
+        f = _counted("x**4 - 5*x**2 + 4")
+        for _ in range(n):
+            a, b = find_sign_change_interval(f, 0.1, 3)
+            bisection_method(f, a, b)
+        return f.n_evals
+    return run
+
+
+@benchmark("false_position", sizes=[1, 10, 100])
+def _false_position(n):
+    def run():
+        f = _counted("x**4 - 5*x**2 + 4")
+        for _ in range(n):
+            a, b = find_sign_change_interval(f, 0.1, 3)
+            false_position_method(f, a, b)
+        return f.n_evals
+    return run
+
+
+@contextlib.contextmanager
+def _jit_backend(enabled):
+    """ Run the solvers with the JIT backend switched on (when available) or off. """
+    previous = jit.JIT_ENABLED
+    jit.JIT_ENABLED = enabled and jit.JIT_AVAILABLE
+    try:
+        yield
+    finally:
+        jit.JIT_ENABLED = previous
+
+
+def _root_loop(method, compiled):
+    """ Root-finding runs with an uncounted expression, which the JIT backend compiles into the solver loop. """
+    def setup(n):
+        f = compile_expression("x**4 - 5*x**2 + 4")
+        def run():
+            with _jit_backend(compiled):
+                for _ in range(n):
+                    method(f, 1.5, 3.0)
+        return run
+    return setup
+
+
+# Same iterations with and without the JIT backend, so the speedup is the per-iteration speedup
+benchmark("bisection_interpreted", sizes=[1, 10, 100])(_root_loop(bisection_method, compiled=False))
+benchmark("bisection_jit", sizes=[1, 10, 100], reference="bisection_interpreted")(_root_loop(bisection_method, compiled=True))
+benchmark("false_position_interpreted", sizes=[1, 10, 100])(_root_loop(false_position_method, compiled=False))
+benchmark("false_position_jit", sizes=[1, 10, 100],
+          reference="false_position_interpreted")(_root_loop(false_position_method, compiled=True))
+
+
+@benchmark("romberg_integration", sizes=[4, 8, 12, 16])
+def _romberg_integration(levels):
+    h_values = [2.0 ** -k for k in range(levels)]
+    def run():
+        _, _, n_evals, _ = romberg(compile_expression("np.exp(-x**2)"), 0.0, 1.0, h_values)
+        return n_evals
+    return run
+
+
+def _adaptive_quadrature(method):
+    def setup(digits):
+        def run():
+            f = compile_expression("np.exp(-1000*(x - 0.3)**2) + 1/np.sqrt(x + 1e-3)")
+            _, _, n_evals = QUADRATURE_METHODS[method](f, 0.0, 1.0, tol=10.0 ** -digits)
+            return n_evals
+        return run
+    return setup
+
+
+benchmark("adaptive_simpson", sizes=[6, 8, 10])(_adaptive_quadrature("Adaptive Simpson"))
+benchmark("gauss_kronrod", sizes=[6, 8, 10])(_adaptive_quadrature("Gauss-Kronrod 7-15"))
+benchmark("tanh_sinh", sizes=[6, 8, 10])(_adaptive_quadrature("Tanh-Sinh"))
+
+
+# Smooth integrands over the unit square and cube
+_CUBATURE_INTEGRANDS = {
+    2: "np.exp(-(x*x + y*y)) * np.cos(x + y)",
+    3: "np.exp(-(x*x + y*y + z*z)) * np.cos(x + y + z)",
+}
+
+
+def _cubature(method):
+    def setup(dimensions):
+        f = compile_expression(_CUBATURE_INTEGRANDS[dimensions], ("x", "y", "z")[:dimensions])
+        def run():
+            return method(f, [0.0] * dimensions, [1.0] * dimensions, tol=1e-10)[2]
+        return run
+    return setup
+
+
+benchmark("tensor_romberg", sizes=[2, 3])(_cubature(tensor_romberg))
+benchmark("sparse_grid_romberg", sizes=[2, 3], reference="tensor_romberg")(_cubature(sparse_grid_romberg))
+
+
+@benchmark("batch_integration", sizes=[100, 10000, 100000])
+def _batch_integration(n):
+    b = np.linspace(1, 5, n)
+    k = np.linspace(0.5, 3, n)
+    def run():
+        f = _counted("np.exp(-k*x)", ("x", "k"))
+        batch_integrate(f, 0.0, b, params={"k": k}, chunk_size=10000)
+        return f.n_evals
+    return run
+
+
+@benchmark("polynomial_roots", sizes=[4, 20, 100])
+def _polynomial_roots(degree):
+    # Every root of a polynomial with known real roots, as in the root-finding window
+    coefficients = np.poly(np.linspace(-2, 2, degree))
+    def run():
+        polynomial_roots(coefficients)
+    return run
+
+
+@benchmark("runge_kutta_2nd_order", sizes=[100, 1000, 10000])
+def _runge_kutta_2nd_order(n_steps):
+    def run():
+        f = _CountingSystem(compile_system("np.exp(x) - y"))
+        runge_kutta_2nd_order(f, 0.0, 0.0, 1.0 / n_steps, 1.0)
+        return f.n_evals
+    return run
+
+
+def _runge_kutta_loop(compiled):
+    def setup(n_steps):
+        f = compile_system("np.exp(x) - y")
+        def run():
+            with _jit_backend(compiled):
+                runge_kutta_2nd_order(f, 0.0, 0.0, 1.0 / n_steps, 1.0)
+        return run
+    return setup
+
+
+benchmark("runge_kutta_2nd_order_interpreted", sizes=[100, 1000, 10000])(_runge_kutta_loop(compiled=False))
+benchmark("runge_kutta_2nd_order_jit", sizes=[100, 1000, 10000],
+          reference="runge_kutta_2nd_order_interpreted")(_runge_kutta_loop(compiled=True))
+
+
+@benchmark("runge_kutta_system", sizes=[2, 20, 200])
+def _runge_kutta_system(n):
+    y0 = np.ones(n)
+    def run():
+        # n coupled linear oscillators: y'' = -y written as a first order system
+        f = _CountingSystem(compile_system("np.concatenate([y[len(y)//2:], -y[:len(y)//2]])"))
+        runge_kutta_2nd_order(f, 0.0, y0, 0.001, 1.0)
+        return f.n_evals
+    return run
+
+
+@benchmark("dormand_prince", sizes=[4, 6, 8, 10])
+def _dormand_prince(digits):
+    def run():
+        f = _CountingSystem(compile_system("y[1]; -y[0]"))
+        solve_adaptive(f, 0.0, [0.0, 1.0], 10.0, rtol=10.0 ** -digits, atol=10.0 ** -(digits + 3))
+        return f.n_evals
+    return run
+
+
+@benchmark("rk2_ensemble", sizes=[100, 10000, 1000000])
+def _rk2_ensemble(n):
+    y0 = np.linspace(-1, 1, n)
+    def run():
+        f = _CountingSystem(compile_system("np.exp(x) - y"))
+        integrate_ensemble(f, 0.0, y0, 1.0, 0.01)
+        return f.n_evals * n
+    return run
+
+
+@benchmark("stiff_tr_bdf2", sizes=[100, 1000, 10000])
+def _stiff_tr_bdf2(n_steps):
+    def run():
+        f = _CountingSystem(compile_system("-1000*(y - np.cos(x))"))
+        solve_stiff(f, 0.0, 0.0, 2.0 / n_steps, 2.0)
+        return f.n_evals
+    return run
+
+
+def measure(setup, size, repeat):
+    """ Best wall time over `repeat` runs, evaluation count and peak traced memory. """
+    run = setup(size)
+    n_evals = run()  # Warm-up run, also gives the evaluation count
+
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    # Memory is traced in a separate run so tracing overhead does not affect the timings
+    gc.collect()
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"time_s": min(times), "n_evals": n_evals, "peak_memory_bytes": peak}
+
+
+def run_benchmarks(names=None, repeat=3, quick=False, log=print):
+    """ Run the selected benchmarks and return the results as a JSON-serializable dict. """
+    # Every run has to compute, not read the previous run's result from the cache
+    RESULT_CACHE.enabled = False
+    results = []
+    for name, (sizes, setup) in BENCHMARKS.items():
+        if names and not any(pattern in name for pattern in names):
+            continue
+        for size in sizes[:1] if quick else sizes:
+            record = {"benchmark": name, "size": size, **measure(setup, size, repeat)}
+            results.append(record)
+            log(f"{name:<24} size={size:<8} time={record['time_s']:.6f}s "
+                f"evals={record['n_evals']} peak={record['peak_memory_bytes'] / 1024:.1f} KiB")
+
+            reference = next((r for r in results if r["benchmark"] == REFERENCES.get(name) and r["size"] == size), None)
+            if reference is not None:
+                record["speedup"] = reference["time_s"] / record["time_s"]
+                record["memory_saving"] = 1 - record["peak_memory_bytes"] / reference["peak_memory_bytes"]
+                log(f"{'':<24} vs {reference['benchmark']}: speedup x{record['speedup']:.2f}, "
+                    f"memory saving {record['memory_saving']:.0%}")
+
+    return {
+        "metadata": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "jit": f"numba {jit.numba.__version__}" if jit.JIT_ENABLED else None,
+            "workers": PARALLEL.workers,
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare_runs(baseline, current, threshold=0.1, min_delta=5e-5, log=print):
+    """
+    Compare two benchmark runs and return the regressions.
+    A case regresses when its time or peak memory grows by more than `threshold`
+    (relative), or when it needs more function evaluations than before. Slowdowns
+    smaller than `min_delta` seconds are treated as timer noise.
+    """
+    old = {(r["benchmark"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+    log(f"{'benchmark':<24} {'size':>8} {'old time':>12} {'new time':>12} {'ratio':>7}")
+    for record in current["results"]:
+        key = (record["benchmark"], record["size"])
+        if key not in old:
+            continue
+        before = old[key]
+        ratio = record["time_s"] / before["time_s"] if before["time_s"] > 0 else float("inf")
+
+        problems = []
+        if ratio > 1 + threshold and record["time_s"] - before["time_s"] > min_delta:
+            problems.append(f"time x{ratio:.2f}")
+        if before["peak_memory_bytes"] and record["peak_memory_bytes"] > (1 + threshold) * before["peak_memory_bytes"]:
+            problems.append(f"memory x{record['peak_memory_bytes'] / before['peak_memory_bytes']:.2f}")
+        if before["n_evals"] is not None and record["n_evals"] is not None and record["n_evals"] > before["n_evals"]:
+            problems.append(f"evals {before['n_evals']} -> {record['n_evals']}")
+
+        flag = "  REGRESSION: " + ", ".join(problems) if problems else ""
+        log(f"{key[0]:<24} {key[1]:>8} {before['time_s']:>12.6f} {record['time_s']:>12.6f} {ratio:>7.2f}{flag}")
+        if problems:
+            regressions.append({"benchmark": key[0], "size": key[1], "problems": problems})
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the numerical methods.")
+    parser.add_argument("--output", "-o", help="Write results to this JSON file.")
+    parser.add_argument("--filter", "-k", nargs="*", help="Only run benchmarks whose name contains one of these.")
+    parser.add_argument("--repeat", "-r", type=int, default=3, help="Timed runs per case (best is kept).")
+    parser.add_argument("--quick", action="store_true", help="Only run the smallest size of each benchmark.")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="Compare two result files instead of running benchmarks.")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Relative slowdown or memory growth flagged as a regression.")
+    parser.add_argument("--min-delta", type=float, default=5e-5,
+                        help="Absolute slowdown in seconds below which timings are treated as noise.")
+    parser.add_argument("--list", action="store_true", help="List the available benchmarks.")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, (sizes, _) in BENCHMARKS.items():
+            print(f"{name}: sizes {sizes}")
+        return 0
+
+    if args.compare:
+        with open(args.compare[0]) as file:
+            baseline = json.load(file)
+        with open(args.compare[1]) as file:
+            current = json.load(file)
+        regressions = compare_runs(baseline, current, args.threshold, args.min_delta)
+        print(f"\n{len(regressions)} regression(s) found.")
+        return 1 if regressions else 0
+
+    results = run_benchmarks(args.filter, args.repeat, args.quick)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,6 +7,7 @@ from Methods.polynomial_curve_fitting_logic import PolynomialCurveFittingWindow
 from Methods.lagrange_interpolation_logic import LagrangeInterpolationWindow
 from Methods.romberg_integration_logic import RombergIntegrationWindow
 from Methods.runge_kutta_logic import RungeKuttaWindow
+from Methods.diagnostics_logic import DiagnosticsWindow
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -24,6 +25,7 @@ class MainWindow(QMainWindow):
         self.button6 = QPushButton("Lagrange’s Interpolation Formula")
         self.button7 = QPushButton("Romberg’s Integration")
         self.button8 = QPushButton("Runge-Kutta 2nd Order")
+        self.button9 = QPushButton("Diagnostics")
 
         self.button1.clicked.connect(self.open_graphical_method)
         self.button2.clicked.connect(self.open_root_finding)
@@ -33,6 +35,7 @@ class MainWindow(QMainWindow):
         self.button6.clicked.connect(self.open_lagrange_interpolation)
         self.button7.clicked.connect(self.open_romberg_integration)
         self.button8.clicked.connect(self.open_runge_kutta)
+        self.button9.clicked.connect(self.open_diagnostics)
 
         button_layout.addWidget(self.button1)
         button_layout.addWidget(self.button2)
@@ -42,6 +45,7 @@ class MainWindow(QMainWindow):
         button_layout.addWidget(self.button6)
         button_layout.addWidget(self.button7)
         button_layout.addWidget(self.button8)
+        button_layout.addWidget(self.button9)
 
         container = QWidget()
         container.setLayout(button_layout)
@@ -78,3 +82,8 @@ class MainWindow(QMainWindow):
     def open_runge_kutta(self):
         self.window = RungeKuttaWindow()
         self.window.show()
+
+    def open_diagnostics(self):
+        # Kept separately so the method window being diagnosed stays open
+        self.diagnostics_window = DiagnosticsWindow()
+        self.diagnostics_window.show()
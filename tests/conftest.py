@@ -0,0 +1,7 @@
+import os
+import sys
+import tempfile
+
+# The result cache picks its directory at import, so keep test results out of the user cache
+os.environ.setdefault("COMPMATH_CACHE_DIR", tempfile.mkdtemp(prefix="compmath-test-cache-"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
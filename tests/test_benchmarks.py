@@ -0,0 +1,40 @@
+from benchmarks import run_benchmarks as bench
+from Methods.result_cache import RESULT_CACHE
+
+
+def _run(*records):
+    return {"results": [dict(zip(("benchmark", "size", "time_s", "n_evals", "peak_memory_bytes"), r))
+                        for r in records]}
+
+
+def test_quick_run_of_selected_benchmarks(monkeypatch):
+    # run_benchmarks turns the shared cache off; put it back for the other tests
+    monkeypatch.setattr(RESULT_CACHE, "enabled", RESULT_CACHE.enabled)
+    run = bench.run_benchmarks(["romberg_integration", "quadratic_fit"], repeat=1, quick=True, log=lambda _: None)
+    assert sorted(r["benchmark"] for r in run["results"]) == ["quadratic_fit", "romberg_integration"]
+    for record in run["results"]:
+        assert record["time_s"] > 0 and record["peak_memory_bytes"] > 0
+
+
+def test_references_are_registered_benchmarks():
+    assert set(bench.REFERENCES) <= set(bench.BENCHMARKS)
+    assert set(bench.REFERENCES.values()) <= set(bench.BENCHMARKS)
+
+
+def test_compare_flags_slower_bigger_and_costlier_cases():
+    baseline = _run(("a", 10, 1.0, 5, 1000), ("b", 10, 1.0, 5, 1000), ("c", 10, 1.0, 5, 1000), ("d", 10, 1.0, 5, 1000))
+    current = _run(("a", 10, 1.05, 5, 1000), ("b", 10, 1.5, 5, 1000), ("c", 10, 1.0, 5, 2000), ("d", 10, 1.0, 6, 1000))
+    regressions = bench.compare_runs(baseline, current, log=lambda _: None)
+    assert [(r["benchmark"], r["problems"]) for r in regressions] == [
+        ("b", ["time x1.50"]), ("c", ["memory x2.00"]), ("d", ["evals 5 -> 6"])]
+
+
+def test_compare_ignores_timer_noise_and_new_cases():
+    baseline = _run(("a", 10, 1e-6, None, 0))
+    current = _run(("a", 10, 3e-6, None, 0), ("new", 10, 1.0, 1, 1))
+    assert bench.compare_runs(baseline, current, log=lambda _: None) == []
+
+
+def test_main_lists_the_benchmarks(capsys):
+    bench.main(["--list"])
+    assert "romberg_integration: sizes" in capsys.readouterr().out
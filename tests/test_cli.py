@@ -0,0 +1,50 @@
+import io
+import json
+
+import numpy as np
+import pytest
+
+from Methods import cli
+
+CONTINUATION = {"id": "fold", "method": "continuation", "function": "x**3 - x - p",
+                "start": -2, "end": 2, "p": list(np.linspace(-1, 1, 201))}
+
+
+def test_run_job_records_errors_instead_of_raising():
+    record = cli.run_job("solve", {"id": 1, "method": "bisection", "function": "x**2 + 1", "start": 0, "end": 1})
+    assert record["status"] == "error"
+    assert record["id"] == 1
+    record = cli.run_job("solve", {"id": 2, "method": "nonexistent"})
+    assert record["status"] == "error"
+
+
+def test_bisection_job():
+    record = cli.run_job("solve", {"method": "bisection", "function": "x**3 - 2*x - 5", "start": 0, "end": 3})
+    assert record["status"] == "ok"
+    assert record["result"]["root"] == pytest.approx(2.0945514815, abs=1e-6)
+
+
+def test_npz_output_loads_without_pickle(tmp_path):
+    records = cli.run_jobs("solve", [CONTINUATION])
+    path = tmp_path / "results.npz"
+    assert cli.write_npz(records, path) == 0
+
+    with np.load(path) as data:
+        index = [json.loads(line) for line in data["index"]]
+        branches = data["fold/branches"]
+        assert data["index"].dtype.kind == "U"
+    record = index[0]
+    assert record["status"] == "ok"
+    # The fold at p = +-2/(3*sqrt(3)) creates and removes two of the three roots
+    assert {event["type"] for event in record["events"]} >= {"appear", "merge"}
+    assert all(isinstance(event["p"], float) for event in record["events"])
+    assert branches.shape[1] == len(CONTINUATION["p"])
+
+
+def test_jsonl_output():
+    file = io.StringIO()
+    failures = cli.write_jsonl(cli.run_jobs("integrate", [{"function": "np.exp(x)", "a": 0, "b": 1}],
+                                            default_method="gauss_kronrod"), file)
+    assert failures == 0
+    record = json.loads(file.getvalue())
+    assert record["result"]["value"] == pytest.approx(np.e - 1, abs=1e-10)
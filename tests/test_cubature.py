@@ -0,0 +1,63 @@
+import math
+
+import numpy as np
+import pytest
+
+from Methods.cubature import CUBATURE_METHODS, HierarchicalGrid, romberg_weights, sparse_grid_romberg, tensor_romberg
+from Methods.expressions import compile_expression
+
+
+def test_romberg_weights_integrate_polynomials_exactly():
+    nodes = np.linspace(0, 1, 2**3 + 1)
+    weights = romberg_weights(3)
+    assert weights.sum() == pytest.approx(1.0)
+    # Three Richardson steps: exact up to degree 7
+    for degree in range(8):
+        assert weights @ nodes**degree == pytest.approx(1 / (degree + 1), abs=1e-14)
+
+
+@pytest.mark.parametrize("method", CUBATURE_METHODS.values(), ids=CUBATURE_METHODS.keys())
+def test_exp_over_the_unit_square(method):
+    f = compile_expression("np.exp(x + y)", ("x", "y"))
+    value, error, n_evals, estimates = method(f, [0, 0], [1, 1], tol=1e-10)
+    assert value == pytest.approx((math.e - 1) ** 2, abs=1e-9)
+    assert n_evals > 0 and len(estimates) > 1
+
+
+@pytest.mark.parametrize("method", CUBATURE_METHODS.values(), ids=CUBATURE_METHODS.keys())
+def test_three_dimensional_box(method):
+    f = compile_expression("np.cos(x) * y**2 * np.exp(z)", ("x", "y", "z"))
+    value, _, _, _ = method(f, [0, -1, 0], [np.pi / 2, 2, 1], tol=1e-9)
+    assert value == pytest.approx(1 * 3 * (math.e - 1), rel=1e-8)
+
+
+def test_reversed_limits_change_the_sign():
+    f = compile_expression("np.exp(x + y)", ("x", "y"))
+    value, _, _, _ = tensor_romberg(f, [1, 0], [0, 1])
+    assert value == pytest.approx(-(math.e - 1) ** 2, abs=1e-9)
+
+
+def test_sparse_grid_needs_fewer_points_in_three_dimensions():
+    f = compile_expression("np.exp(x + y + z)", ("x", "y", "z"))
+    tensor = tensor_romberg(f, [0] * 3, [1] * 3, tol=1e-8)
+    sparse = sparse_grid_romberg(f, [0] * 3, [1] * 3, tol=1e-8)
+    assert sparse[0] == pytest.approx((math.e - 1) ** 3, rel=1e-7)
+    assert sparse[2] < tensor[2]
+
+
+def test_every_grid_point_is_evaluated_once():
+    calls = []
+
+    def f(x, y):
+        calls.append(np.broadcast(x, y).size)
+        return x * y
+
+    grid = HierarchicalGrid(f, np.zeros(2), np.ones(2))
+    grid.integral((3, 3))
+    grid.integral((2, 3))
+    assert sum(calls) == grid.n_evals == 9 * 9
+
+
+def test_limits_must_match():
+    with pytest.raises(ValueError):
+        tensor_romberg(compile_expression("x*y", ("x", "y")), [0, 0], [1])
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from Methods.curve_fitting import (DesignFactorization, design_matrix, exponential_basis, fit_linear_model,
+                                   polynomial_basis, quadratic_fit)
+
+
+def test_polynomial_basis():
+    assert polynomial_basis(3) == ["x**3", "x**2", "x", "1"]
+    assert polynomial_basis(0) == ["1"]
+
+
+def test_quadratic_fit_recovers_exact_coefficients():
+    x = np.linspace(-3, 3, 25)
+    np.testing.assert_allclose(quadratic_fit(x, 2 * x**2 - x + 0.5), [2, -1, 0.5], atol=1e-12)
+
+
+def test_many_curves_in_one_solve():
+    x = np.linspace(0, 1, 50)
+    true = np.array([[1.0, -2.0, 0.0], [0.5, 3.0, 1.0], [-1.0, 0.0, 2.0]])
+    Y = design_matrix(polynomial_basis(2), x) @ true
+    model = fit_linear_model(x, Y, polynomial_basis(2))
+    assert model.n_curves == 3
+    np.testing.assert_allclose(model.coefficients, true, atol=1e-12)
+    np.testing.assert_allclose(model.stats["r_squared"], 1.0)
+    assert model.stats["rss"] == pytest.approx(np.zeros(3), abs=1e-20)
+    assert model(x).shape == (50, 3)
+
+
+def test_multi_curve_fit_matches_separate_fits():
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 2, 40)
+    Y = np.column_stack([np.exp(-x), np.sin(x)]) + 0.01 * rng.standard_normal((40, 2))
+    basis = exponential_basis([-1.0, -2.0])
+    together = fit_linear_model(x, Y, basis)
+    for j in range(2):
+        alone = fit_linear_model(x, Y[:, j], basis)
+        np.testing.assert_allclose(together.coefficients[:, j], alone.coefficients, rtol=1e-10)
+        assert together.stats["rmse"][j] == pytest.approx(alone.stats["rmse"])
+        np.testing.assert_allclose(together.stats["standard_errors"][:, j], alone.stats["standard_errors"])
+
+
+def test_rank_deficient_basis_falls_back_to_svd():
+    x = np.linspace(0, 1, 20)
+    # "x" and "2*x" are the same direction: the minimum-norm solution splits the slope between them
+    model = fit_linear_model(x, 3 * x + 1, ["x", "2*x", "1"])
+    assert model.method == "svd"
+    assert model.rank == 2
+    np.testing.assert_allclose(model.coefficients, [0.6, 1.2, 1.0], atol=1e-10)
+    np.testing.assert_allclose(model(x), 3 * x + 1, atol=1e-10)
+
+
+def test_qr_and_svd_agree_on_full_rank_problems():
+    x = np.linspace(-1, 1, 30)
+    A = design_matrix(polynomial_basis(4), x)
+    y = np.cos(2 * x)
+    qr = DesignFactorization(A.copy())
+    svd = DesignFactorization(A.copy(), method="svd")
+    assert qr.method == "qr" and qr.rank == svd.rank == 5
+    np.testing.assert_allclose(qr.solve(y), svd.solve(y), atol=1e-10)
+    np.testing.assert_allclose(qr.coefficient_variances(), svd.coefficient_variances(), rtol=1e-8)
+
+
+def test_equation_text():
+    x = np.arange(5.0)
+    model = fit_linear_model(x, x**2 + 0.5 * x - 2, polynomial_basis(2))
+    assert model.equation() == "y = 1.0000*x**2 + 0.5000*x + -2.0000"
+    assert model.equation(precision=1) == "y = 1.0*x**2 + 0.5*x + -2.0"
+
+
+def test_constant_curve_has_unit_r_squared():
+    model = fit_linear_model(np.arange(6.0), np.full(6, 4.0), polynomial_basis(1))
+    assert model.stats["r_squared"] == 1.0
+
+
+@pytest.mark.parametrize("x, y, basis", [
+    (np.arange(2.0), np.arange(2.0), polynomial_basis(2)),
+    (np.arange(4.0), np.arange(3.0), polynomial_basis(1)),
+    (np.arange(4.0), np.arange(4.0), []),
+    (np.arange(4.0), np.arange(4.0), ["1/x"]),
+])
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_invalid_inputs(x, y, basis):
+    with pytest.raises(ValueError):
+        fit_linear_model(x, y, basis)
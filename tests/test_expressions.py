@@ -0,0 +1,55 @@
+import math
+
+import numpy as np
+import pytest
+
+from Methods.expressions import MAX_INTEGER_BITS, compile_expression, polynomial_coefficients, power
+
+
+def test_compiled_expression_matches_numpy():
+    f = compile_expression("np.exp(-x) * np.sin(np.exp(-x)) + x**2")
+    x = np.linspace(0, 2, 11)
+    assert np.allclose(f(x), np.exp(-x) * np.sin(np.exp(-x)) + x**2)
+
+
+def test_math_names_and_constants():
+    f = compile_expression("sin(x) + math.cos(x) + pi")
+    assert f(0.0) == pytest.approx(1 + math.pi)
+
+
+@pytest.mark.parametrize("text", [
+    "__import__('os')", "x.__class__", "open('f')", "'abc'", "[i for i in x]", "lambda: 1", "k * x",
+])
+def test_rejected_expressions(text):
+    with pytest.raises(ValueError):
+        compile_expression(text)
+
+
+def test_constant_folding_keeps_runtime_errors():
+    f = compile_expression("x + 1/0")
+    with pytest.raises(ZeroDivisionError):
+        f(1.0)
+
+
+def test_nested_integer_powers_compile_and_evaluate_quickly():
+    # Exact powers of these sizes would take unbounded time and memory
+    assert compile_expression("(((9**64)**64)**64)**64")(1.0) == math.inf
+    assert compile_expression("2**2**64")(1.0) == math.inf
+    with np.errstate(over="ignore"):
+        assert compile_expression("(((x**64)**64)**64)**64")(9) == math.inf
+        assert compile_expression("x**x")(10**6) == math.inf
+
+
+def test_small_integer_powers_stay_exact():
+    assert compile_expression("x**3 + 2**10")(3) == 1051
+    assert compile_expression("3**100")(0) == 3**100
+    assert power(2, MAX_INTEGER_BITS // 2) == 2 ** (MAX_INTEGER_BITS // 2)
+    with np.errstate(over="ignore"):
+        assert power(2, 2 * MAX_INTEGER_BITS) == math.inf
+
+
+def test_polynomial_coefficients():
+    assert np.allclose(polynomial_coefficients("x**4 - 5*x**2 + 4"), [1, 0, -5, 0, 4])
+    assert np.allclose(polynomial_coefficients("(x - 1)*(x + 1)"), [1, 0, -1])
+    assert polynomial_coefficients("np.sin(x)") is None
+    assert polynomial_coefficients("x**0.5") is None
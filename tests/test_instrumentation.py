@@ -0,0 +1,45 @@
+import time
+
+import numpy as np
+import pytest
+
+from Methods.instrumentation import TRACER, Tracer, counted_function
+
+
+def test_nested_spans_use_exclusive_time():
+    tracer = Tracer()
+    run = tracer.begin_run("Window", "handler")
+
+    def evaluate():
+        time.sleep(0.02)
+
+    def solve():
+        tracer.span("f", "evaluate", evaluate)
+        time.sleep(0.01)
+
+    tracer.span("solver", "solve", solve)
+    tracer.end_run(run)
+    assert run["phases_ms"]["evaluate"] == pytest.approx(20, abs=10)
+    assert run["phases_ms"]["solve"] == pytest.approx(10, abs=10)
+    assert run["phases_ms"]["evaluate"] > run["phases_ms"]["solve"]
+    assert len(tracer.chrome_trace()["traceEvents"]) == 3
+
+
+def test_counted_function_counts_calls_and_points():
+    f = counted_function(np.sin)
+    assert counted_function(f) is f
+    run = TRACER.begin_run("Window", "handler")
+    try:
+        f(0.5)
+        f(np.zeros(10))
+    finally:
+        TRACER.end_run(run)
+    assert run["n_calls"] == 2
+    assert run["n_points"] == 11
+
+
+def test_counted_function_keeps_the_cache_key():
+    def g(x):
+        return x
+    g.cache_key = ("expression", "x", ("x",))
+    assert counted_function(g).cache_key == g.cache_key
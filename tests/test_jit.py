@@ -0,0 +1,101 @@
+import contextlib
+
+import numpy as np
+import pytest
+
+from Methods import jit
+from Methods.expressions import compile_expression
+from Methods.instrumentation import counted_function
+from Methods.interpolation import _lagrange_numpy, lagrange_interpolation
+from Methods.ode_solvers import compile_system, solve_fixed_step
+from Methods.parallel import parallel_function
+from Methods.root_finding import bisection_method, false_position_method
+
+X = np.array([1.0, 3.0, 5.0, 6.0])
+Y = X**3 - 2 * X
+
+
+@contextlib.contextmanager
+def _jit_backend(enabled):
+    previous, jit.JIT_ENABLED = jit.JIT_ENABLED, enabled
+    try:
+        yield
+    finally:
+        jit.JIT_ENABLED = previous
+
+
+def test_kernels_match_the_numpy_implementations():
+    # Run as plain Python, the kernels must give what the NumPy code paths give
+    f = compile_expression("x**3 - 2*x - 5")
+    with _jit_backend(False):
+        assert jit.KERNELS["bisection"](f, 0.0, 3.0, 1e-10, 100) == bisection_method(f, 0.0, 3.0, 1e-10, 100)
+        root, _ = jit.KERNELS["false_position"](f, 0.0, 3.0, 1e-10, 100)
+        assert root == pytest.approx(false_position_method(f, 0.0, 3.0, 1e-10, 100)[0], abs=1e-12)
+        points = np.linspace(0, 7, 15)
+        assert np.allclose(jit.KERNELS["lagrange"](X, Y, points), _lagrange_numpy(X, Y, points))
+        g = compile_system("-y")
+        y = jit.KERNELS["runge_kutta_2nd_order"](g, 0.0, 1.0, 0.01, 1.0)
+        assert y == pytest.approx(solve_fixed_step(g, 0.0, 1.0, 0.01, 1.0).y_final, rel=1e-12)
+
+
+def test_no_sign_change_is_reported_by_the_kernels():
+    f = compile_expression("x**2 + 1")
+    assert jit.KERNELS["bisection"](f, -1.0, 1.0, 1e-10, 100)[1] == -1
+    assert bisection_method(f, -1.0, 1.0) == (None, None)
+
+
+def test_lagrange_reproduces_a_cubic_at_arrays_and_scalars():
+    points = np.linspace(0, 7, 50).reshape(5, 10)
+    assert np.allclose(lagrange_interpolation(X, Y, points), points**3 - 2 * points)
+    assert lagrange_interpolation(X, Y, 4.0) == pytest.approx(56.0)
+
+
+def _window_function(text):
+    """ f as the root-finding window hands it to the solvers: counted, around the parallel wrapper. """
+    return counted_function(parallel_function(compile_expression(text)))
+
+
+def test_window_functions_reach_the_kernel(monkeypatch):
+    # The Python kernels stand in for the compiled ones, so this runs without Numba
+    calls = []
+
+    def kernel(name):
+        def run(g, *args):
+            calls.append(g)
+            return jit.KERNELS[name](g, *args)
+        return run
+
+    f = _window_function("x**4 - 5*x**2 + 4")
+    inner = compile_expression("x**4 - 5*x**2 + 4")
+    monkeypatch.setattr(jit, "_kernel", kernel)
+    monkeypatch.setitem(jit._FUNCTIONS, f.cache_key, inner)
+    with _jit_backend(True):
+        root, _ = jit.run_kernel("bisection", f, 0.5, 1.5, 1e-10, 100)
+    assert root == pytest.approx(1.0, abs=1e-9)
+    assert calls == [inner]
+
+
+def test_wrappers_of_other_functions_are_not_compiled():
+    f = compile_expression("x - 1")
+
+    def wrapper(x):
+        return f(x) + 1
+    wrapper.cache_key = f.cache_key
+    wrapper.__wrapped__ = lambda x: x
+    assert jit._jit_function(wrapper) is None
+    assert jit._jit_function(lambda x: x) is None
+
+
+@pytest.mark.skipif(not jit.JIT_AVAILABLE, reason="Numba is not installed")
+def test_compiled_kernels():
+    f = compile_expression("x**3 - 2*x - 5")
+    with _jit_backend(True):
+        root, iterations = jit.run_kernel("bisection", f, 0.0, 3.0, 1e-10, 100)
+        assert root == pytest.approx(2.0945514815423265, abs=1e-9)
+        # Integer powers are routed through the guarded power, which must compile too
+        g = compile_expression("(x**2)**3 - 1")
+        assert jit.run_kernel("bisection", g, 0.0, 3.0, 1e-10, 100)[0] == pytest.approx(1.0, abs=1e-9)
+        # Functions from the windows are wrapped for parallel evaluation and counting
+        assert jit._jit_function(_window_function("x**3 - 2*x - 5")) is jit._jit_function(f)
+        assert jit.run_kernel("bisection", _window_function("x**3 - 2*x - 5"), 0.0, 3.0, 1e-10, 100) == (root, iterations)
+
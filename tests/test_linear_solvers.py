@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from scipy.linalg import hilbert
+
+from Methods.linear_solvers import (batch_matrix_inversion, gaussian_elimination_with_partial_pivoting, lu_factorization,
+                                    mixed_precision_solve, solve_with_factorization)
+
+
+def _system(n, seed=0):
+    rng = np.random.default_rng(seed)
+    A = rng.standard_normal((n, n)) + n * np.eye(n)
+    x = rng.standard_normal(n)
+    return A, x, A @ x
+
+
+def test_gaussian_elimination():
+    A = np.array([[2.0, 1.0, -1.0], [-3.0, -1.0, 2.0], [-2.0, 1.0, 2.0]])
+    x, augmented = gaussian_elimination_with_partial_pivoting(A, np.array([8.0, -11.0, -3.0]))
+    assert np.allclose(x, [2, 3, -1])
+    assert np.allclose(np.tril(augmented[:, :3], -1), 0)
+
+
+@pytest.mark.parametrize("n, block_size", [(5, 64), (200, 16), (130, 64)])
+def test_blocked_lu_solves_many_right_hand_sides(n, block_size):
+    A, _, _ = _system(n)
+    factorization = lu_factorization(A, block_size=block_size)
+    for seed in range(3):
+        b = np.random.default_rng(seed).standard_normal(n)
+        x, _ = solve_with_factorization(factorization, b)
+        assert np.allclose(A @ x, b)
+
+
+def test_mixed_precision_reaches_double_precision():
+    A, x_true, b = _system(300)
+    x, iterations, precision = mixed_precision_solve(A, b)
+    assert precision == "float32"
+    assert iterations >= 1
+    assert np.linalg.norm(x - x_true, np.inf) <= 1e-12 * np.linalg.norm(x_true, np.inf)
+
+
+def test_ill_conditioned_matrix_falls_back_to_float64():
+    A = hilbert(9)
+    x_true = np.ones(9)
+    x, _, precision = mixed_precision_solve(A, A @ x_true)
+    assert precision == "float64"
+    assert np.allclose(A @ x, A @ x_true, atol=1e-12)
+
+
+def test_singular_matrix_raises():
+    A = np.array([[1.0, 2.0, 3.0], [2.0, 4.0, 6.0], [1.0, 0.0, 1.0]])
+    with pytest.raises(ValueError, match="singular"):
+        mixed_precision_solve(A, np.array([1.0, 2.0, 3.0]))
+    with pytest.raises(ValueError, match="singular"):
+        mixed_precision_solve(np.zeros((4, 4)), np.ones(4))
+
+
+def test_batch_inversion_of_a_stack():
+    rng = np.random.default_rng(1)
+    A = rng.standard_normal((50, 6, 6)) + 6 * np.eye(6)
+    X, residuals, failed, iterations = batch_matrix_inversion(A)
+    assert not failed.any()
+    assert np.all(residuals <= 1e-8)
+    assert np.allclose(X, np.linalg.inv(A), atol=1e-9)
+
+
+@pytest.mark.parametrize("order", [2, 3, 4])
+def test_higher_order_hyperpower_needs_fewer_iterations(order):
+    A = np.array([[4.0, 1.0], [2.0, 3.0]])
+    X, residual, failed, iterations = batch_matrix_inversion(A, order=order)
+    assert not failed
+    assert np.allclose(X, np.linalg.inv(A))
+    assert iterations <= batch_matrix_inversion(A, order=2)[3]
+
+
+def test_singular_matrices_in_a_stack_fail_alone():
+    A = np.stack([np.eye(3) * 2, np.ones((3, 3)), np.diag([1.0, 2.0, 4.0])])
+    X, residuals, failed, _ = batch_matrix_inversion(A)
+    assert failed.tolist() == [False, True, False]
+    assert np.allclose(X[0], np.eye(3) / 2)
+    assert np.allclose(X[2], np.diag([1.0, 0.5, 0.25]))
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from Methods.ode_solvers import (EMBEDDED_PAIRS, compile_system, integrate_ensemble, runge_kutta_2nd_order,
+                                 solve_adaptive, solve_fixed_step)
+
+
+def test_rk2_is_second_order():
+    f = compile_system("-y")
+    errors = [abs(runge_kutta_2nd_order(f, 0.0, 1.0, h, 1.0) - np.exp(-1)) for h in (0.1, 0.05, 0.025)]
+    assert errors[0] / errors[1] == pytest.approx(4, rel=0.1)
+    assert errors[1] / errors[2] == pytest.approx(4, rel=0.1)
+
+
+def test_rk2_matches_the_fixed_step_trajectory():
+    f = compile_system("y[1]; -y[0]")
+    y = runge_kutta_2nd_order(f, 0.0, [0.0, 1.0], 0.01, 1.0)
+    trajectory = solve_fixed_step(f, 0.0, [0.0, 1.0], 0.01, 1.0)
+    assert np.array_equal(y, trajectory.y_final)
+    assert trajectory.x[-1] == 1.0
+    assert np.allclose(y, [np.sin(1.0), np.cos(1.0)], atol=1e-4)
+
+
+@pytest.mark.parametrize("method", EMBEDDED_PAIRS)
+def test_adaptive_pairs_meet_the_tolerance(method):
+    trajectory = solve_adaptive(compile_system("-2*x*y"), 0.0, 1.0, 2.0, method=method, rtol=1e-8, atol=1e-10)
+    assert trajectory.y_final == pytest.approx(np.exp(-4.0), rel=1e-5)
+
+
+def test_dormand_prince_against_the_analytic_solution():
+    f = compile_system("y[1]; -y[0]")
+    trajectory = solve_adaptive(f, 0.0, [0.0, 1.0], 10.0, rtol=1e-10, atol=1e-12)
+    assert np.allclose(trajectory.y_final, [np.sin(10.0), np.cos(10.0)], atol=1e-8)
+    # Dense output between the steps
+    x = np.linspace(0.0, 10.0, 101)
+    assert np.allclose(trajectory(x)[:, 0], np.sin(x), atol=1e-6)
+    assert trajectory.stats["accepted"] < 500
+
+
+@pytest.mark.parametrize("method", ["rk2", "Dormand-Prince 5(4)"])
+def test_ensemble_matches_single_solutions(method):
+    y0 = np.array([1.0, 2.0, -0.5])
+    y = integrate_ensemble("-y", 0.0, y0, 1.0, 0.01, method=method)
+    assert np.allclose(y, y0 * np.exp(-1.0), rtol=1e-4)
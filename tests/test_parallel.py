@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from Methods import parallel
+from Methods.expressions import compile_expression, is_elementwise
+from Methods.parallel import ParallelEvaluator, ParallelFunction, parallel_function
+from Methods.root_finding import find_sign_change_interval
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("np.sin(x)**2 + np.exp(-x)", True),
+    ("np.where(x > 0, x, 0)", True),
+    ("x - np.mean(x)", False),
+    ("np.sum(x)", False),
+    ("x[0] + x", False),
+    ("x +", False),
+])
+def test_is_elementwise(text, expected):
+    assert is_elementwise(text) is expected
+
+
+def test_only_elementwise_expressions_of_x_are_wrapped():
+    assert isinstance(parallel_function(compile_expression("np.cos(x)")), ParallelFunction)
+    reduction = compile_expression("x - np.mean(x)")
+    assert parallel_function(reduction) is reduction
+    two_variables = compile_expression("x*y", ("x", "y"))
+    assert parallel_function(two_variables) is two_variables
+
+
+@pytest.fixture
+def evaluator(monkeypatch):
+    evaluator = ParallelEvaluator(workers=2, threshold=64, min_chunk=16)
+    monkeypatch.setattr(parallel, "PARALLEL", evaluator)
+    yield evaluator
+    evaluator.shutdown()
+
+
+def test_parallel_evaluation_matches_serial(evaluator):
+    f = compile_expression("np.sin(3*x) * np.exp(-x**2)")
+    x = np.linspace(-2, 2, 1001).reshape(7, 143)
+    assert evaluator.enabled_for(x.size)
+    y = parallel_function(f)(x)
+    assert y.shape == x.shape
+    np.testing.assert_allclose(y, f(x), rtol=0, atol=1e-15)
+
+
+def test_constant_expressions_are_broadcast(evaluator):
+    y = parallel_function(compile_expression("2.5"))(np.zeros(500))
+    np.testing.assert_array_equal(y, np.full(500, 2.5))
+
+
+def test_small_and_complex_arrays_stay_in_process(evaluator):
+    f = compile_expression("x**2")
+    pf = parallel_function(f)
+    assert not evaluator.enabled_for(10)
+    np.testing.assert_array_equal(pf(np.arange(10.0)), np.arange(10.0) ** 2)
+    z = np.linspace(0, 1, 200) * 1j
+    np.testing.assert_array_equal(pf(z), z**2)
+    assert evaluator._pool is None
+
+
+def test_single_worker_disables_splitting():
+    assert not ParallelEvaluator(workers=1, threshold=1, min_chunk=1).enabled_for(10**6)
+
+
+def test_sign_change_interval():
+    a, b = find_sign_change_interval(compile_expression("x**2 - 2"), 0, 3)
+    assert a < np.sqrt(2) < b
+    assert b - a == pytest.approx(3 / 99)
+    assert find_sign_change_interval(compile_expression("x**2 + 1"), -1, 1) == (None, None)
+
+
+def test_sign_change_interval_with_a_constant_function():
+    assert find_sign_change_interval(compile_expression("1.0"), 0, 1) == (None, None)
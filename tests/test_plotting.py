@@ -0,0 +1,75 @@
+import numpy as np
+
+from Methods.plotting import PlotLayer, minmax_decimate
+
+
+def test_short_curves_are_kept_whole():
+    x = np.linspace(0, 1, 40)
+    assert np.array_equal(minmax_decimate(x, np.sin(x), 10), np.arange(40))
+
+
+def test_decimation_keeps_the_extremes_of_every_bin():
+    x = np.linspace(0, 1, 100001)
+    y = np.sin(40 * x) + 0.01 * np.cos(7000 * x)
+    n_bins = 500
+    keep = minmax_decimate(x, y, n_bins)
+    assert len(keep) <= 4 * n_bins
+    assert np.all(np.diff(keep) > 0)
+    assert keep[0] == 0 and keep[-1] == len(x) - 1
+
+    bins = np.minimum((x * n_bins).astype(int), n_bins - 1)
+    for b in (0, 137, n_bins - 1):
+        in_bin = bins == b
+        kept = keep[bins[keep] == b]
+        assert y[kept].max() == y[in_bin].max()
+        assert y[kept].min() == y[in_bin].min()
+
+
+def test_non_finite_values_are_not_taken_as_extremes():
+    x = np.linspace(0, 1, 1000)
+    y = np.where(np.arange(1000) % 97 == 0, np.nan, x)
+    keep = minmax_decimate(x, y, 10)
+    assert len(keep) <= 40
+    assert np.nanmax(y[keep]) == np.nanmax(y)
+
+
+def _layer():
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure()
+    canvas = FigureCanvasAgg(figure)
+    return PlotLayer(figure.add_subplot(), canvas)
+
+
+def test_unlabelled_artists_are_left_out_of_the_legend():
+    layer = _layer()
+    x = np.linspace(0, 1, 50)
+    for label in ("first", None):
+        layer.begin()
+        layer.line("curve", x, x**2, label=label)
+        layer.points("root", 0.5, 0.25)
+        layer.finish()
+    assert layer.ax.get_legend().get_texts() == []
+    layer.begin()
+    layer.line("curve", x, x**2, label="again")
+    layer.finish()
+    assert [text.get_text() for text in layer.ax.get_legend().get_texts()] == ["again"]
+
+
+def test_replotting_keeps_the_artists_on_the_axes():
+    layer = _layer()
+    x = np.linspace(0, 1, 5000)
+    for y in (np.sin(x), np.cos(x)):
+        layer.begin()
+        layer.line("y", x, y, label="y")
+        layer.finish(title="Solution")
+        layer.begin()
+        layer.points("ensemble", x[::10], y[::10], marker=".", label="Members")
+        layer.finish(title="Ensemble")
+    assert layer.artists["y"] in layer.ax.lines
+    assert layer.artists["ensemble"] in layer.ax.lines
+    assert not layer.artists["y"].get_visible()
+    # Zooming still re-decimates the persistent curve
+    layer.ax.set_xlim(0, 0.5)
+    assert layer.artists["y"].get_xdata().max() <= 0.5 + 1e-3
@@ -0,0 +1,49 @@
+import math
+
+import numpy as np
+import pytest
+
+from Methods.batch_quadrature import batch_integrate
+from Methods.expressions import compile_expression
+from Methods.quadrature import QUADRATURE_METHODS, romberg
+
+EXP_INTEGRAL = math.e - 1
+
+
+@pytest.mark.parametrize("method", QUADRATURE_METHODS.values(), ids=QUADRATURE_METHODS.keys())
+def test_exp_over_unit_interval(method):
+    value, error, n_evals = method(np.exp, 0.0, 1.0, tol=1e-12)
+    assert value == pytest.approx(EXP_INTEGRAL, abs=1e-10)
+    assert error < 1e-8
+    assert n_evals > 0
+
+
+@pytest.mark.parametrize("method", QUADRATURE_METHODS.values(), ids=QUADRATURE_METHODS.keys())
+def test_reversed_limits_negate_the_integral(method):
+    value, error, _ = method(np.exp, 1.0, 0.0, tol=1e-12)
+    assert value == pytest.approx(-EXP_INTEGRAL, abs=1e-10)
+    assert error < 1e-8
+
+
+@pytest.mark.parametrize("method", QUADRATURE_METHODS.values(), ids=QUADRATURE_METHODS.keys())
+def test_empty_interval(method):
+    assert method(np.exp, 0.5, 0.5) == (0.0, 0.0, 0)
+
+
+def test_tanh_sinh_endpoint_singularity():
+    value, _, _ = QUADRATURE_METHODS["Tanh-Sinh"](lambda x: 1 / np.sqrt(x), 0.0, 1.0)
+    assert value == pytest.approx(2.0, abs=1e-8)
+
+
+def test_romberg_table():
+    value, error, n_evals, R = romberg(np.exp, 0.0, 1.0, [0.5, 0.25, 0.125, 0.0625])
+    assert R.shape == (4, 4)
+    assert value == pytest.approx(EXP_INTEGRAL, abs=1e-10)
+
+
+@pytest.mark.parametrize("method", ["romberg", "gauss-kronrod"])
+def test_batch_integrate_with_parameters(method):
+    f = compile_expression("np.exp(k*x)", ("x", "k"))
+    k = np.array([0.5, 1.0, 2.0])
+    values, _ = batch_integrate(f, 0.0, 1.0, params={"k": k}, method=method)
+    assert np.allclose(values, np.expm1(k) / k, atol=1e-8)
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from Methods import result_cache
+from Methods.curve_fitting import LinearModel, fit_linear_model, polynomial_basis
+from Methods.expressions import compile_expression
+from Methods.result_cache import ResultCache, Uncacheable, cached_result, result_key
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path), min_compute_s=0)
+    cache.enabled = True
+    monkeypatch.setattr(result_cache, "RESULT_CACHE", cache)
+    return cache
+
+
+def test_miss_then_hit(cache):
+    calls = []
+
+    @cached_result
+    def square_sum(x, scale=1.0):
+        calls.append(x)
+        return scale * np.sum(np.square(x))
+
+    x = np.arange(5.0)
+    assert square_sum(x) == 30.0
+    assert square_sum(x) == 30.0
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+    # A different argument after defaults are applied is a different entry
+    assert square_sum(x, scale=2.0) == 60.0
+    assert len(calls) == 2
+
+
+def test_compiled_expressions_are_keyed_by_their_text(cache):
+    @cached_result
+    def evaluate(f, x):
+        return f(x)
+
+    x = np.linspace(0, 1, 5)
+    evaluate(compile_expression("np.sin(x)"), x)
+    evaluate(compile_expression("np.sin(x)"), x)
+    assert cache.hits == 1
+    assert np.allclose(evaluate(compile_expression("np.cos(x)"), x), np.cos(x))
+    assert cache.hits == 1
+
+
+def test_plain_functions_are_not_cached():
+    with pytest.raises(Uncacheable):
+        result_key("method", {"f": lambda x: x})
+
+
+def test_array_dtype_is_part_of_the_key():
+    mask = np.array([True, False, True])
+    assert result_key("m", {"a": mask}) != result_key("m", {"a": mask.astype(float)})
+    assert result_key("m", {"a": np.arange(3)}) != result_key("m", {"a": np.arange(3.0)})
+    assert result_key("m", {"a": np.arange(3.0)}) == result_key("m", {"a": np.arange(3.0)})
+
+
+def test_key_depends_on_the_cache_version(monkeypatch):
+    key = result_key("m", {"a": 1})
+    monkeypatch.setattr(result_cache, "CACHE_VERSION", result_cache.CACHE_VERSION + 1)
+    assert result_key("m", {"a": 1}) != key
+
+
+def test_registered_result_types_round_trip(cache):
+    x = np.linspace(0, 1, 20)
+    model = fit_linear_model(x, 1 + 2 * x, polynomial_basis(1))
+    cache.put("key", model)
+    loaded = cache.get("key")
+    assert isinstance(loaded, LinearModel)
+    assert np.allclose(loaded.coefficients, [2, 1])
+    assert loaded.stats["r_squared"] == pytest.approx(1.0)
+
+
+def test_eviction_keeps_the_size_limit(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=200 * 1024, min_compute_s=0)
+    for i in range(10):
+        cache.put(f"{i:064x}", np.zeros(4096) + i)
+    assert cache._total_size() <= cache.max_bytes
+    assert cache.get(f"{9:064x}") is not None
+    assert cache.get(f"{0:064x}") is None
@@ -0,0 +1,37 @@
+import numpy as np
+
+from Methods.quadrature import romberg
+from Methods.romberg_table import export_romberg_csv, export_romberg_text, format_romberg_html, format_romberg_text
+
+H_VALUES = [0.5, 0.25, 0.125]
+
+
+def _table():
+    return romberg(np.exp, 0.0, 1.0, H_VALUES)[3]
+
+
+def test_text_table_is_lower_triangular_and_aligned():
+    lines = format_romberg_text(_table(), H_VALUES).splitlines()
+    assert lines[0].split() == ["h", "Order", "0", "Order", "1", "Order", "2"]
+    assert [len(line.split()) for line in lines[1:]] == [2, 3, 4]
+    assert lines[-1].split()[-1] == f"{np.e - 1:.6f}"
+
+
+def test_text_export(tmp_path):
+    path = tmp_path / "romberg.txt"
+    export_romberg_text(path, _table(), H_VALUES)
+    assert path.read_text() == format_romberg_text(_table(), H_VALUES, precision=10) + "\n"
+
+
+def test_csv_export_keeps_full_precision(tmp_path):
+    R = _table()
+    path = tmp_path / "romberg.csv"
+    export_romberg_csv(path, R, H_VALUES)
+    rows = [line.split(",") for line in path.read_text().splitlines()]
+    assert rows[0][0] == "h"
+    assert float(rows[-1][-1]) == R[-1, -1]
+    assert rows[1][2:] == ["", ""]
+
+
+def test_html_table_has_one_row_per_step():
+    assert format_romberg_html(_table(), H_VALUES).count("<tr>") == len(H_VALUES) + 1
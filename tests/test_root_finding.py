@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from Methods.expressions import compile_expression, polynomial_coefficients
+from Methods.root_finding import (POLYNOMIAL_METHODS, bisection_method, false_position_method,
+                                  find_sign_change_interval, polynomial_roots, real_roots, track_roots)
+
+FOLD = 2 / (3 * np.sqrt(3))
+
+
+def test_bracketing_methods():
+    f = compile_expression("x**3 - 2*x - 5")
+    a, b = find_sign_change_interval(f, 0.0, 3.0)
+    assert f(a) * f(b) <= 0
+    for method in (bisection_method, false_position_method):
+        root, iterations = method(f, a, b, 1e-10, 200)
+        assert root == pytest.approx(2.0945514815423265, abs=1e-8)
+
+
+def test_no_sign_change():
+    assert find_sign_change_interval(compile_expression("x**2 + 1"), -1.0, 1.0) == (None, None)
+
+
+def test_tracking_through_a_fold():
+    p = np.linspace(-1, 1, 201)
+    branches, events = track_roots(compile_expression("x**3 - x - p", ("x", "p")), -2.0, 2.0, p)
+    assert branches.shape == (3, len(p))
+    assert np.allclose(np.sort(branches[:, 100]), [-1, 0, 1], atol=1e-10)
+
+    # Every tracked value is a root
+    x = branches[np.isfinite(branches)]
+    p_grid = np.broadcast_to(p, branches.shape)[np.isfinite(branches)]
+    assert np.allclose(x**3 - x - p_grid, 0, atol=1e-10)
+
+    # A pair of roots is born at p = -2/(3 sqrt 3) and two branches merge at +2/(3 sqrt 3)
+    appear = [e for e in events if e["type"] == "appear"]
+    merge = [e for e in events if e["type"] == "merge"]
+    assert len(appear) == 2 and len(merge) == 1
+    assert all(abs(e["p"] + FOLD) <= 0.01 for e in appear)
+    assert abs(merge[0]["p"] - FOLD) <= 0.01
+    assert merge[0]["x"] == pytest.approx(-1 / np.sqrt(3), abs=0.01)
+
+
+def test_tracking_rejects_an_empty_interval():
+    with pytest.raises(ValueError):
+        track_roots(compile_expression("x - p", ("x", "p")), 1.0, 0.0, [0.5])
+
+
+@pytest.mark.parametrize("method", POLYNOMIAL_METHODS)
+def test_polynomial_roots_from_an_expression(method):
+    coefficients = polynomial_coefficients("x**4 - 5*x**2 + 4")
+    roots = polynomial_roots(coefficients, method)
+    assert np.allclose(roots, [-2, -1, 1, 2], atol=1e-12)
+    assert np.allclose(real_roots(roots, coefficients), [-2, -1, 1, 2], atol=1e-12)
+
+
+@pytest.mark.parametrize("method", POLYNOMIAL_METHODS)
+def test_complex_and_zero_roots(method):
+    # x**2 (x**2 + 1) (x - 3)
+    coefficients = np.polymul([1, 0, 0], np.polymul([1, 0, 1], [1, -3]))
+    roots = polynomial_roots(coefficients, method)
+    assert np.allclose(sorted(roots, key=lambda z: (round(z.real, 8), z.imag)), [-1j, 0, 0, 1j, 3], atol=1e-10)
+    assert np.allclose(real_roots(roots, coefficients), [0, 0, 3], atol=1e-10)
+
+
+def test_double_root_is_real():
+    coefficients = np.poly([1.0, 1.0, -2.0])
+    roots = polynomial_roots(coefficients)
+    assert np.allclose(real_roots(roots, coefficients), [-2, 1, 1], atol=1e-7)
+
+
+def test_aberth_agrees_with_the_companion_matrix():
+    expected = np.arange(1, 11) / 2
+    coefficients = np.poly(expected)
+    assert np.allclose(polynomial_roots(coefficients, "aberth"), expected, atol=1e-8)
+    assert np.allclose(polynomial_roots(coefficients, "aberth"), polynomial_roots(coefficients), atol=1e-8)
+
+
+def test_zero_polynomial():
+    with pytest.raises(ValueError):
+        polynomial_roots([0.0, 0.0])
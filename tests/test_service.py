@@ -0,0 +1,68 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+import pytest
+
+from Methods.service import ComputeService, HTTPError
+
+BISECTION = {"function": "x**3 - 2*x - 5", "start": 0, "end": 3}
+# About 10**7 Runge-Kutta steps: far longer than the time limit of the tests
+SLOW_ODE = {"function": "-y", "x0": 0, "y0": 1, "h": 1e-7, "x_target": 1}
+
+
+def _request(service, path, job):
+    return service.handle_request("POST", path, json.dumps(job).encode())
+
+
+def test_job_runs_on_the_pool():
+    async def run():
+        service = ComputeService(workers=1, timeout=30)
+        try:
+            return await _request(service, "/solve/bisection", BISECTION)
+        finally:
+            service.close()
+
+    status, record = asyncio.run(run())
+    assert status == HTTPStatus.OK
+    assert record["result"]["root"] == pytest.approx(2.0945514815, abs=1e-6)
+
+
+def test_unknown_endpoint():
+    async def run():
+        service = ComputeService(workers=0)
+        try:
+            await _request(service, "/solve/nonexistent", BISECTION)
+        finally:
+            service.close()
+
+    with pytest.raises(HTTPError) as error:
+        asyncio.run(run())
+    assert error.value.status == HTTPStatus.NOT_FOUND
+
+
+def test_hung_job_times_out_and_its_worker_is_replaced():
+    async def run():
+        # Two workers, so the fast job of the list does not queue behind the slow one
+        service = ComputeService(workers=2, timeout=1.0)
+        try:
+            hung_pool = service.pool
+            with pytest.raises(HTTPError) as error:
+                await _request(service, "/ode/rk2", SLOW_ODE)
+            assert error.value.status == HTTPStatus.GATEWAY_TIMEOUT
+            assert service.n_timeouts == 1
+            assert service.pool is not hung_pool and hung_pool in service.retired
+
+            # The fresh pool serves new jobs while the hung worker is still running
+            status, record = await _request(service, "/solve/bisection", BISECTION)
+            assert status == HTTPStatus.OK
+
+            status, records = await _request(service, "/ode/rk2", [SLOW_ODE, {**SLOW_ODE, "h": 0.1}])
+            assert status == HTTPStatus.OK
+            assert [r["status"] for r in records] == ["error", "ok"]
+            assert records[0]["error"].startswith("TimeoutError")
+        finally:
+            service.close()
+        assert not service.retired
+
+    asyncio.run(run())
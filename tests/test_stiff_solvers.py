@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from Methods.ode_solvers import compile_system
+from Methods.stiff_solvers import STIFF_METHODS, is_stiff, numerical_jacobian, solve_stiff
+
+# y' = -1000 (y - cos x), y(0) = 0: after a fast transient y follows cos x closely
+STIFF = "-1000*(y - np.cos(x))"
+
+
+def exact(x, lam=1000.0):
+    steady = (lam**2 * np.cos(x) + lam * np.sin(x)) / (lam**2 + 1)
+    return steady - lam**2 / (lam**2 + 1) * np.exp(-lam * x)
+
+
+def test_the_problem_is_stiff_for_explicit_rk2():
+    assert is_stiff(compile_system(STIFF), 0.0, np.array(0.0), 0.01)
+    assert not is_stiff(compile_system("-y"), 0.0, np.array(1.0), 0.01)
+
+
+@pytest.mark.parametrize("method", STIFF_METHODS)
+def test_stable_far_beyond_the_explicit_step_limit(method):
+    trajectory = solve_stiff(compile_system(STIFF), 0.0, 0.0, 0.05, 2.0, method=method)
+    assert np.all(np.isfinite(trajectory.y))
+    assert trajectory.y_final == pytest.approx(exact(2.0), abs=5e-3)
+
+
+def test_trbdf2_accuracy_and_factorization_reuse():
+    trajectory = solve_stiff(compile_system(STIFF), 0.0, 0.0, 0.01, 2.0, method="TR-BDF2")
+    # h is too long to resolve the initial transient; its error is damped out by x = 0.5
+    x = trajectory.x[trajectory.x > 0.5]
+    assert np.allclose(trajectory(x), exact(x), atol=1e-5)
+    stats = trajectory.stats
+    assert stats["accepted"] == 200
+    # The Jacobian of a linear problem never needs recomputing
+    assert stats["n_jacobians"] == 1
+    assert stats["n_factorizations"] <= 3
+
+
+def test_stiff_system_matches_the_matrix_exponential():
+    A = np.array([[-1000.0, 1.0], [0.0, -0.5]])
+    f = compile_system("-1000*y[0] + y[1]; -0.5*y[1]")
+    trajectory = solve_stiff(f, 0.0, [1.0, 1.0], 0.01, 1.0, method="TR-BDF2")
+    eigenvalues, vectors = np.linalg.eig(A)
+    expected = vectors @ (np.exp(eigenvalues) * np.linalg.solve(vectors, [1.0, 1.0]))
+    assert np.allclose(trajectory.y_final, expected, rtol=1e-4)
+
+
+def test_numerical_jacobian():
+    def f(x, y):
+        return np.array([y[0] * y[1], np.sin(y[0])])
+    J = numerical_jacobian(f, 0.0, np.array([1.0, 2.0]))
+    assert np.allclose(J, [[2.0, 1.0], [np.cos(1.0), 0.0]], atol=1e-6)